@@ -0,0 +1,211 @@
+"""Admission control: per-lane concurrency limits with bounded, deadline-limited wait queues.
+
+Each request is put in a lane based on its method and path, before routing and before the body is read:
+
+- read: GET/HEAD of single records and pages (lists, detail views, static files);
+- aggregate: GET/HEAD that scan the whole garage (dashboard stats, search, delta sync);
+- write: creates, edits and deletes;
+- heavy: uploads and import/export.
+
+A lane runs at most `limit` requests at once. Up to `queue` more wait in FIFO order, each for at
+most GARAGE_ADMISSION_MAX_WAIT_SECONDS. Beyond that, or past the deadline, the request gets 503
+with a Retry-After estimated from how long the lane's requests have recently held their slot.
+
+A slot covers only the server's own work. A request with a body queues once the app has received
+the last of it (the upload routes parse and store it themselves, with file writes off the event
+loop). The slot is released when the response starts if its body is already built (it has a
+Content-Length), else with the last chunk, so a streamed export holds it while its rows are read
+and encoded. A client trickling an upload in, or slowly downloading a finished response, holds no
+slot. Lanes don't share slots, so a flood of uploads queues behind its own limit while reads keep
+theirs, and a burst of dashboard recomputes can't take the slots cheap reads need. The default
+limits add up to less than anyio's 40 threadpool tokens, so no lane can take every thread. Health,
+metrics, login (which bounds its own hashing) and the long-lived /api/events streams (capped by
+GARAGE_EVENTS_MAX_CLIENTS) are never queued. Limits are per worker process.
+"""
+import asyncio
+import math
+import time
+from collections import deque
+
+from fastapi.responses import JSONResponse
+
+from .config import settings
+from .telemetry import timed
+from .uploads import UPLOAD_PATH_SUFFIXES
+
+EXEMPT_PATHS = ("/api/health", "/api/metrics", "/api/auth/login", "/api/events")
+HEAVY_PREFIXES = ("/api/import/", "/api/export/")
+AGGREGATE_PREFIXES = ("/api/dashboard/", "/api/search", "/api/sync")
+READ_METHODS = ("GET", "HEAD")
+
+
+class Lane:
+    def __init__(self, name: str, limit: int, queue: int, max_wait: float):
+        self.name = name
+        self.limit = limit
+        self.queue = queue
+        self.max_wait = max_wait
+        self.active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        # Moving average of how long a request holds its slot, for Retry-After
+        self._hold_seconds = 0.0
+        self.admitted = 0
+        self.waited_seconds = 0.0
+        self.rejected = {"queue_full": 0, "timeout": 0}
+
+    async def acquire(self) -> str | None:
+        """Take a slot, waiting if needed; returns None when admitted, else why it was refused."""
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return None
+        if len(self._waiters) >= self.queue:
+            self.rejected["queue_full"] += 1
+            return "queue_full"
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.perf_counter()
+        try:
+            await asyncio.wait((waiter,), timeout=self.max_wait)
+        except BaseException:
+            # Cancelled while queued: give back a slot handed over in the meantime
+            if waiter.done() and not waiter.cancelled():
+                self.release(0.0)
+            else:
+                waiter.cancel()
+                self._waiters.remove(waiter)
+            raise
+        finally:
+            self.waited_seconds += time.perf_counter() - start
+        if waiter.done():
+            # release() already counted the slot as ours
+            self.admitted += 1
+            return None
+        waiter.cancel()
+        self._waiters.remove(waiter)
+        self.rejected["timeout"] += 1
+        return "timeout"
+
+    def release(self, held: float):
+        self._hold_seconds += (held - self._hold_seconds) * 0.1
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next waiter, so newcomers can't overtake the queue
+                waiter.set_result(None)
+                return
+        self.active -= 1
+
+    def retry_after(self) -> int:
+        """Seconds until the queue has likely drained enough to admit a new request."""
+        estimate = self._hold_seconds * (len(self._waiters) + 1) / max(self.limit, 1)
+        return min(max(math.ceil(estimate), 1), 30)
+
+    def stats(self) -> dict:
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            "queued": len(self._waiters),
+            "admitted": self.admitted,
+            "waited_seconds": self.waited_seconds,
+            "rejected": dict(self.rejected),
+        }
+
+
+lanes = {
+    "read": Lane("read", settings.admission_read_limit, settings.admission_read_queue, settings.admission_max_wait_seconds),
+    "aggregate": Lane(
+        "aggregate", settings.admission_aggregate_limit, settings.admission_aggregate_queue, settings.admission_max_wait_seconds
+    ),
+    "write": Lane("write", settings.admission_write_limit, settings.admission_write_queue, settings.admission_max_wait_seconds),
+    "heavy": Lane("heavy", settings.admission_heavy_limit, settings.admission_heavy_queue, settings.admission_max_wait_seconds),
+}
+
+
+def lane_for(method: str, path: str) -> Lane | None:
+    if method == "OPTIONS" or path.startswith(EXEMPT_PATHS):
+        return None
+    if path.startswith(HEAVY_PREFIXES) or (method == "POST" and path.endswith(UPLOAD_PATH_SUFFIXES)):
+        lane = lanes["heavy"]
+    elif method in READ_METHODS:
+        lane = lanes["aggregate"] if path.startswith(AGGREGATE_PREFIXES) else lanes["read"]
+    else:
+        lane = lanes["write"]
+    return lane if lane.limit > 0 else None
+
+
+def _has_body(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"content-length":
+            return value.strip() not in (b"", b"0")
+        if name == b"transfer-encoding":
+            return True
+    return False
+
+
+class AdmissionMiddleware:
+    """Queue or shed requests per lane; see the module docstring."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        lane = lane_for(scope["method"], scope["path"]) if scope["type"] == "http" and settings.admission_control else None
+        if lane is None:
+            await self.app(scope, receive, send)
+            return
+        start = 0.0
+        asked = held = refused = False
+
+        async def admit() -> bool:
+            nonlocal start, asked, held, refused
+            asked = True
+            with timed("queue"):
+                reason = await lane.acquire()
+            if reason:
+                refused = True
+                response = JSONResponse(
+                    {"detail": "Server busy, try again shortly"},
+                    status_code=503,
+                    headers={"Retry-After": str(lane.retry_after())},
+                )
+                await response(scope, receive, send)
+                return False
+            held = True
+            start = time.perf_counter()
+            return True
+
+        def release():
+            nonlocal held
+            if held:
+                held = False
+                lane.release(time.perf_counter() - start)
+
+        async def receive_then_admit():
+            # Queue only once the whole body is in, so a slow upload holds no slot while it arrives
+            if refused:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request" and not message.get("more_body", False) and not asked:
+                if not await admit():
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def send_and_release(message):
+            if refused:
+                return
+            if message["type"] == "http.response.start":
+                # A body of known length is already produced (or is a file on disk), so sending it
+                # to the client needs no slot; a streamed one (exports) is still being built
+                if any(name == b"content-length" for name, _ in message.get("headers", ())):
+                    release()
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                release()
+            await send(message)
+
+        if not _has_body(scope) and not await admit():
+            return
+        try:
+            await self.app(scope, receive_then_admit, send_and_release)
+        finally:
+            release()
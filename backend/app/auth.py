@@ -1,12 +1,27 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime, timedelta
+
+from fastapi import HTTPException, status
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+
 from .config import settings
+from .telemetry import timed
+
+logger = logging.getLogger(__name__)
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
 
-def verify_password(plain: str, hashed: str) -> bool:
+def verify_password(plain: str, hashed: str | None) -> bool:
+    """Check plain against hashed; with no hash, spend the same time and return False."""
+    if hashed is None:
+        pwd_context.dummy_verify()
+        return False
     return pwd_context.verify(plain, hashed)
 
 
@@ -14,6 +29,77 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+# bcrypt is CPU-bound by design: run it in its own processes, not the request threadpool, and
+# refuse work beyond a fixed backlog instead of letting a login burst queue up behind it
+_pool: ProcessPoolExecutor | None = None
+_in_flight = 0
+_rejected = 0
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.password_hash_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    # A worker died (OOM kill, crash) and the executor refuses all further work; the next login
+    # starts a fresh one. Other logins that were on the old pool fail the same way and end up here too.
+    global _pool
+    if _pool is pool:
+        logger.warning("Password hashing pool broke; starting a new one")
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _run_hashing(fn, *args):
+    global _in_flight, _rejected
+    if _in_flight >= settings.password_hash_workers + settings.password_hash_queue:
+        _rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many logins in progress, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    _in_flight += 1
+    pool = _get_pool()
+    try:
+        with timed("hash"):
+            return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Login temporarily unavailable, try again shortly",
+            headers={"Retry-After": "1"},
+        )
+    finally:
+        _in_flight -= 1
+
+
+async def verify_password_async(plain: str, hashed: str | None) -> bool:
+    return await _run_hashing(verify_password, plain, hashed)
+
+
+def hashing_stats() -> dict:
+    return {
+        "workers": settings.password_hash_workers,
+        "in_flight": _in_flight,
+        "limit": settings.password_hash_workers + settings.password_hash_queue,
+        "rejected": _rejected,
+    }
+
+
 def create_access_token(data: dict) -> str:
     to_encode = data.copy()
     expire = datetime.utcnow() + timedelta(minutes=settings.access_token_expire_minutes)
@@ -0,0 +1,95 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Thread-safe LRU cache with per-entry expiry and hit/miss counters.
+
+    With a weigher (value -> size, e.g. len for bytes), entries are also evicted to keep the total
+    weight under maxweight.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, weigher=None, maxweight: int | None = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigher = weigher
+        self.maxweight = maxweight
+        self.weight = 0
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _drop(self, key):
+        value, _ = self._data.pop(key)
+        if self.weigher:
+            self.weight -= self.weigher(value)
+        return value
+
+    def get(self, key):
+        now = time.monotonic()
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None or entry[1] <= now:
+                if entry is not None:
+                    self._drop(key)
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def set(self, key, value, ttl: float | None = None):
+        if self.maxsize <= 0:
+            return
+        ttl = self.ttl if ttl is None else min(ttl, self.ttl)
+        if ttl <= 0:
+            return
+        weight = self.weigher(value) if self.weigher else 0
+        if self.maxweight is not None and weight > self.maxweight:
+            return
+        with self._lock:
+            if key in self._data:
+                self._drop(key)
+            self._data[key] = (value, time.monotonic() + ttl)
+            self.weight += weight
+            while len(self._data) > self.maxsize or (self.maxweight is not None and self.weight > self.maxweight):
+                self._drop(next(iter(self._data)))
+                self.evictions += 1
+
+    def pop(self, key):
+        with self._lock:
+            return self._drop(key) if key in self._data else None
+
+    def discard_where(self, predicate) -> int:
+        """Drop every entry whose key matches predicate(key). Returns the number dropped."""
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for k in keys:
+                self._drop(k)
+        return len(keys)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.weight = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        stats = {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+        if self.weigher:
+            stats["weight"] = self.weight
+            stats["maxweight"] = self.maxweight
+        return stats
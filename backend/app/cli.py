@@ -0,0 +1,106 @@
+"""Maintenance commands. Run from backend/: python -m app.cli <command>"""
+import argparse
+
+from .database import SessionLocal
+
+
+def migrate(args):
+    from .migrations import upgrade
+    applied = upgrade()
+    for step in applied:
+        print(f"Applied {step}")
+    if not applied:
+        print("Schema is up to date")
+
+
+def rebuild_rollups(args):
+    from . import rollups
+    db = SessionLocal()
+    try:
+        n = rollups.rebuild(db)
+    finally:
+        db.close()
+    print(f"Rebuilt {n} spend rollup rows")
+
+
+def backfill_photo_variants(args):
+    from . import images
+    db = SessionLocal()
+    try:
+        n, failed = images.backfill(db, force=args.force)
+    finally:
+        db.close()
+        images.shutdown_pool()
+    print(f"Generated photo variants for {n} vehicles")
+    if failed:
+        print(f"Skipped {failed} vehicles whose photo could not be processed (see the log)")
+
+
+def _backfill_args(p):
+    p.add_argument("--force", action="store_true", help="Also re-process vehicles that already have variants")
+
+
+def gc_uploads(args):
+    from .uploads import collect_garbage
+    db = SessionLocal()
+    try:
+        files, size = collect_garbage(db, grace_seconds=args.grace_seconds, dry_run=args.dry_run)
+    finally:
+        db.close()
+    verb = "Would remove" if args.dry_run else "Removed"
+    print(f"{verb} {files} unreferenced upload files ({size / (1024 * 1024):.1f} MB)")
+
+
+def _gc_args(p):
+    p.add_argument("--dry-run", action="store_true", help="Report what would be removed without deleting")
+    p.add_argument("--grace-seconds", type=int, default=3600, help="Keep files modified more recently than this")
+
+
+def rebuild_search(args):
+    from . import search
+    db = SessionLocal()
+    try:
+        n = search.rebuild(db)
+    finally:
+        db.close()
+    print(f"Indexed {n} maintenance and mod records")
+
+
+def precompress_dist(args):
+    from .config import settings
+    from .static import precompress
+    if not settings.frontend_dist or not settings.frontend_dist.is_dir():
+        raise SystemExit("GARAGE_FRONTEND_DIST is not set to a built frontend")
+    n = precompress(settings.frontend_dist)
+    print(f"Wrote {n} precompressed files")
+
+
+# name -> (handler, help, add_arguments)
+COMMANDS = {
+    "migrate": (migrate, "Apply pending schema migrations", None),
+    "rebuild-rollups": (rebuild_rollups, "Recompute dashboard spend rollups from maintenance and mods", None),
+    "rebuild-search": (rebuild_search, "Repopulate the full-text search index from maintenance and mods", None),
+    "backfill-photo-variants": (
+        backfill_photo_variants, "Build resized variants for existing vehicle photos", _backfill_args,
+    ),
+    "gc-uploads": (gc_uploads, "Delete uploaded files no vehicle or maintenance record references", _gc_args),
+    "precompress-dist": (precompress_dist, "Write .gz/.br copies of the built frontend for static serving", None),
+}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    sub = parser.add_subparsers(dest="command", required=True)
+    for name, (_, help_text, add_arguments) in COMMANDS.items():
+        p = sub.add_parser(name, help=help_text)
+        if add_arguments:
+            add_arguments(p)
+    args = parser.parse_args(argv)
+    if args.command != "migrate":
+        from .migrations import upgrade
+        upgrade()
+    COMMANDS[args.command][0](args)
+
+
+if __name__ == "__main__":
+    main()
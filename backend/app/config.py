@@ -7,8 +7,83 @@ class Settings(BaseSettings):
     secret_key: str = "change-me-in-production-use-env"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60 * 24 * 7  # 1 week
+    # Authenticated-principal cache (0 size disables)
+    auth_cache_size: int = 1024
+    auth_cache_ttl_seconds: int = 300
+    # Password hashing runs in this many processes; logins beyond workers + queue get a 503
+    password_hash_workers: int = 2
+    password_hash_queue: int = 8
+    # Login attempts allowed per window, per username and per client IP (0 disables), checked before hashing
+    login_attempts_per_username: int = 10
+    login_attempts_per_ip: int = 30
+    login_attempt_window_seconds: float = 300
+    # Admission control (app.admission): concurrent requests per lane, how many more may wait and for how
+    # long before a 503; a lane limit of 0 disables it
+    admission_control: bool = True
+    admission_read_limit: int = 24
+    admission_read_queue: int = 96
+    admission_aggregate_limit: int = 4
+    admission_aggregate_queue: int = 32
+    admission_write_limit: int = 2
+    admission_write_queue: int = 32
+    admission_heavy_limit: int = 1
+    admission_heavy_queue: int = 8
+    admission_max_wait_seconds: float = 5
+    # /api/events: how often each worker checks the change log for other workers' writes, events buffered
+    # per client before a slow one is dropped, and change log rows kept for Last-Event-ID resume
+    events_poll_seconds: float = 1.0
+    events_client_buffer: int = 256
+    events_keepalive_seconds: float = 15
+    events_max_clients: int = 100
+    events_retention: int = 10_000
+    # /api/sync: days a deletion stays visible to delta syncs; older tokens get a full snapshot (0 keeps forever)
+    sync_tombstone_retention_days: int = 90
+    # Serialized JSON of hot read endpoints (0 size disables)
+    response_cache_size: int = 256
+    response_cache_ttl_seconds: int = 300
+    response_cache_max_bytes: int = 16 * 1024 * 1024
     database_url: str = "sqlite:///./garage.db"
+    # "production": WAL + tuned pragmas, a single writer connection and a read-only pool.
+    # "default": one plain engine, as SQLAlchemy configures it.
+    sqlite_profile: str = "production"
+    sqlite_journal_mode: str = "wal"
+    sqlite_synchronous: str = "normal"
+    sqlite_busy_timeout_ms: int = 5000
+    sqlite_mmap_size: int = 256 * 1024 * 1024
+    sqlite_cache_size_kib: int = 64 * 1024
+    sqlite_read_pool_size: int = 8
+    sqlite_writer_timeout_seconds: float = 30
+    # List endpoints select plain columns and dump them straight to JSON bytes (app.fastjson)
+    fast_serialization: bool = False
+    # Add a Server-Timing header (auth, db, serialize, total) to every response
+    server_timing: bool = False
+    # Diagnostics: log statements slower than slow_query_ms, and statement shapes repeated
+    # n_plus_one_threshold times in one request (suspected N+1)
+    sql_diagnostics: bool = False
+    slow_query_ms: float = 100
+    n_plus_one_threshold: int = 5
+    # GET /api/metrics needs a user's bearer token; if set, "Authorization: Bearer <metrics_token>" also works
+    metrics_token: str | None = None
+    # Apply pending schema migrations at startup; set false to run `python -m app.cli migrate` yourself
+    auto_migrate: bool = True
+    migration_lock_timeout_seconds: float = 600
+    # Opt-in: run router DB work on an AsyncEngine (aiosqlite) instead of the threadpool
+    db_async: bool = False
+    async_database_url: str | None = None
     upload_dir: Path = Path("./uploads")
+    max_upload_bytes: int = 20 * 1024 * 1024
+    # Resized vehicle photo variants: "webp" or "jpeg", built in a pool of image_workers processes
+    photo_variant_format: str = "webp"
+    image_workers: int = 2
+    # Production server (python run.py --prod); 0 workers means one per CPU
+    server_host: str = "0.0.0.0"
+    server_port: int = 8000
+    server_workers: int = 0
+    server_keep_alive_seconds: int = 5
+    server_backlog: int = 2048
+    # Per worker: connections/tasks beyond this get a 503 instead of queueing (unset: no limit)
+    server_limit_concurrency: int | None = None
+    server_graceful_shutdown_seconds: int = 30
     # Set to path to frontend dist (e.g. ../frontend/dist) to serve SPA in production
     frontend_dist: Path | None = None
 
@@ -22,6 +97,3 @@ class Settings(BaseSettings):
 
 
 settings = Settings()
-settings.upload_dir.mkdir(parents=True, exist_ok=True)
-(settings.upload_dir / "vehicles").mkdir(exist_ok=True)
-(settings.upload_dir / "receipts").mkdir(exist_ok=True)
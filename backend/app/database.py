@@ -1,18 +1,159 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+from sqlalchemy import create_engine, event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session, sessionmaker, declarative_base
+from starlette.concurrency import run_in_threadpool
 from .config import settings
 
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False} if "sqlite" in settings.database_url else {},
-)
+_is_sqlite = "sqlite" in settings.database_url
+_tuned = _is_sqlite and settings.sqlite_profile == "production"
+
+
+def _sqlite_pragmas(read_only: bool):
+    def on_connect(dbapi_conn, _record):
+        cur = dbapi_conn.cursor()
+        cur.execute(f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout_ms)}")
+        cur.execute(f"PRAGMA journal_mode={settings.sqlite_journal_mode}")
+        cur.execute(f"PRAGMA synchronous={settings.sqlite_synchronous}")
+        cur.execute(f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}")
+        # Negative cache_size is in KiB rather than pages
+        cur.execute(f"PRAGMA cache_size={-int(settings.sqlite_cache_size_kib)}")
+        if read_only:
+            cur.execute("PRAGMA query_only=ON")
+        cur.close()
+    return on_connect
+
+
+def begin_immediate(sync_engine):
+    """Start every transaction on sync_engine with BEGIN IMMEDIATE, i.e. take SQLite's write lock up front.
+
+    A deferred transaction that reads and then writes fails at once with SQLITE_BUSY if another
+    process committed in between; taking the lock first makes it wait out busy_timeout instead.
+    """
+    @event.listens_for(sync_engine, "connect")
+    def _no_driver_begin(dbapi_conn, _record):
+        # Let the "begin" event below issue BEGIN instead of the driver
+        dbapi_conn.isolation_level = None
+
+    @event.listens_for(sync_engine, "begin")
+    def _begin(conn):
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+
+
+if _tuned:
+    # One writer connection: every write session queues for it instead of fighting over the file lock
+    engine = create_engine(
+        settings.database_url,
+        connect_args={"check_same_thread": False},
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=settings.sqlite_writer_timeout_seconds,
+    )
+    event.listen(engine, "connect", _sqlite_pragmas(read_only=False))
+    # Writers in other worker processes (run.py --prod) queue on the file lock rather than fail
+    begin_immediate(engine)
+    # Readers get their own query_only pool; under WAL they don't block on (or behind) the writer
+    read_engine = create_engine(
+        settings.database_url,
+        connect_args={"check_same_thread": False},
+        pool_size=settings.sqlite_read_pool_size,
+        max_overflow=0,
+    )
+    event.listen(read_engine, "connect", _sqlite_pragmas(read_only=True))
+else:
+    engine = create_engine(
+        settings.database_url,
+        connect_args={"check_same_thread": False} if _is_sqlite else {},
+    )
+    read_engine = engine
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+ReadSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=read_engine)
 Base = declarative_base()
 
 
+def _async_url() -> str:
+    if settings.async_database_url:
+        return settings.async_database_url
+    if _is_sqlite:
+        return settings.database_url.replace("sqlite://", "sqlite+aiosqlite://", 1)
+    raise RuntimeError("Set GARAGE_ASYNC_DATABASE_URL to use GARAGE_DB_ASYNC with a non-SQLite database")
+
+
+if settings.db_async:
+    if _tuned:
+        async_engine = create_async_engine(
+            _async_url(), poolclass=AsyncAdaptedQueuePool, pool_size=1, max_overflow=0, pool_timeout=settings.sqlite_writer_timeout_seconds,
+        )
+        event.listen(async_engine.sync_engine, "connect", _sqlite_pragmas(read_only=False))
+        begin_immediate(async_engine.sync_engine)
+        async_read_engine = create_async_engine(
+            _async_url(), poolclass=AsyncAdaptedQueuePool, pool_size=settings.sqlite_read_pool_size, max_overflow=0,
+        )
+        event.listen(async_read_engine.sync_engine, "connect", _sqlite_pragmas(read_only=True))
+    else:
+        async_engine = async_read_engine = create_async_engine(_async_url())
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+    AsyncReadSessionLocal = async_sessionmaker(async_read_engine, autoflush=False, expire_on_commit=False)
+
+
+class ThreadedSession:
+    """A sync Session behind AsyncSession's run_sync() interface, run on the threadpool.
+
+    Lets async handlers share one code path whether or not the async engine is enabled.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def run_sync(self, fn, *args, **kwargs):
+        return await run_in_threadpool(fn, self.session, *args, **kwargs)
+
+    async def close(self):
+        # Nothing to roll back means no I/O, so skip the thread hop
+        if self.session.in_transaction():
+            await run_in_threadpool(self.session.close)
+        else:
+            self.session.close()
+
+
+AsyncDB = AsyncSession | ThreadedSession
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def get_read_db():
+    """Session for handlers that only read; served from the read-only pool."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+
+def new_async_read_session() -> AsyncDB:
+    """A read session outside any request (e.g. for work shared between requests); caller closes it."""
+    return AsyncReadSessionLocal() if settings.db_async else ThreadedSession(ReadSessionLocal())
+
+
+async def get_async_db():
+    """Async-handler session: a real AsyncSession with GARAGE_DB_ASYNC, else a ThreadedSession."""
+    db = AsyncSessionLocal() if settings.db_async else ThreadedSession(SessionLocal())
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def get_async_read_db():
+    db = new_async_read_session()
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -1,24 +1,46 @@
+import hashlib
+import time
+
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
+from sqlalchemy import event
 from sqlalchemy.orm import Session
 
-from .database import get_db
+from .database import get_read_db, get_async_read_db, AsyncDB
 from .auth import decode_token
+from .cache import TTLCache
+from .config import settings
 from .models import User
+from .telemetry import timed
 
+# Token hash -> resolved (detached) User, so repeat requests skip JWT verification and the users lookup
+principal_cache = TTLCache(settings.auth_cache_size, settings.auth_cache_ttl_seconds)
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials | None = Depends(HTTPBearer(auto_error=False)),
-    db: Session = Depends(get_db),
-):
+bearer = HTTPBearer(auto_error=False)
+
+
+def _token_key(token: str) -> str:
+    # Keyed on the signing secret too, so rotating it orphans every cached principal
+    raw = f"{settings.algorithm}:{settings.secret_key}:{token}".encode()
+    return hashlib.sha256(raw).hexdigest()
+
+
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_principals(mapper, connection, target):
+    principal_cache.clear()
+
+
+def _verify(credentials: HTTPAuthorizationCredentials | None) -> tuple[str, dict]:
+    """Return (username, payload) for a valid bearer token, else raise 401."""
     if not credentials:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Not authenticated",
             headers={"WWW-Authenticate": "Bearer"},
         )
-    token = credentials.credentials
-    payload = decode_token(token)
+    payload = decode_token(credentials.credentials)
     if not payload:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -28,7 +50,47 @@ def get_current_user(
     username = payload.get("sub")
     if not username:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid token")
+    return username, payload
+
+
+def _load_user(db: Session, username: str) -> User:
     user = db.query(User).filter(User.username == username).first()
     if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="User not found")
+    # Detach so the handler's commit doesn't expire it; the cached copy outlives this session
+    db.expunge(user)
     return user
+
+
+def _cache_user(key: str, user: User, payload: dict):
+    principal_cache.set(key, user, ttl=payload.get("exp", 0) - time.time())
+
+
+def get_current_user(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer),
+    db: Session = Depends(get_read_db),
+):
+    with timed("auth"):
+        key = credentials and _token_key(credentials.credentials)
+        user = key and principal_cache.get(key)
+        if user:
+            return user
+        username, payload = _verify(credentials)
+        user = _load_user(db, username)
+        _cache_user(key, user, payload)
+        return user
+
+
+async def get_current_user_async(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer),
+    db: AsyncDB = Depends(get_async_read_db),
+):
+    with timed("auth"):
+        key = credentials and _token_key(credentials.credentials)
+        user = key and principal_cache.get(key)
+        if user:
+            return user
+        username, payload = _verify(credentials)
+        user = await db.run_sync(_load_user, username)
+        _cache_user(key, user, payload)
+        return user
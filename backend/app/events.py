@@ -0,0 +1,307 @@
+"""Change feed for GET /api/events (Server-Sent Events).
+
+Every flush that creates, updates or deletes a vehicle, maintenance record or mod appends rows to
+change_events in the same transaction. The log therefore holds exactly what was committed, in
+commit order, whichever worker committed it. Each process runs one Broadcaster task that tails
+the log and encodes each new event once. It then appends the bytes to every subscriber's bounded
+buffer.
+
+A local commit wakes the tailer at once. Writes made by other workers arrive within
+GARAGE_EVENTS_POLL_SECONDS. A client that doesn't read fast enough to keep its buffer under
+GARAGE_EVENTS_CLIENT_BUFFER is disconnected. The SSE id is the log position, so when it
+reconnects with Last-Event-ID it resumes where it left off. With several workers, that id may be
+ahead of the worker it reconnects to, whose tailer hasn't read the newest events yet; the stream
+then skips those events as they arrive. When the log no longer reaches back that far, or the id
+is past its end, the client gets a `reset` event and must refetch.
+"""
+import asyncio
+import json
+import logging
+import signal
+import threading
+import time
+from collections import deque
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from .config import settings
+from .database import SessionLocal, new_async_read_session
+from .models import ChangeEvent, Maintenance, Mod, Vehicle
+
+logger = logging.getLogger(__name__)
+
+ENTITIES = {Vehicle: "vehicle", Maintenance: "maintenance", Mod: "mod"}
+# session.info key: change rows were logged in the open transaction, so wake the tailer on commit
+PENDING = "change_events_pending"
+RESET = b"event: reset\ndata: {}\n\n"
+_COLUMNS = (ChangeEvent.id, ChangeEvent.entity, ChangeEvent.entity_id, ChangeEvent.vehicle_id, ChangeEvent.action)
+_BATCH = 500
+_PRUNE_INTERVAL_SECONDS = 60
+
+
+def record(db: Session, rows: list[dict]):
+    """Log changes (entity, entity_id, vehicle_id, action) in db's open transaction."""
+    db.execute(ChangeEvent.__table__.insert(), rows)
+    db.info[PENDING] = True
+
+
+def _change(obj, action: str) -> dict:
+    vehicle_id = obj.id if isinstance(obj, Vehicle) else obj.vehicle_id
+    return {"entity": ENTITIES[type(obj)], "entity_id": obj.id, "vehicle_id": vehicle_id, "action": action}
+
+
+@event.listens_for(Session, "after_flush")
+def _log_changes(session: Session, flush_context):
+    rows = [_change(obj, "created") for obj in session.new if type(obj) in ENTITIES]
+    # A vehicle's deletion implies its records'; don't log every cascaded child
+    deleted_vehicles = {obj.id for obj in session.deleted if isinstance(obj, Vehicle)}
+    rows += [
+        _change(obj, "deleted") for obj in session.deleted
+        if type(obj) in ENTITIES and (isinstance(obj, Vehicle) or obj.vehicle_id not in deleted_vehicles)
+    ]
+    rows += [
+        _change(obj, "updated") for obj in session.dirty
+        if type(obj) in ENTITIES and session.is_modified(obj, include_collections=False)
+    ]
+    if rows:
+        record(session, rows)
+
+
+@event.listens_for(Session, "after_commit")
+def _wake_broadcaster(session: Session):
+    if session.info.pop(PENDING, False):
+        broadcaster.wake()
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changes(session: Session):
+    session.info.pop(PENDING, None)
+
+
+def latest_id(db: Session) -> int:
+    newest = db.execute(select(func.max(ChangeEvent.id))).scalar() or 0
+    db.rollback()
+    return newest
+
+
+def events_after(db: Session, after: int, limit: int, upto: int | None = None) -> list:
+    query = select(*_COLUMNS).where(ChangeEvent.id > after)
+    if upto is not None:
+        query = query.where(ChangeEvent.id <= upto)
+    rows = db.execute(query.order_by(ChangeEvent.id).limit(limit)).all()
+    db.rollback()
+    return rows
+
+
+def resumable(db: Session, after: int, upto: int) -> bool:
+    """Whether every event in (after, upto] is still in the log."""
+    oldest = db.execute(select(func.min(ChangeEvent.id))).scalar()
+    db.rollback()
+    return after <= upto and (oldest is None or oldest <= after + 1)
+
+
+def prune(keep: int) -> int:
+    """Delete all but the newest `keep` events; returns how many were removed."""
+    db = SessionLocal()
+    try:
+        newest = db.execute(select(func.max(ChangeEvent.id))).scalar() or 0
+        removed = db.execute(ChangeEvent.__table__.delete().where(ChangeEvent.id <= newest - keep)).rowcount
+        db.commit()
+        return removed
+    finally:
+        db.close()
+
+
+def encode(row) -> bytes:
+    data = {"version": row.id, "entity": row.entity, "id": row.entity_id, "vehicle_id": row.vehicle_id, "action": row.action}
+    return f"id: {row.id}\nevent: change\ndata: {json.dumps(data, separators=(',', ':'))}\n\n".encode()
+
+
+class Subscriber:
+    __slots__ = ("buffer", "wakeup", "closed", "start")
+
+    def __init__(self, start: int):
+        self.buffer: deque[tuple[int, bytes]] = deque()
+        self.wakeup = asyncio.Event()
+        self.closed = False
+        # Log position the broadcaster had reached when this client joined; later events come via buffer
+        self.start = start
+
+
+class Broadcaster:
+    def __init__(self):
+        self.subscribers: set[Subscriber] = set()
+        # Newest event fanned out; None while nobody is listening
+        self.last_id: int | None = None
+        self.published = 0
+        self.evicted = 0
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._pruned_at = 0.0
+
+    def start(self):
+        self._loop = asyncio.get_running_loop()
+        self._wakeup = asyncio.Event()
+        self._task = self._loop.create_task(self._run())
+        self._close_on_exit_signals()
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        self._close_all()
+        self._loop = None
+
+    def _close_on_exit_signals(self):
+        # uvicorn waits for open responses (up to the graceful-shutdown timeout) before running shutdown
+        # hooks, and a stream never finishes on its own. So end the streams as soon as the server is told
+        # to stop; clients reconnect with Last-Event-ID. Chains to uvicorn's handler, which is already set.
+        if threading.current_thread() is not threading.main_thread():
+            return
+        for sig in (signal.SIGINT, signal.SIGTERM, getattr(signal, "SIGBREAK", None)):
+            previous = sig and signal.getsignal(sig)
+            if not callable(previous):
+                continue
+
+            def handler(signum, frame, previous=previous):
+                if self._loop is not None:
+                    self._loop.call_soon_threadsafe(self._close_all)
+                previous(signum, frame)
+            signal.signal(sig, handler)
+
+    def _close_all(self):
+        for sub in list(self.subscribers):
+            self._close(sub)
+
+    def wake(self):
+        """Poll the log now. Safe from any thread: commit hooks also run on threadpool threads."""
+        loop = self._loop
+        if loop is None or not self.subscribers:
+            return
+        try:
+            loop.call_soon_threadsafe(self._wakeup.set)
+        except RuntimeError:
+            pass  # loop already closed
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), settings.events_poll_seconds)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                if self.subscribers:
+                    await self._poll()
+                else:
+                    self.last_id = None
+                if time.monotonic() - self._pruned_at > _PRUNE_INTERVAL_SECONDS:
+                    self._pruned_at = time.monotonic()
+                    await run_in_threadpool(prune, settings.events_retention)
+            except Exception:
+                logger.exception("Reading the change event log failed")
+
+    async def _poll(self):
+        db = new_async_read_session()
+        try:
+            while self.last_id is not None:
+                rows = await db.run_sync(events_after, self.last_id, _BATCH)
+                if rows:
+                    self._publish(rows)
+                if len(rows) < _BATCH:
+                    break
+        finally:
+            await db.close()
+
+    def _publish(self, rows):
+        chunks = [(row.id, encode(row)) for row in rows]
+        self.last_id = rows[-1].id
+        self.published += len(rows)
+        for sub in list(self.subscribers):
+            if len(sub.buffer) + len(chunks) > settings.events_client_buffer:
+                # Slow consumer: drop it rather than buffer without bound; it resumes via Last-Event-ID
+                self.evicted += 1
+                self._close(sub)
+                continue
+            sub.buffer.extend(chunks)
+            sub.wakeup.set()
+
+    def _close(self, sub: Subscriber):
+        sub.closed = True
+        self.subscribers.discard(sub)
+        sub.wakeup.set()
+
+    async def _subscribe(self) -> Subscriber:
+        if self.last_id is None:
+            db = new_async_read_session()
+            try:
+                newest = await db.run_sync(latest_id)
+            finally:
+                await db.close()
+            if self.last_id is None:
+                self.last_id = newest
+        sub = Subscriber(self.last_id)
+        self.subscribers.add(sub)
+        return sub
+
+    async def _in_log(self, event_id: int) -> bool:
+        """Whether event_id has been committed, even if this worker's tailer hasn't read it yet."""
+        db = new_async_read_session()
+        try:
+            return event_id <= await db.run_sync(latest_id)
+        finally:
+            await db.close()
+
+    async def _backfill(self, after: int, upto: int) -> list[bytes] | None:
+        """Events in (after, upto] from the log, or None if some were already pruned."""
+        db = new_async_read_session()
+        try:
+            if not await db.run_sync(resumable, after, upto):
+                return None
+            return [encode(row) for row in await db.run_sync(events_after, after, settings.events_retention, upto)]
+        finally:
+            await db.close()
+
+    async def stream(self, after: int | None):
+        """SSE body for one client; after is its Last-Event-ID, if any."""
+        sub = await self._subscribe()
+        try:
+            yield b"retry: 3000\n\n"
+            # Events up to here reached the client already; skip them when the tailer publishes them
+            seen = 0
+            if after is not None and after > sub.start:
+                if not await self._in_log(after):
+                    yield RESET
+                    return
+                seen = after
+            elif after is not None and after != sub.start:
+                chunks = await self._backfill(after, sub.start)
+                if chunks is None:
+                    yield RESET
+                    return
+                if chunks:
+                    yield b"".join(chunks)
+            while not sub.closed or sub.buffer:
+                if not sub.buffer:
+                    try:
+                        await asyncio.wait_for(sub.wakeup.wait(), settings.events_keepalive_seconds)
+                    except asyncio.TimeoutError:
+                        yield b": keepalive\n\n"
+                        continue
+                    sub.wakeup.clear()
+                chunks = [chunk for event_id, chunk in sub.buffer if event_id > seen]
+                sub.buffer.clear()
+                if chunks:
+                    yield b"".join(chunks)
+        finally:
+            self.subscribers.discard(sub)
+
+    def stats(self) -> dict:
+        return {"subscribers": len(self.subscribers), "published": self.published, "evicted": self.evicted}
+
+
+broadcaster = Broadcaster()
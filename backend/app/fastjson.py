@@ -0,0 +1,35 @@
+"""Opt-in fast JSON path for list endpoints (GARAGE_FAST_SERIALIZATION).
+
+The default path loads ORM instances, and then FastAPI validates each one into the response model
+through from_attributes before dumping it. Here the query selects just the output columns as
+plain tuples, with no identity map or instance state. Each row is dumped straight to JSON bytes
+by a serializer compiled once from the schema. The values come from typed columns, so they
+aren't validated again.
+"""
+from fastapi import Response
+from pydantic import BaseModel, TypeAdapter
+from typing_extensions import TypedDict
+
+
+class RowSerializer:
+    """JSON bytes for rows of schema's fields, selected from model's table in field order."""
+
+    def __init__(self, schema: type[BaseModel], model):
+        self.fields = list(schema.model_fields)
+        self.columns = [model.__table__.c[name] for name in self.fields]
+        # A TypedDict twin of the schema: pydantic-core serializes dicts of it without validating
+        row_type = TypedDict(f"{schema.__name__}Row", {name: f.annotation for name, f in schema.model_fields.items()})
+        self._one = TypeAdapter(row_type)
+        self._many = TypeAdapter(list[row_type])
+
+    def dump_json(self, rows) -> bytes:
+        """rows: one Row, or a list of them."""
+        fields = self.fields
+        if isinstance(rows, list):
+            return self._many.dump_json([dict(zip(fields, row)) for row in rows])
+        return self._one.dump_json(dict(zip(fields, rows)))
+
+
+def json_response(body: bytes, response: Response) -> Response:
+    """Return pre-encoded JSON, keeping headers (ETag, cursor) already set on the injected response."""
+    return Response(body, media_type="application/json", headers=dict(response.headers))
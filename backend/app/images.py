@@ -0,0 +1,139 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+from .config import settings
+from .database import SessionLocal
+
+# Variant name -> max width in pixels (height follows aspect ratio)
+PHOTO_VARIANTS = {"sm": 320, "md": 640, "lg": 1280}
+# Named after the source file, which is content-addressed, so identical photos share variants
+VARIANT_DIR = "variants"
+# backfill() commits after each batch, so an interrupted run keeps what it finished
+BACKFILL_BATCH_SIZE = 50
+
+logger = logging.getLogger(__name__)
+
+_pool: ProcessPoolExecutor | None = None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.image_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+    return _pool
+
+
+def shutdown_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _discard_pool(pool: ProcessPoolExecutor):
+    # A worker died (OOM on a huge image, crash) and the executor refuses all further work
+    global _pool
+    if _pool is pool:
+        logger.warning("Image pool broke; starting a new one")
+        _pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+def generate_variants(upload_dir: str, photo_path: str, fmt: str) -> dict[str, str]:
+    """Write resized copies of upload_dir/photo_path. Runs in a worker process.
+
+    Returns {variant name: path relative to upload_dir}; variants never upscale.
+    """
+    from PIL import Image, ImageOps
+
+    root = Path(upload_dir)
+    ext = ".webp" if fmt == "webp" else ".jpg"
+    stem = Path(photo_path).stem
+    out_dir = root / VARIANT_DIR / stem[:2]
+    out_dir.mkdir(parents=True, exist_ok=True)
+    variants = {name: f"{VARIANT_DIR}/{stem[:2]}/{stem}_{name}{ext}" for name in PHOTO_VARIANTS}
+    if all((root / rel).is_file() for rel in variants.values()):
+        return variants
+    with Image.open(root / photo_path) as src:
+        img = ImageOps.exif_transpose(src)
+        img = img.convert("RGBA" if fmt == "webp" and img.mode in ("RGBA", "LA", "P") else "RGB")
+        for name, width in sorted(PHOTO_VARIANTS.items(), key=lambda kv: -kv[1]):
+            if img.width > width:
+                img = img.resize((width, max(1, round(img.height * width / img.width))), Image.LANCZOS)
+            rel = variants[name]
+            tmp = root / f"{rel}.part"
+            if fmt == "webp":
+                img.save(tmp, "WEBP", quality=80, method=4)
+            else:
+                img.save(tmp, "JPEG", quality=82, optimize=True, progressive=True)
+            tmp.replace(root / rel)
+    return variants
+
+
+def _record_variants(vehicle_id: int, photo_path: str, variants: dict[str, str]):
+    from .models import Vehicle
+    db = SessionLocal()
+    try:
+        v = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+        # Skip if the photo was replaced (or the vehicle deleted) while we were resizing
+        if v and v.photo_path == photo_path:
+            v.photo_variants = variants
+            db.commit()
+    finally:
+        db.close()
+
+
+async def build_photo_variants(vehicle_id: int, photo_path: str):
+    """Background task: resize in the process pool, then record the paths on the vehicle."""
+    loop = asyncio.get_running_loop()
+    pool = _get_pool()
+    try:
+        variants = await loop.run_in_executor(
+            pool, generate_variants, str(settings.upload_dir), photo_path, settings.photo_variant_format
+        )
+        await loop.run_in_executor(None, _record_variants, vehicle_id, photo_path, variants)
+    except BrokenProcessPool:
+        _discard_pool(pool)
+        logger.error("Image worker died building variants for %s; backfill-photo-variants retries it", photo_path)
+    except Exception:
+        logger.exception("Could not build photo variants for %s", photo_path)
+
+
+def backfill(db, force: bool = False) -> tuple[int, int]:
+    """Generate variants for every vehicle photo missing them. Returns (processed, failed).
+
+    A photo that can't be read or resized is logged and skipped; the rest are still committed.
+    """
+    from .models import Vehicle
+    q = db.query(Vehicle).filter(Vehicle.photo_path.isnot(None))
+    if not force:
+        q = q.filter(Vehicle.photo_variants.is_(None))
+    vehicles = [v for v in q.all() if (settings.upload_dir / v.photo_path).is_file()]
+    done = failed = 0
+    for start in range(0, len(vehicles), BACKFILL_BATCH_SIZE):
+        batch = vehicles[start:start + BACKFILL_BATCH_SIZE]
+        pool = _get_pool()
+        futures = [
+            pool.submit(generate_variants, str(settings.upload_dir), v.photo_path, settings.photo_variant_format)
+            for v in batch
+        ]
+        for v, fut in zip(batch, futures):
+            try:
+                v.photo_variants = fut.result()
+                done += 1
+            except BrokenProcessPool:
+                # The rest of this batch fails with it; later batches get a fresh pool
+                _discard_pool(pool)
+                failed += 1
+                logger.error("Image worker died on vehicle %s (%s)", v.id, v.photo_path)
+            except Exception:
+                failed += 1
+                logger.exception("Could not build photo variants for vehicle %s (%s)", v.id, v.photo_path)
+        db.commit()
+    return done, failed
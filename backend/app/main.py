@@ -1,80 +1,89 @@
+import logging
 from pathlib import Path
-from fastapi import FastAPI
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
 
-from .database import engine, Base, SessionLocal
 from .config import settings
-from .models import User
-from .auth import get_password_hash
-from .routers import auth, vehicles, maintenance, mods, dashboard
+from . import migrations
+from .routers import auth, vehicles, vehicle_detail, maintenance, mods, dashboard, transfer, metrics, search, events, sync
+from .uploads import UploadSizeLimitMiddleware, ensure_dirs
+from .admission import AdmissionMiddleware
+from .auth import shutdown_pool as shutdown_hash_pool
+from .images import shutdown_pool as shutdown_image_pool
+from .static import UploadFiles, DistIndex
+from .telemetry import TelemetryMiddleware
+from .events import broadcaster
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title=settings.app_name)
 
+# Innermost: oversized uploads are refused before queueing, and CORS headers reach the 503s
+app.add_middleware(AdmissionMiddleware)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:5173", "http://127.0.0.1:5173", "https://garage.hamiltons.cloud", "http://garage.hamiltons.cloud"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "Retry-After"],
 )
+app.add_middleware(UploadSizeLimitMiddleware)
+# Outermost, so its timings cover the other middleware too
+app.add_middleware(TelemetryMiddleware)
 
-Base.metadata.create_all(bind=engine)
+ensure_dirs()
+app.mount("/uploads", UploadFiles(directory=str(Path(settings.upload_dir).resolve())), name="uploads")
 
-
-def _migrate_add_trim():
-    """Add trim column to vehicles if missing (existing DBs)."""
-    from sqlalchemy import text, inspect
-    insp = inspect(engine)
-    cols = [c["name"] for c in insp.get_columns("vehicles")]
-    if "trim" not in cols:
-        with engine.begin() as conn:
-            conn.execute(text("ALTER TABLE vehicles ADD COLUMN trim VARCHAR(128)"))
-
-
-_migrate_add_trim()
+app.include_router(auth.router, prefix="/api")
+app.include_router(vehicles.router, prefix="/api")
+app.include_router(vehicle_detail.router, prefix="/api")
+app.include_router(maintenance.router, prefix="/api")
+app.include_router(mods.router, prefix="/api")
+app.include_router(dashboard.router, prefix="/api")
+app.include_router(transfer.router, prefix="/api")
+app.include_router(search.router, prefix="/api")
+app.include_router(metrics.router, prefix="/api")
+app.include_router(events.router, prefix="/api")
+app.include_router(sync.router, prefix="/api")
 
 
-def _ensure_single_user():
-    db = SessionLocal()
-    try:
-        if db.query(User).first() is None:
-            db.add(User(
-                username=settings.username,
-                hashed_password=get_password_hash(settings.password),
-            ))
-            db.commit()
-    finally:
-        db.close()
+@app.on_event("startup")
+def _migrate():
+    if not settings.auto_migrate:
+        if not migrations.is_current():
+            raise RuntimeError("Database schema is out of date: run `python -m app.cli migrate`")
+        return
+    for step in migrations.upgrade():
+        logger.info("Applied migration %s", step)
 
 
-_ensure_single_user()
+@app.on_event("startup")
+async def _start_broadcaster():
+    broadcaster.start()
 
-uploads_path = Path(settings.upload_dir).resolve()
-if uploads_path.exists():
-    app.mount("/uploads", StaticFiles(directory=str(uploads_path)), name="uploads")
 
-app.include_router(auth.router, prefix="/api")
-app.include_router(vehicles.router, prefix="/api")
-app.include_router(maintenance.router, prefix="/api")
-app.include_router(mods.router, prefix="/api")
-app.include_router(dashboard.router, prefix="/api")
+@app.on_event("shutdown")
+async def _shutdown():
+    await broadcaster.stop()
+    shutdown_image_pool()
+    shutdown_hash_pool()
+    if settings.db_async:
+        from .database import async_engine, async_read_engine
+        await async_engine.dispose()
+        await async_read_engine.dispose()
 
 
 @app.get("/api/health")
-def health():
+async def health():
     return {"status": "ok"}
 
 
 # Serve React SPA in production (set GARAGE_FRONTEND_DIST to frontend dist path)
 _dist = settings.frontend_dist and Path(settings.frontend_dist).resolve()
 if _dist and _dist.is_dir():
-    app.mount("/assets", StaticFiles(directory=str(_dist / "assets")), name="assets")
-
-    @app.get("/{full_path:path}")
-    def serve_spa(full_path: str):
-        file_path = _dist / full_path
-        if file_path.is_file():
-            return FileResponse(str(file_path))
-        return FileResponse(str(_dist / "index.html"))
+    _spa = DistIndex(_dist)
+
+    @app.api_route("/{full_path:path}", methods=["GET", "HEAD"])
+    async def serve_spa(full_path: str, request: Request):
+        return _spa.response(full_path, request.headers)
@@ -0,0 +1,178 @@
+"""Versioned schema migrations.
+
+MIGRATIONS is an ordered list of steps; the schema_version table records the last one applied.
+Startup only reads that number. When it's behind, upgrade() takes the database write lock (SQLite
+BEGIN IMMEDIATE, so concurrently booting workers queue rather than race), re-reads the version and
+runs the missing steps in that one transaction.
+
+Steps must be idempotent: the first one creates every table from the current models, so on a new
+database later steps find their work already done. Append new steps; never renumber old ones.
+"""
+import logging
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.orm import Session
+from sqlalchemy.pool import NullPool
+
+from .config import settings
+from .database import Base, begin_immediate, engine, read_engine, _is_sqlite, _tuned
+
+logger = logging.getLogger(__name__)
+
+
+def _session(conn) -> Session:
+    # Joins the migration transaction; the helpers' own commit() only releases a savepoint
+    return Session(bind=conn, join_transaction_mode="create_savepoint")
+
+
+def _create_tables(conn):
+    from . import models  # noqa: F401  (registers every table on Base.metadata)
+    Base.metadata.create_all(bind=conn)
+
+
+# (table, column, DDL type) added after the initial schema
+_ADDED_COLUMNS = [
+    ("vehicles", "trim", "VARCHAR(128)"),
+    ("vehicles", "photo_variants", "JSON"),
+    ("maintenance", "updated_at", "DATETIME"),
+    ("mods", "updated_at", "DATETIME"),
+]
+
+
+def _add_columns(conn, columns=_ADDED_COLUMNS):
+    insp = inspect(conn)
+    existing = {}
+    for table, column, ddl in columns:
+        if table not in existing:
+            existing[table] = {c["name"] for c in insp.get_columns(table)}
+        if column not in existing[table]:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+
+
+def _add_indexes(conn):
+    from .models import Maintenance, Mod
+    for table in (Maintenance.__table__, Mod.__table__):
+        for index in table.indexes:
+            # Just the composite ones; later steps create indexes on the columns they add
+            if len(index.columns) > 1:
+                index.create(bind=conn, checkfirst=True)
+
+
+def _build_rollups(conn):
+    from . import rollups
+    db = _session(conn)
+    try:
+        if rollups.needs_rebuild(db):
+            rollups.rebuild(db)
+    finally:
+        db.close()
+
+
+def _search_index(conn):
+    from . import search
+    if not _is_sqlite:
+        return
+    if search.install(conn):
+        db = _session(conn)
+        try:
+            search.rebuild(db)
+        finally:
+            db.close()
+
+
+def _default_user(conn):
+    from .auth import get_password_hash
+    from .models import User
+    db = _session(conn)
+    try:
+        if db.query(User).first() is None:
+            db.add(User(username=settings.username, hashed_password=get_password_hash(settings.password)))
+            db.commit()
+    finally:
+        db.close()
+
+
+def _change_events(conn):
+    from .models import ChangeEvent
+    ChangeEvent.__table__.create(bind=conn, checkfirst=True)
+
+
+def _sync_sequence(conn):
+    from .models import Maintenance, Mod, Tombstone, Vehicle
+    # Existing rows keep sequence 0: a full sync returns them and every delta token is past them
+    _add_columns(conn, [(table, "change_seq", "INTEGER NOT NULL DEFAULT 0") for table in ("vehicles", "maintenance", "mods")])
+    for table in (Vehicle.__table__, Maintenance.__table__, Mod.__table__):
+        for index in table.indexes:
+            if "change_seq" in index.columns:
+                index.create(bind=conn, checkfirst=True)
+    Tombstone.__table__.create(bind=conn, checkfirst=True)
+
+
+# (version, description, step(conn))
+MIGRATIONS = [
+    (1, "create tables", _create_tables),
+    (2, "add vehicles.trim/photo_variants and maintenance/mods.updated_at", _add_columns),
+    (3, "composite maintenance/mods indexes", _add_indexes),
+    (4, "backfill dashboard spend rollups", _build_rollups),
+    (5, "full-text search index and triggers", _search_index),
+    (6, "create the login user", _default_user),
+    (7, "change event log for /api/events", _change_events),
+    (8, "change sequence and tombstones for /api/sync", _sync_sequence),
+]
+LATEST = MIGRATIONS[-1][0]
+
+
+def current_version(conn) -> int:
+    if not inspect(conn).has_table("schema_version"):
+        return 0
+    return conn.execute(text("SELECT max(version) FROM schema_version")).scalar() or 0
+
+
+def _set_version(conn, version: int):
+    conn.execute(text("CREATE TABLE IF NOT EXISTS schema_version (version INTEGER NOT NULL)"))
+    conn.execute(text("DELETE FROM schema_version"))
+    conn.execute(text("INSERT INTO schema_version (version) VALUES (:v)"), {"v": version})
+
+
+def _lock_engine():
+    """A one-off SQLite engine whose transactions start with BEGIN IMMEDIATE (the write lock)."""
+    lock_engine = create_engine(
+        settings.database_url,
+        poolclass=NullPool,
+        connect_args={"check_same_thread": False, "timeout": settings.migration_lock_timeout_seconds},
+    )
+    if _tuned:
+        # Switch journal mode up front so a booting worker's own PRAGMA doesn't wait on this lock
+        event.listen(lock_engine, "connect", lambda dbapi_conn, _record: dbapi_conn.execute(
+            f"PRAGMA journal_mode={settings.sqlite_journal_mode}"
+        ))
+    begin_immediate(lock_engine)
+    return lock_engine
+
+
+def is_current() -> bool:
+    with read_engine.connect() as conn:
+        return current_version(conn) >= LATEST
+
+
+def upgrade() -> list[str]:
+    """Apply pending migrations under the write lock. Returns descriptions of the steps run."""
+    if is_current():
+        return []
+    lock_engine = _lock_engine() if _is_sqlite else engine
+    try:
+        with lock_engine.begin() as conn:
+            # Another process may have migrated while we waited for the lock
+            version = current_version(conn)
+            applied = []
+            for number, description, step in MIGRATIONS:
+                if number <= version:
+                    continue
+                logger.info("Applying migration %s: %s", number, description)
+                step(conn)
+                _set_version(conn, number)
+                applied.append(f"{number}: {description}")
+            return applied
+    finally:
+        if lock_engine is not engine:
+            lock_engine.dispose()
@@ -2,5 +2,9 @@ from .user import User
 from .vehicle import Vehicle
 from .maintenance import Maintenance
 from .mod import Mod
+from .rollup import SpendRollup
+from .data_version import DataVersion
+from .change_event import ChangeEvent
+from .tombstone import Tombstone
 
-__all__ = ["User", "Vehicle", "Maintenance", "Mod"]
+__all__ = ["User", "Vehicle", "Maintenance", "Mod", "SpendRollup", "DataVersion", "ChangeEvent", "Tombstone"]
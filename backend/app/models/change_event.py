@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class ChangeEvent(Base):
+    """One committed vehicle/maintenance/mod change, in commit order, for /api/events; see app.events."""
+    __tablename__ = "change_events"
+    # AUTOINCREMENT: ids are never reused after pruning, so they work as a resume position
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(16), nullable=False)  # vehicle, maintenance, mod
+    entity_id = Column(Integer, nullable=True)  # null for bulk imports
+    vehicle_id = Column(Integer, nullable=True)
+    action = Column(String(16), nullable=False)  # created, updated, deleted, imported
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
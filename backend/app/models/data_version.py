@@ -0,0 +1,13 @@
+from sqlalchemy import Column, Integer, String
+from ..database import Base
+
+
+class DataVersion(Base):
+    """Change counter per cache scope ("vehicles", "vehicle:<id>", "garage"); see app.versions.
+
+    Also holds the /api/sync sequence and tombstone floor ("sync", "sync:floor"); see app.sync.
+    """
+    __tablename__ = "data_versions"
+
+    scope = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False, default=0)
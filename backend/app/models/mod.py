@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Date, ForeignKey, Text, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -6,6 +6,9 @@ from ..database import Base
 
 class Mod(Base):
     __tablename__ = "mods"
+    __table_args__ = (
+        Index("ix_mods_vehicle_date", "vehicle_id", "date", "id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     vehicle_id = Column(Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False)
@@ -15,5 +18,8 @@ class Mod(Base):
     cost = Column(Float, nullable=True)
     parts_list = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Sync sequence of the last write to this row (app.sync)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0", index=True)
 
     vehicle = relationship("Vehicle", back_populates="mods")
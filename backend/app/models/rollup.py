@@ -0,0 +1,20 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, Index, UniqueConstraint
+from ..database import Base
+
+
+class SpendRollup(Base):
+    """Per-vehicle, per-month maintenance and mod counts/costs for the dashboard."""
+    __tablename__ = "spend_rollups"
+    __table_args__ = (
+        UniqueConstraint("vehicle_id", "year", "month", name="uq_spend_rollups_vehicle_month"),
+        Index("ix_spend_rollups_year", "year"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    vehicle_id = Column(Integer, ForeignKey("vehicles.id", ondelete="CASCADE"), nullable=False)
+    year = Column(Integer, nullable=False)
+    month = Column(Integer, nullable=False)
+    maintenance_count = Column(Integer, nullable=False, default=0)
+    maintenance_cost = Column(Float, nullable=False, default=0)
+    mods_count = Column(Integer, nullable=False, default=0)
+    mods_cost = Column(Float, nullable=False, default=0)
@@ -0,0 +1,15 @@
+from sqlalchemy import Column, Integer, String, DateTime
+from sqlalchemy.sql import func
+from ..database import Base
+
+
+class Tombstone(Base):
+    """A deleted vehicle, maintenance record or mod, so /api/sync can tell clients to drop it; see app.sync."""
+    __tablename__ = "sync_tombstones"
+
+    id = Column(Integer, primary_key=True)
+    entity = Column(String(16), nullable=False)  # collection name: vehicles, maintenance, mods
+    entity_id = Column(Integer, nullable=False)
+    vehicle_id = Column(Integer, nullable=False)
+    change_seq = Column(Integer, nullable=False, index=True)
+    deleted_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
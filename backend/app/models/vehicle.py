@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Float, DateTime, ForeignKey, JSON
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from ..database import Base
@@ -17,8 +17,11 @@ class Vehicle(Base):
     license_plate = Column(String(32), nullable=True)
     current_mileage = Column(Float, nullable=True)
     photo_path = Column(String(512), nullable=True)
+    photo_variants = Column(JSON(none_as_null=True), nullable=True)  # {"sm": path, "md": ..., "lg": ...}
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+    # Sync sequence of the last write to this row (app.sync)
+    change_seq = Column(Integer, nullable=False, default=0, server_default="0", index=True)
 
     maintenance = relationship("Maintenance", back_populates="vehicle", cascade="all, delete-orphan")
     mods = relationship("Mod", back_populates="vehicle", cascade="all, delete-orphan")
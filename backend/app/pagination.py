@@ -0,0 +1,64 @@
+import base64
+import json
+from datetime import date
+
+from fastapi import HTTPException
+from sqlalchemy import Date, Float, and_, or_
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(sort: str, order: str, value, row_id: int) -> str:
+    if isinstance(value, date):
+        value = value.isoformat()
+    raw = json.dumps([sort, order, value, row_id], separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str, column):
+    """Return (value, id) from a cursor; the cursor must come from the same sort/order."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        c_sort, c_order, value, row_id = json.loads(raw)
+        if value is not None:
+            if isinstance(column.type, Date):
+                value = date.fromisoformat(value)
+            elif isinstance(column.type, Float):
+                value = float(value)
+        row_id = int(row_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if (c_sort, c_order) != (sort, order):
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+    return value, row_id
+
+
+def _after(column, id_column, value, row_id: int, descending: bool):
+    """Rows strictly after (value, row_id). SQLite sorts NULLs first ascending, last descending."""
+    if descending:
+        if value is None:
+            return and_(column.is_(None), id_column < row_id)
+        return or_(column < value, and_(column == value, id_column < row_id), column.is_(None))
+    if value is None:
+        return or_(and_(column.is_(None), id_column > row_id), column.isnot(None))
+    return or_(column > value, and_(column == value, id_column > row_id))
+
+
+def keyset_page(query, column, id_column, sort: str, order: str, cursor: str | None, limit: int):
+    """Apply keyset pagination ordered by (column, id). Returns (rows, next_cursor)."""
+    descending = order == "desc"
+    if cursor:
+        value, row_id = decode_cursor(cursor, sort, order, column)
+        query = query.filter(_after(column, id_column, value, row_id, descending))
+    if descending:
+        query = query.order_by(column.desc(), id_column.desc())
+    else:
+        query = query.order_by(column.asc(), id_column.asc())
+    rows = query.limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        last = rows[-1]
+        next_cursor = encode_cursor(sort, order, getattr(last, column.key), last.id)
+    return rows, next_cursor
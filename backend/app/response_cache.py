@@ -0,0 +1,73 @@
+"""In-process cache of serialized JSON for the hottest read endpoints.
+
+Keys embed the ETag from app.versions, so an entry can never be served after its data changed,
+even when the write happened in another process. The commit hook below only frees stale entries
+early instead of leaving them to LRU/TTL eviction.
+"""
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import versions
+from .cache import TTLCache
+from .config import settings
+from .database import new_async_read_session
+from .fastjson import RowSerializer
+from .singleflight import SingleFlight
+from .telemetry import timed
+
+response_cache = TTLCache(
+    settings.response_cache_size,
+    settings.response_cache_ttl_seconds,
+    weigher=len,
+    maxweight=settings.response_cache_max_bytes,
+)
+# Concurrent misses for the same key share one query + serialization
+inflight = SingleFlight()
+
+
+@event.listens_for(Session, "after_commit")
+def _evict_changed(session: Session):
+    scopes = session.info.pop(versions.CHANGED_SCOPES, None)
+    if scopes:
+        response_cache.discard_where(lambda key: not scopes.isdisjoint(key[0]))
+
+
+@event.listens_for(Session, "after_rollback")
+def _forget_changed(session: Session):
+    session.info.pop(versions.CHANGED_SCOPES, None)
+
+
+def _load_json(db, adapter: TypeAdapter | RowSerializer, load, args) -> bytes:
+    data = load(db, *args)
+    with timed("serialize"):
+        if isinstance(adapter, RowSerializer):
+            return adapter.dump_json(data)
+        return adapter.dump_json(adapter.validate_python(data, from_attributes=True))
+
+
+async def _render(key, adapter: TypeAdapter | RowSerializer, load, args) -> bytes:
+    # Own session: the request that started this may be cancelled while others still wait on it
+    db = new_async_read_session()
+    try:
+        body = await db.run_sync(_load_json, adapter, load, args)
+    finally:
+        await db.close()
+    response_cache.set(key, body)
+    return body
+
+
+async def cached_json(db, request: Request, scopes: list[str], adapter: TypeAdapter | RowSerializer, load, *args, variant=()) -> Response:
+    """Serve load(db, *args), serialized through adapter, from cache when the data is unchanged.
+
+    Also answers If-None-Match with 304, like versions.conditional.
+    """
+    etag = await versions.request_etag(db, request, scopes, *variant)
+    if (cached := versions.not_modified(request, etag)) is not None:
+        return cached
+    key = (frozenset(scopes), etag)
+    body = response_cache.get(key)
+    if body is None:
+        body = await inflight.do(key, _render, key, adapter, load, args)
+    return Response(body, media_type="application/json", headers=versions.cache_headers(etag))
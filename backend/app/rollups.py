@@ -0,0 +1,97 @@
+from collections import defaultdict
+from datetime import date
+
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from .models import Maintenance, Mod, SpendRollup
+
+
+def _kind(record) -> str:
+    return "maintenance" if isinstance(record, Maintenance) else "mods"
+
+
+def adjust(db: Session, kind: str, vehicle_id: int, on: date, cost: float | None, delta: int):
+    """Add (delta=1) or remove (delta=-1) one record from its vehicle-month rollup.
+
+    Runs in the caller's transaction; the caller commits.
+    """
+    _apply(db, kind, vehicle_id, on.year, on.month, delta, (cost or 0) * delta)
+
+
+def _upsert(db: Session, kind: str, deltas: list[tuple[int, int, int, int, float]]):
+    """Add (count, amount) to each (vehicle_id, year, month) rollup, creating missing rows.
+
+    One INSERT ... ON CONFLICT DO UPDATE per row, so two transactions that both find no row for a
+    vehicle-month can't lose a count or fail on the unique key, whatever the engine profile.
+    """
+    if not deltas:
+        return
+    table = SpendRollup.__table__
+    count_name, cost_name = f"{kind}_count", f"{kind}_cost"
+    stmt = insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.vehicle_id, table.c.year, table.c.month],
+        set_={
+            count_name: table.c[count_name] + stmt.excluded[count_name],
+            cost_name: table.c[cost_name] + stmt.excluded[cost_name],
+        },
+    )
+    db.execute(stmt, [
+        {
+            "vehicle_id": vehicle_id, "year": year, "month": month,
+            "maintenance_count": 0, "maintenance_cost": 0.0, "mods_count": 0, "mods_cost": 0.0,
+            count_name: count, cost_name: amount,
+        }
+        for vehicle_id, year, month, count, amount in deltas
+    ])
+
+
+def _apply(db: Session, kind: str, vehicle_id: int, year: int, month: int, count: int, amount: float):
+    _upsert(db, kind, [(vehicle_id, year, month, count, amount)])
+
+
+def add(db: Session, record):
+    adjust(db, _kind(record), record.vehicle_id, record.date, record.cost, 1)
+
+
+def remove(db: Session, record):
+    adjust(db, _kind(record), record.vehicle_id, record.date, record.cost, -1)
+
+
+def add_many(db: Session, kind: str, rows: list[dict]):
+    """Fold a batch of inserted rows (vehicle_id/date/cost dicts) in with one upsert per vehicle-month."""
+    totals = defaultdict(lambda: [0, 0.0])
+    for row in rows:
+        t = totals[(row["vehicle_id"], row["date"].year, row["date"].month)]
+        t[0] += 1
+        t[1] += row["cost"] or 0
+    _upsert(db, kind, [(vehicle_id, year, month, count, amount) for (vehicle_id, year, month), (count, amount) in totals.items()])
+
+
+def remove_vehicle(db: Session, vehicle_id: int):
+    db.query(SpendRollup).filter(SpendRollup.vehicle_id == vehicle_id).delete(synchronize_session=False)
+
+
+def rebuild(db: Session) -> int:
+    """Recompute every rollup row from the maintenance and mods tables. Returns rows written."""
+    totals = defaultdict(lambda: {"maintenance_count": 0, "maintenance_cost": 0.0, "mods_count": 0, "mods_cost": 0.0})
+    for kind, model in (("maintenance", Maintenance), ("mods", Mod)):
+        for vehicle_id, on, cost in db.query(model.vehicle_id, model.date, model.cost).yield_per(1000):
+            t = totals[(vehicle_id, on.year, on.month)]
+            t[f"{kind}_count"] += 1
+            t[f"{kind}_cost"] += cost or 0
+    db.query(SpendRollup).delete(synchronize_session=False)
+    db.bulk_insert_mappings(SpendRollup, [
+        {"vehicle_id": vehicle_id, "year": year, "month": month, **t}
+        for (vehicle_id, year, month), t in totals.items()
+    ])
+    db.commit()
+    return len(totals)
+
+
+def needs_rebuild(db: Session) -> bool:
+    """True when raw records exist but no rollups do (e.g. a database predating the table)."""
+    if db.query(SpendRollup.id).first() is not None:
+        return False
+    return db.query(Maintenance.id).first() is not None or db.query(Mod.id).first() is not None
@@ -1,46 +1,47 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
 from fastapi import status
 from sqlalchemy.orm import Session
 from pydantic import BaseModel
 
-from ..database import get_db
+from ..database import get_async_read_db, AsyncDB
 from ..models import User
-from ..auth import verify_password, get_password_hash, create_access_token
+from ..auth import verify_password_async, create_access_token
 from ..config import settings
 from ..schemas import Token, UserOut
 from ..deps import get_current_user
+from ..throttle import AttemptLimiter, check_and_record
 
 router = APIRouter(prefix="/auth", tags=["auth"])
 
+username_attempts = AttemptLimiter(settings.login_attempts_per_username, settings.login_attempt_window_seconds)
+ip_attempts = AttemptLimiter(settings.login_attempts_per_ip, settings.login_attempt_window_seconds)
+
 
 class LoginRequest(BaseModel):
     username: str
     password: str
 
 
-def ensure_single_user(db: Session) -> User:
-    user = db.query(User).first()
-    if not user:
-        user = User(
-            username=settings.username,
-            hashed_password=get_password_hash(settings.password),
-        )
-        db.add(user)
-        db.commit()
-        db.refresh(user)
-    return user
+def _password_hash(db: Session, username: str) -> str | None:
+    hashed = db.query(User.hashed_password).filter(User.username == username).scalar()
+    # Hand the connection back before the (slow) hash check
+    db.rollback()
+    return hashed
 
 
 @router.post("/login", response_model=Token)
-def login(data: LoginRequest, db: Session = Depends(get_db)):
-    ensure_single_user(db)
-    user = db.query(User).filter(User.username == data.username).first()
-    if not user or not verify_password(data.password, user.hashed_password):
+async def login(data: LoginRequest, request: Request, db: AsyncDB = Depends(get_async_read_db)):
+    ip = request.client.host if request.client else None
+    check_and_record([(username_attempts, data.username.lower()), (ip_attempts, ip)])
+    hashed = await db.run_sync(_password_hash, data.username)
+    # Unknown users still cost one hash, so response time doesn't reveal which usernames exist
+    if not await verify_password_async(data.password, hashed):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect username or password",
         )
-    token = create_access_token(data={"sub": user.username})
+    username_attempts.reset(data.username.lower())
+    token = create_access_token(data={"sub": data.username})
     return Token(access_token=token)
 
 
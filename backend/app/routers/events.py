@@ -0,0 +1,33 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, status
+from fastapi.responses import StreamingResponse
+
+from ..config import settings
+from ..deps import get_current_user_async
+from ..events import broadcaster
+from ..models import User
+
+router = APIRouter(prefix="/events", tags=["events"])
+
+
+@router.get("")
+async def change_events(
+    last_event_id: str | None = Header(None),
+    _: User = Depends(get_current_user_async),
+):
+    """Server-Sent Events: one `change` event (entity, id, vehicle_id, action, version) per committed write.
+
+    Reconnect with Last-Event-ID to resume. A `reset` event means changes were missed: refetch.
+    """
+    if len(broadcaster.subscribers) >= settings.events_max_clients:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Too many event streams open",
+            headers={"Retry-After": "5"},
+        )
+    after = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    return StreamingResponse(
+        broadcaster.stream(after),
+        media_type="text/event-stream",
+        # no-transform/X-Accel-Buffering: keep proxies (nginx) from buffering or compressing the stream
+        headers={"Cache-Control": "no-cache, no-transform", "X-Accel-Buffering": "no"},
+    )
@@ -1,101 +1,160 @@
-import uuid
-from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..models import Maintenance, Vehicle
-from ..schemas.maintenance import MaintenanceCreateBody, MaintenanceUpdate, MaintenanceOut
-from ..deps import get_current_user
 from ..config import settings
+from ..database import get_async_db, get_async_read_db, AsyncDB
+from .. import rollups, versions
+from ..models import Maintenance
+from ..schemas.maintenance import MaintenanceCreateBody, MaintenanceUpdate, MaintenanceOut
+from ..deps import get_current_user_async
 from ..models import User
+from ..uploads import save_upload, DOCUMENT_TYPES
+from ..fastjson import RowSerializer, json_response
+from ..pagination import keyset_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..telemetry import timed
+from .vehicles import get_vehicle_or_404
 
 router = APIRouter(prefix="/vehicles", tags=["maintenance"])
 
-ALLOWED_IMAGE = {"image/jpeg", "image/png", "image/gif", "image/webp", "application/pdf"}
+_rows = RowSerializer(MaintenanceOut, Maintenance)
+
+SORT_COLUMNS = {
+    "date": Maintenance.date,
+    "type": Maintenance.type,
+    "cost": Maintenance.cost,
+    "mileage": Maintenance.mileage,
+}
+
+
+def get_maintenance_or_404(db: Session, vehicle_id: int, maintenance_id: int) -> Maintenance:
+    m = db.query(Maintenance).filter(
+        Maintenance.id == maintenance_id,
+        Maintenance.vehicle_id == vehicle_id,
+    ).first()
+    if not m:
+        raise HTTPException(status_code=404, detail="Maintenance record not found")
+    return m
+
+
+def _list_maintenance(db: Session, vehicle_id: int, sort: str, order: str, cursor: str | None, limit: int, fast: bool = False):
+    """(rows, next_cursor); with fast, rows are JSON bytes built from column tuples (app.fastjson)."""
+    get_vehicle_or_404(db, vehicle_id)
+    q = db.query(*_rows.columns) if fast else db.query(Maintenance)
+    q = q.filter(Maintenance.vehicle_id == vehicle_id)
+    rows, next_cursor = keyset_page(q, SORT_COLUMNS[sort], Maintenance.id, sort, order, cursor, limit)
+    if fast:
+        with timed("serialize"):
+            rows = _rows.dump_json(rows)
+    return rows, next_cursor
+
+
+def _create_maintenance(db: Session, vehicle_id: int, data: MaintenanceCreateBody):
+    get_vehicle_or_404(db, vehicle_id)
+    m = Maintenance(vehicle_id=vehicle_id, **data.model_dump())
+    db.add(m)
+    rollups.add(db, m)
+    db.commit()
+    db.refresh(m)
+    return m
+
+
+def _update_maintenance(db: Session, vehicle_id: int, maintenance_id: int, data: MaintenanceUpdate):
+    m = get_maintenance_or_404(db, vehicle_id, maintenance_id)
+    rollups.remove(db, m)
+    for k, val in data.model_dump(exclude_unset=True).items():
+        setattr(m, k, val)
+    rollups.add(db, m)
+    db.commit()
+    db.refresh(m)
+    return m
+
+
+def _delete_maintenance(db: Session, vehicle_id: int, maintenance_id: int):
+    m = get_maintenance_or_404(db, vehicle_id, maintenance_id)
+    rollups.remove(db, m)
+    db.delete(m)
+    db.commit()
+
+
+def _check_maintenance(db: Session, vehicle_id: int, maintenance_id: int):
+    get_maintenance_or_404(db, vehicle_id, maintenance_id)
+    # Release the (single) writer connection while the upload streams to disk
+    db.rollback()
+
+
+def _set_receipt(db: Session, vehicle_id: int, maintenance_id: int, receipt_path: str):
+    m = get_maintenance_or_404(db, vehicle_id, maintenance_id)
+    m.receipt_path = receipt_path
+    db.commit()
+    db.refresh(m)
+    return m
 
 
 @router.get("/{vehicle_id}/maintenance", response_model=list[MaintenanceOut])
-def list_maintenance(
+async def list_maintenance(
     vehicle_id: int,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    sort: Literal["date", "type", "cost", "mileage"] = "date",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncDB = Depends(get_async_read_db),
+    _: User = Depends(get_current_user_async),
 ):
-    v = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not v:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-    return db.query(Maintenance).filter(Maintenance.vehicle_id == vehicle_id).order_by(Maintenance.date.desc()).all()
+    if not_modified := await versions.conditional(db, request, response, [versions.vehicle_scope(vehicle_id)]):
+        return not_modified
+    fast = settings.fast_serialization
+    rows, next_cursor = await db.run_sync(_list_maintenance, vehicle_id, sort, order, cursor, limit, fast)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_response(rows, response) if fast else rows
 
 
 @router.post("/{vehicle_id}/maintenance", response_model=MaintenanceOut, status_code=status.HTTP_201_CREATED)
-def create_maintenance(
+async def create_maintenance(
     vehicle_id: int,
     data: MaintenanceCreateBody,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
 ):
-    v = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not v:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-    m = Maintenance(vehicle_id=vehicle_id, **data.model_dump())
-    db.add(m)
-    db.commit()
-    db.refresh(m)
-    return m
+    return await db.run_sync(_create_maintenance, vehicle_id, data)
 
 
 @router.get("/{vehicle_id}/maintenance/{maintenance_id}", response_model=MaintenanceOut)
-def get_maintenance(
+async def get_maintenance(
     vehicle_id: int,
     maintenance_id: int,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    db: AsyncDB = Depends(get_async_read_db),
+    _: User = Depends(get_current_user_async),
 ):
-    m = db.query(Maintenance).filter(
-        Maintenance.id == maintenance_id,
-        Maintenance.vehicle_id == vehicle_id,
-    ).first()
-    if not m:
-        raise HTTPException(status_code=404, detail="Maintenance record not found")
-    return m
+    if not_modified := await versions.conditional(db, request, response, [versions.vehicle_scope(vehicle_id)]):
+        return not_modified
+    return await db.run_sync(get_maintenance_or_404, vehicle_id, maintenance_id)
 
 
 @router.patch("/{vehicle_id}/maintenance/{maintenance_id}", response_model=MaintenanceOut)
-def update_maintenance(
+async def update_maintenance(
     vehicle_id: int,
     maintenance_id: int,
     data: MaintenanceUpdate,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
 ):
-    m = db.query(Maintenance).filter(
-        Maintenance.id == maintenance_id,
-        Maintenance.vehicle_id == vehicle_id,
-    ).first()
-    if not m:
-        raise HTTPException(status_code=404, detail="Maintenance record not found")
-    for k, val in data.model_dump(exclude_unset=True).items():
-        setattr(m, k, val)
-    db.commit()
-    db.refresh(m)
-    return m
+    return await db.run_sync(_update_maintenance, vehicle_id, maintenance_id, data)
 
 
 @router.delete("/{vehicle_id}/maintenance/{maintenance_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_maintenance(
+async def delete_maintenance(
     vehicle_id: int,
     maintenance_id: int,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
 ):
-    m = db.query(Maintenance).filter(
-        Maintenance.id == maintenance_id,
-        Maintenance.vehicle_id == vehicle_id,
-    ).first()
-    if not m:
-        raise HTTPException(status_code=404, detail="Maintenance record not found")
-    db.delete(m)
-    db.commit()
+    await db.run_sync(_delete_maintenance, vehicle_id, maintenance_id)
     return None
 
 
@@ -104,25 +163,9 @@ async def upload_maintenance_receipt(
     vehicle_id: int,
     maintenance_id: int,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
 ):
-    if file.content_type not in ALLOWED_IMAGE:
-        raise HTTPException(status_code=400, detail="File must be JPEG, PNG, GIF, WebP, or PDF")
-    m = db.query(Maintenance).filter(
-        Maintenance.id == maintenance_id,
-        Maintenance.vehicle_id == vehicle_id,
-    ).first()
-    if not m:
-        raise HTTPException(status_code=404, detail="Maintenance record not found")
-    ext = Path(file.filename or "doc").suffix or ".jpg"
-    name = f"{maintenance_id}_{uuid.uuid4().hex[:8]}{ext}"
-    out_dir = settings.upload_dir / "receipts"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    path = out_dir / name
-    content = await file.read()
-    path.write_bytes(content)
-    m.receipt_path = f"receipts/{name}"
-    db.commit()
-    db.refresh(m)
-    return m
+    await db.run_sync(_check_maintenance, vehicle_id, maintenance_id)
+    receipt_path = await save_upload(file, DOCUMENT_TYPES, "File must be JPEG, PNG, GIF, WebP, or PDF")
+    return await db.run_sync(_set_receipt, vehicle_id, maintenance_id, receipt_path)
@@ -0,0 +1,88 @@
+import hmac
+
+from fastapi import APIRouter, Depends, Response
+from fastapi.security import HTTPAuthorizationCredentials
+
+from .. import telemetry
+from ..admission import lanes
+from ..auth import hashing_stats
+from ..config import settings
+from ..database import get_async_read_db, AsyncDB
+from ..deps import bearer, get_current_user_async, principal_cache
+from ..events import broadcaster
+from ..models import User
+from ..response_cache import response_cache, inflight
+from .auth import ip_attempts, username_attempts
+
+router = APIRouter(prefix="/metrics", tags=["metrics"])
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _cache_lines() -> list[str]:
+    caches = {"responses": response_cache.stats(), "principals": principal_cache.stats()}
+    lines = []
+    for field, kind, help in (
+        ("size", "gauge", "Entries held"),
+        ("hits", "counter", "Lookups served from cache"),
+        ("misses", "counter", "Lookups not served from cache"),
+        ("evictions", "counter", "Entries evicted to stay within size limits"),
+    ):
+        name = f"cache_{'entries' if field == 'size' else field + '_total'}"
+        lines += telemetry.format_metric(name, kind, help, [((c,), s[field]) for c, s in caches.items()], ("cache",))
+    lines += telemetry.format_metric(
+        "cache_bytes", "gauge", "Bytes held (serialized responses)", [((), caches["responses"]["weight"])]
+    )
+    hashing = hashing_stats()
+    lines += telemetry.format_metric("password_hash_in_flight", "gauge", "Logins hashing or queued for a hash worker", [((), hashing["in_flight"])])
+    lines += telemetry.format_metric("password_hash_rejected_total", "counter", "Logins refused with 503 (hash queue full)", [((), hashing["rejected"])])
+    lines += telemetry.format_metric(
+        "login_throttled_total", "counter", "Login attempts refused with 429, by limiter",
+        [(("username",), username_attempts.rejected), (("ip",), ip_attempts.rejected)], ("limit",),
+    )
+    lane_stats = {name: lane.stats() for name, lane in lanes.items()}
+    lines += telemetry.format_metric("admission_in_flight", "gauge", "Requests holding a lane slot", [((n,), s["active"]) for n, s in lane_stats.items()], ("lane",))
+    lines += telemetry.format_metric("admission_queued", "gauge", "Requests waiting for a lane slot", [((n,), s["queued"]) for n, s in lane_stats.items()], ("lane",))
+    lines += telemetry.format_metric("admission_admitted_total", "counter", "Requests admitted to a lane", [((n,), s["admitted"]) for n, s in lane_stats.items()], ("lane",))
+    lines += telemetry.format_metric("admission_wait_seconds_total", "counter", "Time requests spent queued for a lane", [((n,), s["waited_seconds"]) for n, s in lane_stats.items()], ("lane",))
+    lines += telemetry.format_metric(
+        "admission_rejected_total", "counter", "Requests refused with 503, by lane and reason",
+        [((n, reason), count) for n, s in lane_stats.items() for reason, count in s["rejected"].items()], ("lane", "reason"),
+    )
+    feed = broadcaster.stats()
+    lines += telemetry.format_metric("events_subscribers", "gauge", "Open /api/events streams", [((), feed["subscribers"])])
+    lines += telemetry.format_metric("events_published_total", "counter", "Change events fanned out to subscribers", [((), feed["published"])])
+    lines += telemetry.format_metric("events_evicted_total", "counter", "Event streams dropped for falling behind", [((), feed["evicted"])])
+    flights = inflight.stats()
+    lines += telemetry.format_metric("singleflight_calls_total", "counter", "Coalescable computations requested", [((), flights["calls"])])
+    lines += telemetry.format_metric("singleflight_coalesced_total", "counter", "Calls that joined one already in flight", [((), flights["coalesced"])])
+    return lines
+
+
+async def _check_access(
+    credentials: HTTPAuthorizationCredentials | None = Depends(bearer),
+    db: AsyncDB = Depends(get_async_read_db),
+):
+    """Allow the metrics token (for scrapers) or a signed-in user's token; anything else gets 401."""
+    # Compared as bytes: compare_digest raises TypeError on non-ASCII str
+    if credentials and settings.metrics_token and hmac.compare_digest(
+        credentials.credentials.encode(), settings.metrics_token.encode()
+    ):
+        return
+    await get_current_user_async(credentials, db)
+
+
+@router.get("", dependencies=[Depends(_check_access)])
+async def prometheus_metrics():
+    """Request latency, SQL, byte and cache metrics for this process, in Prometheus text format."""
+    return Response("\n".join(telemetry.render() + _cache_lines()) + "\n", media_type=PROMETHEUS_CONTENT_TYPE)
+
+
+@router.get("/cache")
+async def cache_metrics(_: User = Depends(get_current_user_async)):
+    """Hit ratio, entry counts and (for responses) bytes held by the in-process caches."""
+    return {
+        "responses": response_cache.stats(),
+        "principals": principal_cache.stats(),
+        "singleflight": inflight.stats(),
+    }
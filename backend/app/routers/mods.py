@@ -1,85 +1,139 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
 from sqlalchemy.orm import Session
 
-from ..database import get_db
-from ..models import Mod, Vehicle
+from ..config import settings
+from ..database import get_async_db, get_async_read_db, AsyncDB
+from .. import rollups, versions
+from ..models import Mod
 from ..schemas.mod import ModCreateBody, ModUpdate, ModOut
-from ..deps import get_current_user
+from ..deps import get_current_user_async
 from ..models import User
+from ..fastjson import RowSerializer, json_response
+from ..pagination import keyset_page, DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..telemetry import timed
+from .vehicles import get_vehicle_or_404
 
 router = APIRouter(prefix="/vehicles", tags=["mods"])
 
+_rows = RowSerializer(ModOut, Mod)
+
+SORT_COLUMNS = {
+    "date": Mod.date,
+    "name": Mod.name,
+    "cost": Mod.cost,
+}
+
+
+def get_mod_or_404(db: Session, vehicle_id: int, mod_id: int) -> Mod:
+    m = db.query(Mod).filter(Mod.id == mod_id, Mod.vehicle_id == vehicle_id).first()
+    if not m:
+        raise HTTPException(status_code=404, detail="Mod not found")
+    return m
+
+
+def _list_mods(db: Session, vehicle_id: int, sort: str, order: str, cursor: str | None, limit: int, fast: bool = False):
+    """(rows, next_cursor); with fast, rows are JSON bytes built from column tuples (app.fastjson)."""
+    get_vehicle_or_404(db, vehicle_id)
+    q = db.query(*_rows.columns) if fast else db.query(Mod)
+    q = q.filter(Mod.vehicle_id == vehicle_id)
+    rows, next_cursor = keyset_page(q, SORT_COLUMNS[sort], Mod.id, sort, order, cursor, limit)
+    if fast:
+        with timed("serialize"):
+            rows = _rows.dump_json(rows)
+    return rows, next_cursor
+
+
+def _create_mod(db: Session, vehicle_id: int, data: ModCreateBody):
+    get_vehicle_or_404(db, vehicle_id)
+    m = Mod(vehicle_id=vehicle_id, **data.model_dump())
+    db.add(m)
+    rollups.add(db, m)
+    db.commit()
+    db.refresh(m)
+    return m
+
+
+def _update_mod(db: Session, vehicle_id: int, mod_id: int, data: ModUpdate):
+    m = get_mod_or_404(db, vehicle_id, mod_id)
+    rollups.remove(db, m)
+    for k, val in data.model_dump(exclude_unset=True).items():
+        setattr(m, k, val)
+    rollups.add(db, m)
+    db.commit()
+    db.refresh(m)
+    return m
+
+
+def _delete_mod(db: Session, vehicle_id: int, mod_id: int):
+    m = get_mod_or_404(db, vehicle_id, mod_id)
+    rollups.remove(db, m)
+    db.delete(m)
+    db.commit()
+
 
 @router.get("/{vehicle_id}/mods", response_model=list[ModOut])
-def list_mods(
+async def list_mods(
     vehicle_id: int,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    sort: Literal["date", "name", "cost"] = "date",
+    order: Literal["asc", "desc"] = "desc",
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncDB = Depends(get_async_read_db),
+    _: User = Depends(get_current_user_async),
 ):
-    v = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not v:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-    return db.query(Mod).filter(Mod.vehicle_id == vehicle_id).order_by(Mod.date.desc()).all()
+    if not_modified := await versions.conditional(db, request, response, [versions.vehicle_scope(vehicle_id)]):
+        return not_modified
+    fast = settings.fast_serialization
+    rows, next_cursor = await db.run_sync(_list_mods, vehicle_id, sort, order, cursor, limit, fast)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return json_response(rows, response) if fast else rows
 
 
 @router.post("/{vehicle_id}/mods", response_model=ModOut, status_code=status.HTTP_201_CREATED)
-def create_mod(
+async def create_mod(
     vehicle_id: int,
     data: ModCreateBody,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
 ):
-    v = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not v:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-    m = Mod(vehicle_id=vehicle_id, **data.model_dump())
-    db.add(m)
-    db.commit()
-    db.refresh(m)
-    return m
+    return await db.run_sync(_create_mod, vehicle_id, data)
 
 
 @router.get("/{vehicle_id}/mods/{mod_id}", response_model=ModOut)
-def get_mod(
+async def get_mod(
     vehicle_id: int,
     mod_id: int,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    request: Request,
+    response: Response,
+    db: AsyncDB = Depends(get_async_read_db),
+    _: User = Depends(get_current_user_async),
 ):
-    m = db.query(Mod).filter(Mod.id == mod_id, Mod.vehicle_id == vehicle_id).first()
-    if not m:
-        raise HTTPException(status_code=404, detail="Mod not found")
-    return m
+    if not_modified := await versions.conditional(db, request, response, [versions.vehicle_scope(vehicle_id)]):
+        return not_modified
+    return await db.run_sync(get_mod_or_404, vehicle_id, mod_id)
 
 
 @router.patch("/{vehicle_id}/mods/{mod_id}", response_model=ModOut)
-def update_mod(
+async def update_mod(
     vehicle_id: int,
     mod_id: int,
     data: ModUpdate,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
 ):
-    m = db.query(Mod).filter(Mod.id == mod_id, Mod.vehicle_id == vehicle_id).first()
-    if not m:
-        raise HTTPException(status_code=404, detail="Mod not found")
-    for k, val in data.model_dump(exclude_unset=True).items():
-        setattr(m, k, val)
-    db.commit()
-    db.refresh(m)
-    return m
+    return await db.run_sync(_update_mod, vehicle_id, mod_id, data)
 
 
 @router.delete("/{vehicle_id}/mods/{mod_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_mod(
+async def delete_mod(
     vehicle_id: int,
     mod_id: int,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
 ):
-    m = db.query(Mod).filter(Mod.id == mod_id, Mod.vehicle_id == vehicle_id).first()
-    if not m:
-        raise HTTPException(status_code=404, detail="Mod not found")
-    db.delete(m)
-    db.commit()
+    await db.run_sync(_delete_mod, vehicle_id, mod_id)
     return None
@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends, Query, Response
+
+from ..database import get_async_read_db, AsyncDB
+from ..deps import get_current_user_async
+from ..models import User
+from ..pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from ..schemas import SearchHit
+from ..search import search
+
+router = APIRouter(prefix="/search", tags=["search"])
+
+
+@router.get("", response_model=list[SearchHit])
+async def search_records(
+    response: Response,
+    q: str = Query(..., min_length=1, description="Words to find in maintenance type/shop/notes and mod name/description/parts"),
+    vehicle_id: int | None = Query(None, description="Only this vehicle's records"),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = Query(None, description="X-Next-Cursor from the previous page"),
+    db: AsyncDB = Depends(get_async_read_db),
+    _: User = Depends(get_current_user_async),
+):
+    hits, next_cursor = await db.run_sync(search, q, vehicle_id, cursor, limit)
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return hits
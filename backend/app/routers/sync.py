@@ -0,0 +1,46 @@
+import json
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+
+from .. import sync
+from ..config import settings
+from ..database import get_async_read_db, AsyncDB
+from ..deps import get_current_user_async
+from ..fastjson import RowSerializer
+from ..models import Maintenance, Mod, User, Vehicle
+from ..schemas import MaintenanceOut, ModOut, SyncOut, VehicleOut
+
+router = APIRouter(prefix="/sync", tags=["sync"])
+
+_row_serializers = {
+    "vehicles": RowSerializer(VehicleOut, Vehicle),
+    "maintenance": RowSerializer(MaintenanceOut, Maintenance),
+    "mods": RowSerializer(ModOut, Mod),
+}
+_columns = {name: serializer.columns for name, serializer in _row_serializers.items()}
+
+
+def _parse_token(since: str | None) -> int | None:
+    if since is None:
+        return None
+    if not since.isdigit():
+        raise HTTPException(status_code=400, detail="Invalid sync token")
+    return int(since)
+
+
+@router.get("", response_model=SyncOut)
+async def delta_sync(
+    since: str | None = Query(None, description="token from the previous sync; omit for everything"),
+    db: AsyncDB = Depends(get_async_read_db),
+    _: User = Depends(get_current_user_async),
+):
+    """Vehicles, maintenance and mods written, and ids deleted, since a token, in one payload."""
+    after = _parse_token(since)
+    if not settings.fast_serialization:
+        return await db.run_sync(sync.changes, after)
+    out = await db.run_sync(sync.changes, after, _columns)
+    parts = [f'{{"token":{json.dumps(out["token"])},"reset":{json.dumps(out["reset"])}'.encode()]
+    for name, serializer in _row_serializers.items():
+        parts.append(f',"{name}":'.encode() + serializer.dump_json(out[name]))
+    parts.append(b',"deleted":' + json.dumps(out["deleted"], separators=(",", ":")).encode() + b"}")
+    return Response(b"".join(parts), media_type="application/json")
@@ -0,0 +1,46 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, UploadFile, File, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+
+from ..database import get_async_read_db, AsyncDB
+from ..deps import get_current_user_async
+from ..models import User
+from ..schemas import ImportResult
+from ..transfer import import_rows, export_rows, guess_format, MEDIA_TYPES
+from .vehicles import get_vehicle_or_404
+
+router = APIRouter(tags=["import/export"])
+
+Kind = Literal["maintenance", "mods"]
+Format = Literal["csv", "ndjson"]
+
+
+@router.get("/export/{kind}")
+async def export_history(
+    kind: Kind,
+    format: Format = "csv",
+    vehicle_id: int | None = Query(None, description="Only this vehicle's records"),
+    db: AsyncDB = Depends(get_async_read_db),
+    _: User = Depends(get_current_user_async),
+):
+    if vehicle_id is not None:
+        await db.run_sync(get_vehicle_or_404, vehicle_id)
+    # The generator opens its own session: the request's is closed before the body streams
+    return StreamingResponse(
+        export_rows(kind, format, vehicle_id),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{kind}.{format}"'},
+    )
+
+
+@router.post("/import/{kind}", response_model=ImportResult)
+async def import_history(
+    kind: Kind,
+    file: UploadFile = File(...),
+    format: Format | None = Query(None, description="Defaults from the file extension (.ndjson/.jsonl, else CSV)"),
+    vehicle_id: int | None = Query(None, description="For rows without a vehicle_id column"),
+    _: User = Depends(get_current_user_async),
+):
+    fmt = format or guess_format(file.filename)
+    return await run_in_threadpool(import_rows, kind, file.file, fmt, vehicle_id)
@@ -0,0 +1,79 @@
+from typing import Literal
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy.orm import Session, selectinload
+
+from ..database import get_async_read_db, AsyncDB
+from ..models import Vehicle, Maintenance, Mod
+from ..schemas import VehicleOut, VehicleDetailOut
+from ..deps import get_current_user_async
+from ..models import User
+from ..pagination import keyset_page, MAX_PAGE_SIZE
+from ..response_cache import cached_json
+from .. import versions
+from . import maintenance, mods
+
+router = APIRouter(prefix="/vehicles", tags=["vehicles"])
+
+_vehicle_detail_out = TypeAdapter(VehicleDetailOut)
+
+
+def _sorted(records, sort: str, order: str):
+    # Same order as the keyset queries: SQLite puts NULLs first ascending, last descending
+    key = lambda r: (getattr(r, sort) is not None, getattr(r, sort), r.id)
+    return sorted(records, key=key, reverse=order == "desc")
+
+
+def _vehicle_detail(
+    db: Session,
+    vehicle_id: int,
+    collections: dict[str, tuple[str, str, int | None]],
+) -> dict:
+    """Load a vehicle and both collections in one session.
+
+    Unlimited collections ride along with the vehicle via selectinload (one extra SELECT each);
+    limited ones use the list endpoints' keyset query so their cursors work with "load more".
+    """
+    specs = {
+        "maintenance": (Vehicle.maintenance, Maintenance, maintenance.SORT_COLUMNS),
+        "mods": (Vehicle.mods, Mod, mods.SORT_COLUMNS),
+    }
+    q = db.query(Vehicle).filter(Vehicle.id == vehicle_id)
+    for name, (_, _, limit) in collections.items():
+        if limit is None:
+            q = q.options(selectinload(specs[name][0]))
+    v = q.first()
+    if not v:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+
+    out = VehicleOut.model_validate(v).model_dump()
+    for name, (sort, order, limit) in collections.items():
+        _, model, sort_columns = specs[name]
+        if limit is None:
+            out[name], out[f"{name}_next_cursor"] = _sorted(getattr(v, name), sort, order), None
+        else:
+            q = db.query(model).filter(model.vehicle_id == vehicle_id)
+            out[name], out[f"{name}_next_cursor"] = keyset_page(q, sort_columns[sort], model.id, sort, order, None, limit)
+    return out
+
+
+@router.get("/{vehicle_id}/full", response_model=VehicleDetailOut)
+async def get_vehicle_detail(
+    vehicle_id: int,
+    request: Request,
+    maintenance_sort: Literal["date", "type", "cost", "mileage"] = "date",
+    maintenance_order: Literal["asc", "desc"] = "desc",
+    maintenance_limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Omit for every record"),
+    mods_sort: Literal["date", "name", "cost"] = "date",
+    mods_order: Literal["asc", "desc"] = "desc",
+    mods_limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Omit for every record"),
+    db: AsyncDB = Depends(get_async_read_db),
+    _: User = Depends(get_current_user_async),
+):
+    """Vehicle, maintenance and mods in one round-trip (what the vehicle page needs)."""
+    collections = {
+        "maintenance": (maintenance_sort, maintenance_order, maintenance_limit),
+        "mods": (mods_sort, mods_order, mods_limit),
+    }
+    scopes = [versions.vehicle_scope(vehicle_id)]
+    return await cached_json(db, request, scopes, _vehicle_detail_out, _vehicle_detail, vehicle_id, collections)
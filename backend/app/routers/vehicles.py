@@ -1,34 +1,42 @@
-import uuid
-from pathlib import Path
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File
+from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, status, UploadFile, File, Request
+from pydantic import TypeAdapter
 from sqlalchemy.orm import Session
 
-from ..database import get_db
+from ..config import settings
+from ..database import get_async_db, get_async_read_db, AsyncDB
+from .. import rollups, versions
 from ..models import Vehicle
 from ..schemas import VehicleCreate, VehicleUpdate, VehicleOut
-from ..deps import get_current_user
-from ..config import settings
+from ..deps import get_current_user_async
 from ..models import User
+from ..uploads import save_upload, IMAGE_TYPES
+from ..images import build_photo_variants
+from ..fastjson import RowSerializer
+from ..response_cache import cached_json
 
 router = APIRouter(prefix="/vehicles", tags=["vehicles"])
 
-ALLOWED_IMAGE = {"image/jpeg", "image/png", "image/gif", "image/webp"}
+_vehicle_list = TypeAdapter(list[VehicleOut])
+_vehicle = TypeAdapter(VehicleOut)
+_vehicle_rows = RowSerializer(VehicleOut, Vehicle)
 
 
-@router.get("", response_model=list[VehicleOut])
-def list_vehicles(
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
-):
+def get_vehicle_or_404(db: Session, vehicle_id: int) -> Vehicle:
+    v = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+    if not v:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+    return v
+
+
+def _list_vehicles(db: Session):
     return db.query(Vehicle).order_by(Vehicle.year.desc(), Vehicle.make).all()
 
 
-@router.post("", response_model=VehicleOut, status_code=status.HTTP_201_CREATED)
-def create_vehicle(
-    data: VehicleCreate,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
-):
+def _list_vehicle_rows(db: Session):
+    return db.query(*_vehicle_rows.columns).order_by(Vehicle.year.desc(), Vehicle.make).all()
+
+
+def _create_vehicle(db: Session, data: VehicleCreate):
     v = Vehicle(**data.model_dump())
     db.add(v)
     db.commit()
@@ -36,69 +44,100 @@ def create_vehicle(
     return v
 
 
+def _update_vehicle(db: Session, vehicle_id: int, data: VehicleUpdate):
+    v = get_vehicle_or_404(db, vehicle_id)
+    updates = data.model_dump(exclude_unset=True)
+    for k, val in updates.items():
+        setattr(v, k, val)
+    if "photo_path" in updates:
+        v.photo_variants = None
+    db.commit()
+    db.refresh(v)
+    return v
+
+
+def _delete_vehicle(db: Session, vehicle_id: int):
+    v = get_vehicle_or_404(db, vehicle_id)
+    rollups.remove_vehicle(db, v.id)
+    db.delete(v)
+    db.commit()
+
+
+def _check_vehicle(db: Session, vehicle_id: int):
+    get_vehicle_or_404(db, vehicle_id)
+    # Release the (single) writer connection while the upload streams to disk
+    db.rollback()
+
+
+def _set_photo(db: Session, vehicle_id: int, photo_path: str):
+    v = get_vehicle_or_404(db, vehicle_id)
+    v.photo_path = photo_path
+    v.photo_variants = None
+    db.commit()
+    db.refresh(v)
+    return v
+
+
+@router.get("", response_model=list[VehicleOut])
+async def list_vehicles(
+    request: Request,
+    db: AsyncDB = Depends(get_async_read_db),
+    _: User = Depends(get_current_user_async),
+):
+    if settings.fast_serialization:
+        return await cached_json(db, request, [versions.VEHICLES], _vehicle_rows, _list_vehicle_rows)
+    return await cached_json(db, request, [versions.VEHICLES], _vehicle_list, _list_vehicles)
+
+
+@router.post("", response_model=VehicleOut, status_code=status.HTTP_201_CREATED)
+async def create_vehicle(
+    data: VehicleCreate,
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
+):
+    return await db.run_sync(_create_vehicle, data)
+
+
 @router.get("/{vehicle_id}", response_model=VehicleOut)
-def get_vehicle(
+async def get_vehicle(
     vehicle_id: int,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    request: Request,
+    db: AsyncDB = Depends(get_async_read_db),
+    _: User = Depends(get_current_user_async),
 ):
-    v = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not v:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-    return v
+    return await cached_json(db, request, [versions.vehicle_scope(vehicle_id)], _vehicle, get_vehicle_or_404, vehicle_id)
 
 
 @router.patch("/{vehicle_id}", response_model=VehicleOut)
-def update_vehicle(
+async def update_vehicle(
     vehicle_id: int,
     data: VehicleUpdate,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
 ):
-    v = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not v:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-    for k, val in data.model_dump(exclude_unset=True).items():
-        setattr(v, k, val)
-    db.commit()
-    db.refresh(v)
-    return v
+    return await db.run_sync(_update_vehicle, vehicle_id, data)
 
 
 @router.delete("/{vehicle_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_vehicle(
+async def delete_vehicle(
     vehicle_id: int,
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
 ):
-    v = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not v:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-    db.delete(v)
-    db.commit()
+    await db.run_sync(_delete_vehicle, vehicle_id)
     return None
 
 
 @router.post("/{vehicle_id}/photo", response_model=VehicleOut)
 async def upload_vehicle_photo(
     vehicle_id: int,
+    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    db: Session = Depends(get_db),
-    _: User = Depends(get_current_user),
+    db: AsyncDB = Depends(get_async_db),
+    _: User = Depends(get_current_user_async),
 ):
-    if file.content_type not in ALLOWED_IMAGE:
-        raise HTTPException(status_code=400, detail="File must be JPEG, PNG, GIF, or WebP")
-    v = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    if not v:
-        raise HTTPException(status_code=404, detail="Vehicle not found")
-    ext = Path(file.filename or "img").suffix or ".jpg"
-    name = f"{vehicle_id}_{uuid.uuid4().hex[:8]}{ext}"
-    out_dir = settings.upload_dir / "vehicles"
-    out_dir.mkdir(parents=True, exist_ok=True)
-    path = out_dir / name
-    content = await file.read()
-    path.write_bytes(content)
-    v.photo_path = f"vehicles/{name}"
-    db.commit()
-    db.refresh(v)
+    await db.run_sync(_check_vehicle, vehicle_id)
+    photo_path = await save_upload(file, IMAGE_TYPES, "File must be JPEG, PNG, GIF, or WebP")
+    v = await db.run_sync(_set_photo, vehicle_id, photo_path)
+    background_tasks.add_task(build_photo_variants, v.id, v.photo_path)
     return v
@@ -1,11 +1,17 @@
 from .auth import Token, TokenData, UserOut
-from .vehicle import VehicleCreate, VehicleUpdate, VehicleOut
+from .vehicle import VehicleCreate, VehicleUpdate, VehicleOut, VehicleDetailOut
 from .maintenance import MaintenanceCreate, MaintenanceUpdate, MaintenanceOut
 from .mod import ModCreate, ModUpdate, ModOut
+from .transfer import ImportRowError, ImportResult
+from .search import SearchHit
+from .sync import SyncDeleted, SyncOut
 
 __all__ = [
     "Token", "TokenData", "UserOut",
-    "VehicleCreate", "VehicleUpdate", "VehicleOut",
+    "VehicleCreate", "VehicleUpdate", "VehicleOut", "VehicleDetailOut",
     "MaintenanceCreate", "MaintenanceUpdate", "MaintenanceOut",
     "ModCreate", "ModUpdate", "ModOut",
+    "ImportRowError", "ImportResult",
+    "SearchHit",
+    "SyncDeleted", "SyncOut",
 ]
@@ -35,5 +35,6 @@ class MaintenanceOut(MaintenanceBase):
     id: int
     vehicle_id: int
     created_at: datetime | None = None
+    updated_at: datetime | None = None
 
     model_config = ConfigDict(from_attributes=True)
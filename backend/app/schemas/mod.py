@@ -31,5 +31,6 @@ class ModOut(ModBase):
     id: int
     vehicle_id: int
     created_at: datetime | None = None
+    updated_at: datetime | None = None
 
     model_config = ConfigDict(from_attributes=True)
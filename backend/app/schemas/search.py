@@ -0,0 +1,16 @@
+from datetime import date as DateType
+from typing import Literal
+from pydantic import BaseModel
+
+
+class SearchHit(BaseModel):
+    kind: Literal["maintenance", "mod"]
+    id: int
+    vehicle_id: int
+    vehicle_name: str | None = None
+    title: str
+    date: DateType
+    cost: float | None = None
+    shop_name: str | None = None
+    snippet: str
+    rank: float
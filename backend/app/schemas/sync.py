@@ -0,0 +1,24 @@
+from pydantic import BaseModel
+
+from .maintenance import MaintenanceOut
+from .mod import ModOut
+from .vehicle import VehicleOut
+
+
+class SyncDeleted(BaseModel):
+    vehicles: list[int]
+    maintenance: list[int]
+    mods: list[int]
+
+
+class SyncOut(BaseModel):
+    """Changes since a sync token. Apply the rows, then the deletions, then keep token for next time.
+
+    reset means the token was too old (or unknown): the rows are everything, so replace local data.
+    """
+    token: str
+    reset: bool
+    vehicles: list[VehicleOut]
+    maintenance: list[MaintenanceOut]
+    mods: list[ModOut]
+    deleted: SyncDeleted
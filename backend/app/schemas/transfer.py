@@ -0,0 +1,12 @@
+from pydantic import BaseModel
+
+
+class ImportRowError(BaseModel):
+    row: int
+    error: str
+
+
+class ImportResult(BaseModel):
+    inserted: int
+    error_count: int
+    errors: list[ImportRowError]
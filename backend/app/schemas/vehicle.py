@@ -1,6 +1,9 @@
 from datetime import datetime
 from pydantic import BaseModel, ConfigDict
 
+from .maintenance import MaintenanceOut
+from .mod import ModOut
+
 
 class VehicleBase(BaseModel):
     nickname: str | None = None
@@ -32,7 +35,16 @@ class VehicleUpdate(BaseModel):
 
 class VehicleOut(VehicleBase):
     id: int
+    photo_variants: dict[str, str] | None = None
     created_at: datetime | None = None
     updated_at: datetime | None = None
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class VehicleDetailOut(VehicleOut):
+    """A vehicle with its maintenance and mods; *_next_cursor is set when a collection was truncated."""
+    maintenance: list[MaintenanceOut]
+    maintenance_next_cursor: str | None = None
+    mods: list[ModOut]
+    mods_next_cursor: str | None = None
@@ -0,0 +1,144 @@
+"""Full-text search over maintenance and mods (SQLite FTS5).
+
+One FTS5 table holds both kinds. Its rowid encodes the source row (id * 2 for maintenance,
+id * 2 + 1 for mods), so the sync triggers touch the index by rowid rather than scanning it.
+Triggers rather than ORM events keep it current, so bulk (core) inserts are covered too.
+"""
+import re
+
+from fastapi import HTTPException
+from sqlalchemy import Float, column, text
+from sqlalchemy.orm import Session
+
+from .models import Maintenance, Mod, Vehicle
+from .pagination import encode_cursor, decode_cursor
+
+TABLE = "search_index"
+# bm25 weights per column, in column order: vehicle_id (unindexed), title, shop, body, parts
+RANK = "bm25(0, 10.0, 5.0, 1.0, 2.0)"
+
+_SOURCES = {
+    # table -> (rowid expression, title, shop, body, parts, watched columns)
+    "maintenance": ("{r}.id * 2", "{r}.type", "{r}.shop_name", "{r}.notes", "NULL", "type, shop_name, notes, vehicle_id"),
+    "mods": ("{r}.id * 2 + 1", "{r}.name", "NULL", "{r}.description", "{r}.parts_list", "name, description, parts_list, vehicle_id"),
+}
+
+
+def _values(table: str, r: str) -> tuple[str, str]:
+    rowid, *cols, _ = _SOURCES[table]
+    return rowid.format(r=r), ", ".join([f"{r}.vehicle_id"] + [c.format(r=r) for c in cols])
+
+
+def ddl() -> list[str]:
+    statements = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {TABLE} USING fts5("
+        "vehicle_id UNINDEXED, title, shop, body, parts, tokenize = 'porter unicode61 remove_diacritics 2')",
+    ]
+    insert = f"INSERT INTO {TABLE}(rowid, vehicle_id, title, shop, body, parts)"
+    for table, source in _SOURCES.items():
+        new_rowid, new_values = _values(table, "new")
+        old_rowid, _ = _values(table, "old")
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ai AFTER INSERT ON {table} BEGIN "
+            f"{insert} VALUES ({new_rowid}, {new_values}); END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_ad AFTER DELETE ON {table} BEGIN "
+            f"DELETE FROM {TABLE} WHERE rowid = {old_rowid}; END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_au AFTER UPDATE OF {source[-1]} ON {table} BEGIN "
+            f"DELETE FROM {TABLE} WHERE rowid = {old_rowid}; {insert} VALUES ({new_rowid}, {new_values}); END",
+        ]
+    return statements
+
+
+def install(conn) -> bool:
+    """Create the index and its triggers if missing. Returns True if the index was just created."""
+    exists = conn.execute(text("SELECT 1 FROM sqlite_master WHERE name = :t"), {"t": TABLE}).first()
+    for statement in ddl():
+        conn.execute(text(statement))
+    if not exists:
+        conn.execute(text(f"INSERT INTO {TABLE}({TABLE}, rank) VALUES ('rank', :rank)"), {"rank": RANK})
+    return not exists
+
+
+def rebuild(db: Session) -> int:
+    """Repopulate the index from the maintenance and mods tables. Returns rows indexed."""
+    db.execute(text(f"DELETE FROM {TABLE}"))
+    for table in _SOURCES:
+        rowid, values = _values(table, table)
+        db.execute(text(f"INSERT INTO {TABLE}(rowid, vehicle_id, title, shop, body, parts) SELECT {rowid}, {values} FROM {table}"))
+    db.execute(text(f"INSERT INTO {TABLE}({TABLE}) VALUES ('optimize')"))
+    db.commit()
+    return db.execute(text(f"SELECT count(*) FROM {TABLE}")).scalar()
+
+
+def match_query(q: str) -> str | None:
+    """Turn free text into an FTS5 query: any word may match (the last as a prefix, for typing).
+
+    bm25 then ranks records matching more, and rarer, words first.
+    """
+    words = re.findall(r"\w+", q)
+    if not words:
+        return None
+    return " OR ".join(f'"{w}"' for w in words) + "*"
+
+
+_rank = column("rank", Float)
+
+
+def search(db: Session, q: str, vehicle_id: int | None, cursor: str | None, limit: int):
+    """Ranked hits (best first) across all vehicles. Returns (hits, next_cursor)."""
+    if db.get_bind().dialect.name != "sqlite":
+        raise HTTPException(status_code=501, detail="Search needs SQLite")
+    match = match_query(q)
+    if not match:
+        return [], None
+    where = [f"{TABLE} MATCH :match"]
+    params = {"match": match, "limit": limit + 1}
+    if vehicle_id is not None:
+        where.append("vehicle_id = :vehicle_id")
+        params["vehicle_id"] = vehicle_id
+    if cursor:
+        params["after_rank"], params["after_id"] = decode_cursor(cursor, "rank", "asc", _rank)
+        where.append("(rank > :after_rank OR (rank = :after_rank AND rowid > :after_id))")
+    rows = db.execute(text(
+        f"SELECT rowid, rank, snippet({TABLE}, -1, '', '', '…', 12) AS snippet FROM {TABLE} "
+        f"WHERE {' AND '.join(where)} ORDER BY rank, rowid LIMIT :limit"
+    ), params).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor("rank", "asc", rows[-1].rank, rows[-1].rowid)
+
+    maintenance_ids = [r.rowid // 2 for r in rows if r.rowid % 2 == 0]
+    mod_ids = [r.rowid // 2 for r in rows if r.rowid % 2 == 1]
+    records = {}
+    if maintenance_ids:
+        records.update({m.id * 2: m for m in db.query(Maintenance).filter(Maintenance.id.in_(maintenance_ids))})
+    if mod_ids:
+        records.update({m.id * 2 + 1: m for m in db.query(Mod).filter(Mod.id.in_(mod_ids))})
+    vehicle_ids = {r.vehicle_id for r in records.values()}
+    names = {
+        v.id: v.nickname or f"{v.year} {v.make} {v.model}"
+        for v in db.query(Vehicle.id, Vehicle.nickname, Vehicle.year, Vehicle.make, Vehicle.model)
+        .filter(Vehicle.id.in_(vehicle_ids))
+    }
+
+    hits = []
+    for r in rows:
+        record = records.get(r.rowid)
+        if record is None:
+            continue
+        is_mod = r.rowid % 2 == 1
+        hits.append({
+            "kind": "mod" if is_mod else "maintenance",
+            "id": record.id,
+            "vehicle_id": record.vehicle_id,
+            "vehicle_name": names.get(record.vehicle_id),
+            "title": record.name if is_mod else record.type,
+            "date": record.date,
+            "cost": record.cost,
+            "shop_name": None if is_mod else record.shop_name,
+            "snippet": r.snippet,
+            "rank": r.rank,
+        })
+    return hits, next_cursor
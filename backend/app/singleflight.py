@@ -0,0 +1,41 @@
+import asyncio
+
+
+class SingleFlight:
+    """Coalesce concurrent identical async computations onto one in-flight task.
+
+    Callers that arrive while a computation for the same key is running await its result instead
+    of starting their own; once it finishes the key is forgotten, so later calls compute afresh.
+    Keys must therefore identify the data version (e.g. include an ETag) to avoid sharing a result
+    across a write.
+    """
+
+    def __init__(self):
+        self._inflight: dict = {}
+        self.calls = 0
+        self.coalesced = 0
+
+    async def do(self, key, fn, *args):
+        self.calls += 1
+        task = self._inflight.get(key)
+        if task is None:
+            # A task, not a bare await: one caller disconnecting mustn't cancel the others' result
+            task = asyncio.ensure_future(fn(*args))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._done(key, t))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _done(self, key, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved, even if every caller went away
+
+    def stats(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+        }
@@ -0,0 +1,139 @@
+import gzip
+import hashlib
+import mimetypes
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+# Precompressed siblings (e.g. app.js.br), in order of preference
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+COMPRESSIBLE = {".html", ".js", ".mjs", ".css", ".svg", ".json", ".txt", ".map", ".xml", ".webmanifest"}
+
+# Upload subdirectories whose file names are content hashes
+CONTENT_ADDRESSED = ("blobs/", "variants/")
+
+
+def _etag_matches(etag: str, if_none_match: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+
+
+def _accepted_encodings(accept_encoding: str) -> set[str]:
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        name, _, params = part.strip().partition(";")
+        if params.replace(" ", "") in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            continue
+        accepted.add(name.strip())
+    return accepted
+
+
+class UploadFiles(StaticFiles):
+    """StaticFiles for upload_dir. Content-addressed files are immutable and use their hash as a strong ETag."""
+
+    def file_response(self, full_path, stat_result, scope, status_code=200) -> Response:
+        rel = Path(os.path.relpath(full_path, self.directory)).as_posix()
+        if rel.startswith(CONTENT_ADDRESSED):
+            headers = {"cache-control": IMMUTABLE, "etag": f'"{Path(full_path).stem}"'}
+        else:
+            headers = {"cache-control": REVALIDATE}
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers=headers)
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
+
+@dataclass
+class _DistEntry:
+    path: Path
+    stat: os.stat_result
+    etag: str
+    media_type: str
+    encoded: dict[str, tuple[Path, os.stat_result]] = field(default_factory=dict)
+
+
+class DistIndex:
+    """The built SPA, indexed once at startup so requests never touch the filesystem metadata.
+
+    Rebuilding the frontend requires a restart to pick up new files.
+    """
+
+    def __init__(self, root: Path):
+        self.entries: dict[str, _DistEntry] = {}
+        for path in sorted(root.rglob("*")):
+            if not path.is_file():
+                continue
+            if path.suffix in (".br", ".gz") and path.with_suffix("").is_file():
+                continue
+            digest = hashlib.sha256(path.read_bytes()).hexdigest()[:32]
+            entry = _DistEntry(
+                path=path,
+                stat=path.stat(),
+                etag=f'"{digest}"',
+                media_type=mimetypes.guess_type(path.name)[0] or "application/octet-stream",
+            )
+            for encoding, suffix in ENCODINGS:
+                compressed = path.with_name(path.name + suffix)
+                if compressed.is_file():
+                    entry.encoded[encoding] = (compressed, compressed.stat())
+            self.entries[path.relative_to(root).as_posix()] = entry
+        self.index = self.entries.get("index.html")
+
+    def response(self, full_path: str, request_headers: Headers) -> Response:
+        entry = self.entries.get(full_path)
+        if entry is None:
+            # Unknown hashed asset is a real 404; anything else is a client-side route
+            if full_path.startswith("assets/") or self.index is None:
+                return Response(status_code=404)
+            entry = self.index
+        # Vite fingerprints everything under assets/, so those never change at a given URL
+        immutable = full_path.startswith("assets/")
+        headers = {"cache-control": IMMUTABLE if immutable else REVALIDATE, "vary": "Accept-Encoding"}
+
+        encoding = None
+        if entry.encoded and "range" not in request_headers:
+            accepted = _accepted_encodings(request_headers.get("accept-encoding", ""))
+            encoding = next((enc for enc, _ in ENCODINGS if enc in entry.encoded and enc in accepted), None)
+        headers["etag"] = entry.etag if encoding is None else f'{entry.etag[:-1]}-{encoding}"'
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and _etag_matches(headers["etag"], if_none_match):
+            return Response(status_code=304, headers=headers)
+        if encoding:
+            path, stat = entry.encoded[encoding]
+            headers["content-encoding"] = encoding
+        else:
+            path, stat = entry.path, entry.stat
+        return FileResponse(path, stat_result=stat, headers=headers, media_type=entry.media_type)
+
+
+def precompress(root: Path, min_size: int = 1024) -> int:
+    """Write .gz (and .br when the brotli package is installed) next to compressible files. Returns files written."""
+    try:
+        import brotli
+    except ImportError:
+        brotli = None
+    written = 0
+    for path in root.rglob("*"):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE or path.stat().st_size < min_size:
+            continue
+        mtime = path.stat().st_mtime
+        gz = path.with_name(path.name + ".gz")
+        if not gz.exists() or gz.stat().st_mtime < mtime:
+            with path.open("rb") as src, gzip.open(gz, "wb", compresslevel=9) as out:
+                shutil.copyfileobj(src, out)
+            written += 1
+        br = path.with_name(path.name + ".br")
+        if brotli and (not br.exists() or br.stat().st_mtime < mtime):
+            br.write_bytes(brotli.compress(path.read_bytes(), quality=11))
+            written += 1
+    return written
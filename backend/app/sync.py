@@ -0,0 +1,131 @@
+"""Delta sync for GET /api/sync.
+
+Every flush that writes a vehicle, maintenance record or mod takes the next value of one global
+sequence (the "sync" data_versions row). It stamps that value on the rows it creates or updates
+(change_seq). A hard delete leaves a tombstone with the sequence instead, for every record a
+vehicle's deletion cascades to as well as the vehicle itself. SQLite lets one transaction write at
+a time and the counter is bumped under that lock, so sequences follow commit order across workers:
+a client that has seen everything up to N catches up with the rows and tombstones after N.
+
+Tombstones older than GARAGE_SYNC_TOMBSTONE_RETENTION_DAYS are compacted whenever new ones are
+written. The "sync:floor" row holds the newest sequence compacted away. A token older than that
+can't be brought up to date, so that client gets a full snapshot with reset=true instead.
+"""
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .models import DataVersion, Maintenance, Mod, Tombstone, Vehicle
+
+SEQUENCE = "sync"
+FLOOR = "sync:floor"
+# model -> collection name in the /api/sync response (and Tombstone.entity)
+COLLECTIONS = {Vehicle: "vehicles", Maintenance: "maintenance", Mod: "mods"}
+_MODELS = {name: model for model, name in COLLECTIONS.items()}
+
+
+def next_seq(db: Session) -> int:
+    """Advance the sequence in db's open transaction and return the new value."""
+    seq = db.execute(
+        DataVersion.__table__.update()
+        .where(DataVersion.scope == SEQUENCE)
+        .values(version=DataVersion.version + 1)
+        .returning(DataVersion.version)
+    ).scalar()
+    if seq is None:
+        db.execute(DataVersion.__table__.insert().values(scope=SEQUENCE, version=1))
+        seq = 1
+    return seq
+
+
+def _counter(db: Session, scope: str) -> int:
+    return db.execute(select(DataVersion.version).where(DataVersion.scope == scope)).scalar() or 0
+
+
+@event.listens_for(Session, "before_flush")
+def _stamp_changes(session: Session, flush_context, instances):
+    changed = [obj for obj in session.new if type(obj) in COLLECTIONS]
+    changed += [
+        obj for obj in session.dirty
+        if type(obj) in COLLECTIONS and session.is_modified(obj, include_collections=False)
+    ]
+    # Vehicle.maintenance/mods cascade in the ORM, so a vehicle's records are in session.deleted too
+    deleted = [obj for obj in session.deleted if type(obj) in COLLECTIONS]
+    if not changed and not deleted:
+        return
+    seq = next_seq(session)
+    for obj in changed:
+        obj.change_seq = seq
+    if deleted:
+        session.execute(Tombstone.__table__.insert(), [
+            {
+                "entity": COLLECTIONS[type(obj)],
+                "entity_id": obj.id,
+                "vehicle_id": obj.id if isinstance(obj, Vehicle) else obj.vehicle_id,
+                "change_seq": seq,
+            }
+            for obj in deleted
+        ])
+        compact(session, settings.sync_tombstone_retention_days)
+
+
+def compact(db: Session, retention_days: int) -> int:
+    """Drop tombstones older than retention_days (0 keeps them all), in db's transaction; returns how many."""
+    if retention_days <= 0:
+        return 0
+    # deleted_at comes from the database clock, which stores UTC without an offset
+    cutoff = datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=retention_days)
+    expired = Tombstone.deleted_at < cutoff
+    newest = db.execute(select(func.max(Tombstone.change_seq)).where(expired)).scalar()
+    if newest is None:
+        return 0
+    removed = db.execute(Tombstone.__table__.delete().where(Tombstone.change_seq <= newest)).rowcount
+    updated = db.execute(
+        DataVersion.__table__.update().where(DataVersion.scope == FLOOR).values(version=newest)
+    ).rowcount
+    if not updated:
+        db.execute(DataVersion.__table__.insert().values(scope=FLOOR, version=newest))
+    return removed
+
+
+def _deletions(db: Session, since: int) -> dict[str, list[int]]:
+    deleted = {name: {} for name in _MODELS}
+    rows = db.execute(
+        select(Tombstone.entity, Tombstone.entity_id, Tombstone.change_seq).where(Tombstone.change_seq > since)
+    )
+    for entity, entity_id, seq in rows:
+        deleted[entity][entity_id] = max(seq, deleted[entity].get(entity_id, 0))
+    for name, tombstones in deleted.items():
+        if not tombstones:
+            continue
+        # SQLite can hand a deleted row's id to a new row; a tombstone older than the live row is moot
+        model = _MODELS[name]
+        live = db.execute(select(model.id, model.change_seq).where(model.id.in_(list(tombstones)))).all()
+        for row_id, seq in live:
+            if seq > tombstones[row_id]:
+                del tombstones[row_id]
+    return {name: sorted(tombstones) for name, tombstones in deleted.items()}
+
+
+def changes(db: Session, since: int | None, columns: dict | None = None) -> dict:
+    """Rows written and ids deleted after since, or every row when since is None or out of range.
+
+    columns: per collection, columns to select instead of loading ORM instances. Each statement
+    reads its own snapshot, so the token is read first: anything committed later may show up now
+    and again next time, but nothing at or below the token is missed.
+    """
+    token = _counter(db, SEQUENCE)
+    full = since is None or since > token
+    out = {"token": str(token), "reset": since is not None and full}
+    for model, name in COLLECTIONS.items():
+        query = db.query(*columns[name]) if columns else db.query(model)
+        if not full:
+            query = query.filter(model.change_seq > since)
+        out[name] = query.order_by(model.id).all()
+    out["deleted"] = {name: [] for name in _MODELS} if full else _deletions(db, since)
+    # Read last: if tombstones past since were compacted away meanwhile, this result may lack them
+    if not full and since < _counter(db, FLOOR):
+        return changes(db, None, columns) | {"reset": True}
+    return out
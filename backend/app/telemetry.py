@@ -0,0 +1,284 @@
+"""Per-request timing and Prometheus metrics.
+
+TelemetryMiddleware gives each request a RequestTimings object through a context variable.
+SQLAlchemy cursor events add query counts and SQL time to it. They fire on threadpool threads and
+in aiosqlite greenlets, which both inherit the request's context. timed() adds named phases such
+as auth and serialization. When the response starts, the middleware folds the timings into the
+process-wide metrics and can also report them in a Server-Timing header.
+
+With GARAGE_SQL_DIAGNOSTICS, the same hooks log statements slower than GARAGE_SLOW_QUERY_MS. At
+the end of the request they also log any statement shape repeated GARAGE_N_PLUS_ONE_THRESHOLD
+times: a query issued once per row of an earlier result (N+1) looks exactly like that.
+
+Metrics are per process. Under run.py --prod, each scrape reaches whichever worker accepts the
+connection.
+"""
+import logging
+import re
+import time
+from collections import Counter as Tally
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from .config import settings
+
+logger = logging.getLogger(__name__)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class RequestTimings:
+    __slots__ = ("scope", "phases", "queries", "db_seconds", "slow_queries", "shapes")
+
+    def __init__(self, scope=None):
+        self.scope = scope
+        self.phases: dict[str, float] = {}
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.slow_queries = 0
+        # Statement shape -> executions, only kept with sql_diagnostics
+        self.shapes: Tally | None = Tally() if settings.sql_diagnostics else None
+
+
+# Statement lists that app.testing.count_queries() is collecting into; empty outside tests
+query_logs: list[list[str]] = []
+
+
+_current: ContextVar[RequestTimings | None] = ContextVar("request_timings", default=None)
+
+
+def current() -> RequestTimings | None:
+    return _current.get()
+
+
+@contextmanager
+def timed(phase: str):
+    """Add the block's wall time to the current request's phase (no-op outside a request)."""
+    timings = _current.get()
+    if timings is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings.phases[phase] = timings.phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _query_start(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+
+_IN_LIST = re.compile(r"\(\?(?:, \?)+\)")
+_SPACE = re.compile(r"\s+")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with whitespace collapsed and placeholder lists (expanded IN, VALUES) folded."""
+    return _IN_LIST.sub("(?...)", _SPACE.sub(" ", statement).strip())
+
+
+def parameter_shape(parameters, executemany: bool) -> str:
+    """Types, not values, of the bound parameters, e.g. "(int, str)" or "3 x (int, str)"."""
+    def one(params):
+        values = params.values() if isinstance(params, dict) else params or ()
+        return "(" + ", ".join(type(v).__name__ for v in values) + ")"
+    if executemany:
+        return f"{len(parameters)} x {one(parameters[0]) if parameters else '()'}"
+    return one(parameters)
+
+
+def route_of(timings: RequestTimings | None) -> str:
+    if timings is None or timings.scope is None:
+        return "(no request)"
+    return f"{timings.scope['method']} {_route_label(timings.scope)}"
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _query_end(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    timings = _current.get()
+    if timings is not None:
+        timings.queries += 1
+        timings.db_seconds += elapsed
+    for log in query_logs:
+        log.append(statement)
+    if settings.sql_diagnostics:
+        if timings is not None:
+            timings.shapes[statement_shape(statement)] += 1
+        if elapsed * 1000 >= settings.slow_query_ms:
+            if timings is not None:
+                timings.slow_queries += 1
+            logger.warning(
+                "Slow query (%.1f ms) on %s: %s params=%s",
+                elapsed * 1000, route_of(timings), statement_shape(statement), parameter_shape(parameters, executemany),
+            )
+
+
+def _report_repeats(timings: RequestTimings) -> int:
+    """Log statement shapes run n_plus_one_threshold+ times in the request. Returns how many."""
+    repeated = [(shape, n) for shape, n in timings.shapes.items() if n >= settings.n_plus_one_threshold]
+    for shape, n in repeated:
+        logger.warning("Suspected N+1 on %s: %d executions of %s", route_of(timings), n, shape)
+    return len(repeated)
+
+
+@event.listens_for(Engine, "handle_error")
+def _query_failed(context):
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, buckets: tuple):
+        self.name = name
+        self.help = help
+        self.buckets = buckets
+        self.series: dict[tuple, list] = {}  # labels -> [count per bucket..., +Inf count, sum]
+
+    def observe(self, labels: tuple, value: float):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                series[i] += 1
+        series[-2] += 1
+        series[-1] += value
+
+
+class Counter:
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self.series: dict[tuple, float] = {}
+
+    def inc(self, labels: tuple, value: float = 1):
+        self.series[labels] = self.series.get(labels, 0) + value
+
+
+# Labels: (method, route, status) for request metrics, (route,) for the rest.
+# Only updated from the event loop thread, so no locking.
+request_seconds = Histogram("http_request_duration_seconds", "Time to first response byte", LATENCY_BUCKETS)
+request_queries = Histogram("http_request_db_queries", "SQL statements executed per request", QUERY_BUCKETS)
+db_seconds = Counter("http_request_db_seconds_total", "Time spent executing SQL")
+bytes_in = Counter("http_request_bytes_total", "Request body bytes received")
+bytes_out = Counter("http_response_bytes_total", "Response body bytes sent")
+slow_queries = Counter("sql_slow_queries_total", "Statements slower than GARAGE_SLOW_QUERY_MS (with GARAGE_SQL_DIAGNOSTICS)")
+suspected_n_plus_one = Counter(
+    "sql_suspected_n_plus_one_total", "Statement shapes repeated GARAGE_N_PLUS_ONE_THRESHOLD+ times in one request"
+)
+_REQUEST_LABELS = ("method", "route", "status")
+_ROUTE_LABELS = ("route",)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: tuple, values: tuple, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def format_metric(name: str, kind: str, help: str, samples, label_names: tuple = ()) -> list[str]:
+    """Prometheus text lines for a counter or gauge; samples is [(label values, value)]."""
+    lines = [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+    lines += [f"{name}{_labels(label_names, labels)} {value}" for labels, value in samples]
+    return lines
+
+
+def _format_histogram(h: Histogram, label_names: tuple) -> list[str]:
+    lines = [f"# HELP {h.name} {h.help}", f"# TYPE {h.name} histogram"]
+    for labels, series in sorted(h.series.items()):
+        for bound, count in zip(h.buckets + ("+Inf",), series):
+            le = f'le="{bound}"'
+            lines.append(f"{h.name}_bucket{_labels(label_names, labels, le)} {count}")
+        lines.append(f"{h.name}_count{_labels(label_names, labels)} {series[-2]}")
+        lines.append(f"{h.name}_sum{_labels(label_names, labels)} {series[-1]}")
+    return lines
+
+
+def render() -> list[str]:
+    lines = _format_histogram(request_seconds, _REQUEST_LABELS)
+    lines += _format_histogram(request_queries, _ROUTE_LABELS)
+    for counter in (db_seconds, bytes_in, bytes_out, slow_queries, suspected_n_plus_one):
+        lines += format_metric(counter.name, "counter", counter.help, sorted(counter.series.items()), _ROUTE_LABELS)
+    return lines
+
+
+def _route_label(scope) -> str:
+    route = scope.get("route")
+    if route is not None:
+        return route.path
+    # Mounted apps (e.g. /uploads) set root_path; anything else matched no route
+    return f"{scope['root_path']}/*" if scope.get("root_path") else "unmatched"
+
+
+def server_timing(timings: RequestTimings, total: float) -> str:
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.phases.items()]
+    parts.append(f'db;dur={timings.db_seconds * 1000:.1f};desc="{timings.queries} queries"')
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+class TelemetryMiddleware:
+    """Record latency, SQL and byte counts per route template; optionally add Server-Timing."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings = RequestTimings(scope)
+        token = _current.set(timings)
+        start = time.perf_counter()
+        received = sent = 0
+        status = 500
+        elapsed = None
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            return message
+
+        async def timing_send(message):
+            nonlocal sent, status, elapsed
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                elapsed = time.perf_counter() - start
+                if settings.server_timing:
+                    headers = list(message.get("headers", []))
+                    headers.append((b"server-timing", server_timing(timings, elapsed).encode()))
+                    message = {**message, "headers": headers}
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, timing_send)
+        finally:
+            _current.reset(token)
+            route = (_route_label(scope),)
+            if elapsed is None:
+                elapsed = time.perf_counter() - start
+            request_seconds.observe((scope["method"], route[0], status), elapsed)
+            request_queries.observe(route, timings.queries)
+            db_seconds.inc(route, timings.db_seconds)
+            bytes_in.inc(route, received)
+            bytes_out.inc(route, sent)
+            if timings.slow_queries:
+                slow_queries.inc(route, timings.slow_queries)
+            if timings.shapes and (repeated := _report_repeats(timings)):
+                suspected_n_plus_one.inc(route, repeated)
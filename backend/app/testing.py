@@ -0,0 +1,35 @@
+"""Helpers for tests that pin how many SQL statements an endpoint may run.
+
+    from app.testing import assert_max_queries
+
+    def test_list_maintenance(client, headers, vehicle_id):
+        with assert_max_queries(4):
+            client.get(f"/api/vehicles/{vehicle_id}/maintenance", headers=headers)
+
+Counts every statement on any engine while the block runs, whichever thread or greenlet runs it,
+so use it around one request at a time (e.g. a TestClient call).
+"""
+from contextlib import contextmanager
+
+from . import telemetry
+
+
+@contextmanager
+def count_queries():
+    """Yield a list that collects the SQL of every statement executed inside the block."""
+    statements: list[str] = []
+    telemetry.query_logs.append(statements)
+    try:
+        yield statements
+    finally:
+        telemetry.query_logs[:] = [log for log in telemetry.query_logs if log is not statements]
+
+
+@contextmanager
+def assert_max_queries(limit: int):
+    """Fail with the offending statements if the block runs more than limit SQL statements."""
+    with count_queries() as statements:
+        yield statements
+    if len(statements) > limit:
+        shown = "\n".join(f"  {i}. {telemetry.statement_shape(s)}" for i, s in enumerate(statements, 1))
+        raise AssertionError(f"{len(statements)} queries, expected at most {limit}:\n{shown}")
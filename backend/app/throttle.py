@@ -0,0 +1,58 @@
+"""Login attempt throttling, checked before any password hash is computed.
+
+Each key (a username or a client IP) may make `limit` attempts per sliding window. A successful
+login clears the username's record but not the IP's, so one address cycling through usernames
+is still capped. Counts are per process.
+"""
+import time
+
+from fastapi import HTTPException, status
+
+from .cache import TTLCache
+
+
+class AttemptLimiter:
+    def __init__(self, limit: int, window: float, maxsize: int = 10_000):
+        self.limit = limit
+        self.window = window
+        # key -> attempt timestamps; entries expire a window after the last attempt
+        self._attempts = TTLCache(maxsize, window)
+        self.rejected = 0
+
+    def retry_after(self, key) -> float:
+        """Seconds until key may try again (0: allowed now)."""
+        if self.limit <= 0:
+            return 0.0
+        now = time.monotonic()
+        recent = [t for t in self._attempts.get(key) or () if t > now - self.window]
+        if len(recent) < self.limit:
+            return 0.0
+        return recent[-self.limit] + self.window - now
+
+    def record(self, key):
+        now = time.monotonic()
+        recent = [t for t in self._attempts.get(key) or () if t > now - self.window]
+        recent.append(now)
+        self._attempts.set(key, recent[-max(self.limit, 1):])
+
+    def reset(self, key):
+        self._attempts.pop(key)
+
+    def stats(self) -> dict:
+        return {"tracked": len(self._attempts), "rejected": self.rejected}
+
+
+def check_and_record(limiters: list[tuple[AttemptLimiter, object]]):
+    """Raise 429 if any (limiter, key) is over its limit; otherwise count this attempt against each."""
+    wait = max(limiter.retry_after(key) for limiter, key in limiters)
+    if wait > 0:
+        for limiter, key in limiters:
+            if limiter.retry_after(key) > 0:
+                limiter.rejected += 1
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many login attempts, try again later",
+            headers={"Retry-After": str(int(wait) + 1)},
+        )
+    for limiter, key in limiters:
+        limiter.record(key)
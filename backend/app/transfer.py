@@ -0,0 +1,180 @@
+"""Bulk CSV / NDJSON import and streaming export of maintenance and mod history."""
+import csv
+import io
+import json
+from datetime import date, datetime
+from typing import IO, Iterator
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from . import events, rollups, sync, versions
+from .database import SessionLocal, ReadSessionLocal
+from .models import Maintenance, Mod, Vehicle
+from .schemas.maintenance import MaintenanceCreate
+from .schemas.mod import ModCreate
+
+FORMATS = ("csv", "ndjson")
+MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+IMPORT_BATCH_SIZE = 500
+EXPORT_BATCH_SIZE = 1000
+# Per-row errors echoed back; the count keeps going past this
+MAX_REPORTED_ERRORS = 1000
+
+# kind -> (model, row schema, exported columns)
+KINDS = {
+    "maintenance": (
+        Maintenance,
+        MaintenanceCreate,
+        ["id", "vehicle_id", "type", "date", "mileage", "cost", "shop_name", "notes", "receipt_path", "created_at"],
+    ),
+    "mods": (
+        Mod,
+        ModCreate,
+        ["id", "vehicle_id", "name", "description", "date", "cost", "parts_list", "created_at"],
+    ),
+}
+
+
+def guess_format(filename: str | None) -> str:
+    return "ndjson" if (filename or "").lower().endswith((".ndjson", ".jsonl")) else "csv"
+
+
+def _read_rows(src: IO[bytes], fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """Yield (line number, row, parse error) one line at a time."""
+    text = io.TextIOWrapper(src, encoding="utf-8-sig", newline="")
+    line_num = 0
+    try:
+        if fmt == "csv":
+            reader = csv.DictReader(text)
+            for row in reader:
+                line_num = reader.line_num
+                # Blank cells mean "no value", not an empty string
+                yield line_num, {k: v for k, v in row.items() if k and v not in ("", None)}, None
+            return
+        for line_num, line in enumerate(text, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield line_num, None, f"invalid JSON: {e}"
+                continue
+            if not isinstance(row, dict):
+                yield line_num, None, "expected a JSON object"
+                continue
+            yield line_num, row, None
+    except (UnicodeDecodeError, csv.Error) as e:
+        # Unreadable from here on; rows already yielded still count
+        yield line_num + 1, None, f"unreadable input: {e}"
+
+
+def _validation_message(e: ValidationError) -> str:
+    return "; ".join(f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" for err in e.errors())
+
+
+def _flush(db: Session, kind: str, model, batch: list[dict]):
+    """Insert one batch with a single executemany and fold it into the rollups, in one transaction."""
+    # Core inserts skip the ORM flush hooks, so stamp the sync sequence, bump the affected versions
+    # and log the change here
+    seq = sync.next_seq(db)
+    for row in batch:
+        row["change_seq"] = seq
+    db.execute(insert(model), batch)
+    rollups.add_many(db, kind, batch)
+    vehicle_ids = sorted({row["vehicle_id"] for row in batch})
+    versions.bump(db, [versions.vehicle_scope(vid) for vid in vehicle_ids] + [versions.GARAGE])
+    events.record(db, [
+        {"entity": events.ENTITIES[model], "entity_id": None, "vehicle_id": vid, "action": "imported"} for vid in vehicle_ids
+    ])
+    db.commit()
+
+
+def import_rows(kind: str, src: IO[bytes], fmt: str, vehicle_id: int | None = None) -> dict:
+    """Validate and insert rows from src in chunked transactions.
+
+    vehicle_id fills rows that don't carry their own. Invalid rows are reported, not fatal:
+    every valid row is inserted.
+    """
+    model, schema, _ = KINDS[kind]
+    db = SessionLocal()
+    try:
+        vehicle_ids = {vid for (vid,) in db.execute(select(Vehicle.id))}
+        db.rollback()
+        if vehicle_id is not None and vehicle_id not in vehicle_ids:
+            raise HTTPException(status_code=404, detail="Vehicle not found")
+        inserted = 0
+        error_count = 0
+        errors: list[dict] = []
+        batch: list[dict] = []
+
+        def fail(line: int, message: str):
+            nonlocal error_count
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": line, "error": message})
+
+        for line, row, problem in _read_rows(src, fmt):
+            if problem:
+                fail(line, problem)
+                continue
+            row.pop("id", None)
+            row.pop("created_at", None)
+            if vehicle_id is not None and row.get("vehicle_id") in (None, ""):
+                row["vehicle_id"] = vehicle_id
+            try:
+                record = schema.model_validate(row).model_dump()
+            except ValidationError as e:
+                fail(line, _validation_message(e))
+                continue
+            if record["vehicle_id"] not in vehicle_ids:
+                fail(line, f"vehicle_id: vehicle {record['vehicle_id']} not found")
+                continue
+            batch.append(record)
+            if len(batch) >= IMPORT_BATCH_SIZE:
+                _flush(db, kind, model, batch)
+                inserted += len(batch)
+                batch = []
+        if batch:
+            _flush(db, kind, model, batch)
+            inserted += len(batch)
+        return {"inserted": inserted, "error_count": error_count, "errors": errors}
+    finally:
+        db.close()
+
+
+def _cell(value):
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    return value
+
+
+def export_rows(kind: str, fmt: str, vehicle_id: int | None = None) -> Iterator[bytes]:
+    """Stream every record of one kind (optionally one vehicle's) without materialising the result."""
+    model, _, columns = KINDS[kind]
+    db = ReadSessionLocal()
+    try:
+        stmt = select(*(getattr(model, c) for c in columns)).order_by(model.vehicle_id, model.date, model.id)
+        if vehicle_id is not None:
+            stmt = stmt.filter(model.vehicle_id == vehicle_id)
+        result = db.execute(stmt.execution_options(yield_per=EXPORT_BATCH_SIZE))
+        buf = io.StringIO()
+        writer = csv.writer(buf)
+        if fmt == "csv":
+            writer.writerow(columns)
+        for rows in result.partitions():
+            for row in rows:
+                if fmt == "csv":
+                    writer.writerow([_cell(v) for v in row])
+                else:
+                    buf.write(json.dumps(dict(zip(columns, map(_cell, row)))))
+                    buf.write("\n")
+            yield buf.getvalue().encode()
+            buf.seek(0)
+            buf.truncate()
+        if fmt == "csv" and buf.tell():
+            yield buf.getvalue().encode()
+    finally:
+        db.close()
@@ -0,0 +1,191 @@
+import hashlib
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import HTTPException, UploadFile
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from .config import settings
+
+CHUNK_SIZE = 256 * 1024
+
+IMAGE_TYPES = {
+    "image/jpeg": ".jpg",
+    "image/png": ".png",
+    "image/gif": ".gif",
+    "image/webp": ".webp",
+}
+DOCUMENT_TYPES = {**IMAGE_TYPES, "application/pdf": ".pdf"}
+
+# Content-addressed layout: blobs/<first 2 hex>/<sha256><ext>, so identical files are stored once
+BLOB_DIR = "blobs"
+
+# Routes whose bodies are file uploads; checked against max_upload_bytes before the body is read
+UPLOAD_PATH_SUFFIXES = ("/photo", "/receipt")
+MULTIPART_OVERHEAD = 16 * 1024
+
+
+def sniff_content_type(head: bytes) -> str | None:
+    """Detect the file type from its leading magic bytes."""
+    if head.startswith(b"\xff\xd8\xff"):
+        return "image/jpeg"
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "image/png"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return "image/gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return "image/webp"
+    if head.startswith(b"%PDF-"):
+        return "application/pdf"
+    return None
+
+
+def ensure_dirs():
+    """Create the upload store. Safe to run from every worker at once."""
+    (settings.upload_dir / BLOB_DIR).mkdir(parents=True, exist_ok=True)
+
+
+def _too_large() -> HTTPException:
+    limit_mb = round(settings.max_upload_bytes / (1024 * 1024), 1)
+    return HTTPException(status_code=413, detail=f"File exceeds the {limit_mb:g} MB upload limit")
+
+
+def _stream_to_store(src, allowed: dict[str, str], type_error: str) -> str:
+    """Copy src into the blob store in chunks, hashing as it goes. Returns the path relative to upload_dir."""
+    src.seek(0)
+    head = src.read(CHUNK_SIZE)
+    content_type = sniff_content_type(head)
+    if content_type not in allowed:
+        raise HTTPException(status_code=400, detail=type_error)
+    root = settings.upload_dir / BLOB_DIR
+    root.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=root, prefix=".upload-", suffix=".part")
+    try:
+        digest = hashlib.sha256()
+        with os.fdopen(fd, "wb") as out:
+            size = 0
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > settings.max_upload_bytes:
+                    raise _too_large()
+                digest.update(chunk)
+                out.write(chunk)
+                chunk = src.read(CHUNK_SIZE)
+        h = digest.hexdigest()
+        rel = f"{BLOB_DIR}/{h[:2]}/{h}{allowed[content_type]}"
+        dest = settings.upload_dir / rel
+        if dest.exists():
+            Path(tmp).unlink()
+            os.utime(dest)  # fresh mtime keeps a just-re-referenced blob out of the GC grace window
+        else:
+            dest.parent.mkdir(exist_ok=True)
+            os.replace(tmp, dest)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+    return rel
+
+
+async def save_upload(file: UploadFile, allowed: dict[str, str], type_error: str) -> str:
+    """Store an upload in the blob store off the event loop. Returns the path relative to upload_dir."""
+    if file.size is not None and file.size > settings.max_upload_bytes:
+        raise _too_large()
+    return await run_in_threadpool(_stream_to_store, file.file, allowed, type_error)
+
+
+def referenced_paths(db) -> set[str]:
+    """Every upload path still referenced by a vehicle photo, photo variant or receipt."""
+    from .models import Maintenance, Vehicle
+    refs = set()
+    for photo_path, variants in db.query(Vehicle.photo_path, Vehicle.photo_variants).yield_per(1000):
+        if photo_path:
+            refs.add(photo_path)
+        refs.update((variants or {}).values())
+    for (receipt_path,) in db.query(Maintenance.receipt_path).filter(Maintenance.receipt_path.isnot(None)).yield_per(1000):
+        refs.add(receipt_path)
+    return refs
+
+
+def collect_garbage(db, grace_seconds: int = 3600, dry_run: bool = False) -> tuple[int, int]:
+    """Delete files under upload_dir that nothing references. Returns (files, bytes) reclaimed.
+
+    Files younger than grace_seconds are kept, so uploads written but not yet committed survive.
+    """
+    refs = referenced_paths(db)
+    cutoff = time.time() - grace_seconds
+    root = settings.upload_dir
+    files = reclaimed = 0
+    for path in root.rglob("*"):
+        if not path.is_file():
+            continue
+        if path.relative_to(root).as_posix() in refs:
+            continue
+        stat = path.stat()
+        if stat.st_mtime > cutoff:
+            continue
+        files += 1
+        reclaimed += stat.st_size
+        if not dry_run:
+            path.unlink(missing_ok=True)
+    return files, reclaimed
+
+
+def _too_large_response() -> JSONResponse:
+    exc = _too_large()
+    return JSONResponse({"detail": exc.detail}, status_code=exc.status_code)
+
+
+class UploadSizeLimitMiddleware:
+    """Reject upload requests over the limit: by Content-Length before parsing the body, else as it arrives.
+
+    A chunked body (or one whose Content-Length can't be trusted) is counted message by message. Once
+    it passes the limit the client gets a 413 at once and the app sees a disconnect; anything the
+    app tries to send after that is dropped.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if not (scope["type"] == "http" and scope["method"] == "POST" and scope["path"].endswith(UPLOAD_PATH_SUFFIXES)):
+            await self.app(scope, receive, send)
+            return
+        limit = settings.max_upload_bytes + MULTIPART_OVERHEAD
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                if value.isdigit() and int(value) > limit:
+                    await _too_large_response()(scope, receive, send)
+                    return
+                break
+
+        received = 0
+        started = exceeded = replied = False
+
+        async def counted_receive():
+            nonlocal received, exceeded, replied
+            if exceeded:
+                return {"type": "http.disconnect"}
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    if not started:
+                        replied = True
+                        await _too_large_response()(scope, receive, send)
+                    return {"type": "http.disconnect"}
+            return message
+
+        async def guarded_send(message):
+            nonlocal started
+            if replied:
+                return
+            if message["type"] == "http.response.start":
+                started = True
+            await send(message)
+
+        await self.app(scope, counted_receive, guarded_send)
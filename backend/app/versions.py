@@ -0,0 +1,101 @@
+"""Per-resource change counters and conditional GET (ETag / If-None-Match) for read endpoints.
+
+Every flush that touches a vehicle, maintenance record or mod bumps the counters of the scopes it
+affects, in the same transaction. Read handlers hash the counters they depend on (plus the request's
+query) into a strong ETag, so a revalidation costs one primary-key lookup instead of the real query.
+"""
+import hashlib
+
+from fastapi import Request, Response
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from .models import DataVersion, Maintenance, Mod, Vehicle
+
+VEHICLES = "vehicles"  # the vehicle list
+GARAGE = "garage"  # anything at all (dashboard)
+
+
+def vehicle_scope(vehicle_id: int) -> str:
+    """A vehicle's own row and its maintenance and mods."""
+    return f"vehicle:{vehicle_id}"
+
+
+# session.info key: scopes bumped in the open transaction, for after-commit hooks (app.response_cache)
+CHANGED_SCOPES = "changed_scopes"
+
+
+def bump(db: Session, scopes):
+    db.info.setdefault(CHANGED_SCOPES, set()).update(scopes)
+    for scope in sorted(set(scopes)):
+        updated = db.execute(
+            DataVersion.__table__.update()
+            .where(DataVersion.scope == scope)
+            .values(version=DataVersion.version + 1)
+        ).rowcount
+        if not updated:
+            db.execute(DataVersion.__table__.insert().values(scope=scope, version=1))
+
+
+def scopes_for(obj) -> list[str]:
+    if isinstance(obj, Vehicle):
+        return [VEHICLES, vehicle_scope(obj.id), GARAGE]
+    if isinstance(obj, (Maintenance, Mod)):
+        return [vehicle_scope(obj.vehicle_id), GARAGE]
+    return []
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_changed(session: Session, flush_context):
+    scopes = []
+    for obj in session.new:
+        scopes += scopes_for(obj)
+    for obj in session.deleted:
+        scopes += scopes_for(obj)
+    for obj in session.dirty:
+        if session.is_modified(obj, include_collections=False):
+            scopes += scopes_for(obj)
+    if scopes:
+        bump(session, scopes)
+
+
+def current_etag(db: Session, scopes: list[str], *variant) -> str:
+    """Strong ETag for a representation built from these scopes; variant covers query params etc."""
+    rows = dict(db.execute(select(DataVersion.scope, DataVersion.version).where(DataVersion.scope.in_(scopes))).all())
+    # Hand the connection back: a 304 or a cache hit needs nothing more, and a request waiting on a
+    # coalesced computation mustn't pin a pooled connection meanwhile
+    db.rollback()
+    raw = repr([(s, rows.get(s, 0)) for s in scopes] + list(variant))
+    return '"' + hashlib.sha256(raw.encode()).hexdigest()[:32] + '"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so a W/ prefix (added by some proxies) still matches
+    return etag in (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+
+
+async def request_etag(db, request: Request, scopes: list[str], *variant) -> str:
+    return await db.run_sync(current_etag, scopes, request.url.path, str(request.query_params), *variant)
+
+
+def cache_headers(etag: str) -> dict:
+    return {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+
+def not_modified(request: Request, etag: str) -> Response | None:
+    if _matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=cache_headers(etag))
+    return None
+
+
+async def conditional(db, request: Request, response: Response, scopes: list[str], *variant) -> Response | None:
+    """Return a 304 if the client's copy is current; otherwise tag the response and return None."""
+    etag = await request_etag(db, request, scopes, *variant)
+    if (cached := not_modified(request, etag)) is not None:
+        return cached
+    response.headers.update(cache_headers(etag))
+    return None
@@ -0,0 +1,131 @@
+"""Concurrent-request throughput with the threadpool (sync) and aiosqlite (async) database stacks.
+
+    cd backend
+    pip install httpx
+    python bench/async_vs_sync.py --concurrency 64 --requests 4000
+
+Starts uvicorn twice on a scratch database, once with GARAGE_DB_ASYNC=false and once with true,
+and drives the same read/write mix against each.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+async def _wait_ready(client: httpx.AsyncClient):
+    for _ in range(100):
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def drive(base_url: str, concurrency: int, total: int, write_ratio: float) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await _wait_ready(client)
+        r = await client.post("/api/auth/login", json={"username": "admin", "password": "admin"})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        v = (await client.post("/api/vehicles", json={"make": "Bench", "model": "Car", "year": 2020}, headers=headers)).json()
+        maintenance_url = f"/api/vehicles/{v['id']}/maintenance"
+        for i in range(200):
+            await client.post(maintenance_url, json={"type": "Oil", "date": "2024-01-01", "cost": i}, headers=headers)
+
+        write_every = int(1 / write_ratio) if write_ratio else 0
+        queue: asyncio.Queue[int] = asyncio.Queue()
+        for i in range(total):
+            queue.put_nowait(i)
+        latencies: list[float] = []
+        errors = 0
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                i = queue.get_nowait()
+                t0 = time.perf_counter()
+                try:
+                    if write_every and i % write_every == 0:
+                        resp = await client.post(maintenance_url, json={"type": "Oil", "date": "2024-02-01", "cost": 1}, headers=headers)
+                    elif i % 2:
+                        resp = await client.get(maintenance_url, params={"limit": 50}, headers=headers)
+                    else:
+                        resp = await client.get("/api/dashboard/stats", params={"year": 2024}, headers=headers)
+                except httpx.TransportError:
+                    errors += 1
+                    continue
+                latencies.append(time.perf_counter() - t0)
+                if resp.status_code >= 400:
+                    errors += 1
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "rps": total / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+        "errors": errors,
+    }
+
+
+def run(db_async: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            GARAGE_DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+            GARAGE_UPLOAD_DIR=f"{tmp}/uploads",
+            GARAGE_USERNAME="admin",
+            GARAGE_PASSWORD="admin",
+            GARAGE_DB_ASYNC=str(db_async).lower(),
+            # Measure capacity, not load shedding (bench/overload.py covers that)
+            GARAGE_ADMISSION_CONTROL="false",
+        )
+        server = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning", "--timeout-keep-alive", "60"],
+            cwd=BACKEND,
+            env=env,
+        )
+        try:
+            return asyncio.run(drive(f"http://127.0.0.1:{args.port}", args.concurrency, args.requests, args.write_ratio))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="fraction of requests that insert a record")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    print(f"{'stack':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for db_async in (False, True):
+        r = run(db_async, args)
+        name = "async" if db_async else "sync"
+        print(f"{name:<6} {r['rps']:>8.0f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
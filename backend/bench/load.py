@@ -0,0 +1,363 @@
+"""Load-test every router against a seeded garage and record latency, throughput and memory.
+
+    cd backend
+    pip install httpx
+    python bench/load.py --vehicles 20 --maintenance 200 --concurrency 16 --requests 300 --output base.json
+    # ...change something, then
+    python bench/load.py --vehicles 20 --maintenance 200 --concurrency 16 --requests 300 --compare base.json
+
+Seeds a scratch database with seed.py, starts run.py --prod on it, and runs each scenario (one
+endpoint each) for --requests requests at --concurrency. Writes per-scenario p50/p95/p99 latency
+and req/s, plus the server's peak RSS, as JSON tagged with the git commit. --compare prints the
+change against an earlier result file. With --max-regression it also exits non-zero on a
+slowdown.
+"""
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timezone
+from pathlib import Path
+
+import httpx
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def _percentile(values: list[float], pct: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct))]
+
+
+def _png(i: int) -> bytes:
+    from PIL import Image
+    img = Image.new("RGB", (800, 600), ((i * 37) % 256, (i * 91) % 256, (i * 53) % 256))
+    out = io.BytesIO()
+    img.save(out, "PNG")
+    return out.getvalue()
+
+
+_IMPORT_CSV = "date,type,cost,mileage,shop_name,notes\n" + "".join(
+    f"2024-0{m % 9 + 1}-15,Bench import,{m * 10},{m * 1000},Bench shop,row {m}\n" for m in range(10)
+)
+
+
+class Context:
+    """Ids the scenarios work on; filled by setup() and by earlier scenarios."""
+
+    def __init__(self, headers: dict, vehicle_ids: list[int], maintenance_id: int):
+        self.headers = headers
+        self.vehicle_ids = vehicle_ids
+        self.maintenance_id = maintenance_id
+        self.created: list[int] = []
+        self.images = [_png(i) for i in range(16)]
+
+    def vehicle(self, i: int) -> int:
+        return self.vehicle_ids[i % len(self.vehicle_ids)]
+
+
+def _create_vehicle(client, i, ctx):
+    return client.post("/api/vehicles", json={"make": "Bench", "model": f"Load {i}", "year": 2020}, headers=ctx.headers)
+
+
+# name -> request(client, i, ctx); run in this order, so later scenarios can use what earlier ones made
+SCENARIOS = {
+    "auth_login": lambda c, i, ctx: c.post("/api/auth/login", json={"username": "admin", "password": "admin"}),
+    "auth_me": lambda c, i, ctx: c.get("/api/auth/me", headers=ctx.headers),
+    "vehicles_list": lambda c, i, ctx: c.get("/api/vehicles", headers=ctx.headers),
+    "vehicle_get": lambda c, i, ctx: c.get(f"/api/vehicles/{ctx.vehicle(i)}", headers=ctx.headers),
+    "vehicle_full": lambda c, i, ctx: c.get(f"/api/vehicles/{ctx.vehicle(i)}/full", headers=ctx.headers),
+    "vehicle_create": _create_vehicle,
+    "vehicle_update": lambda c, i, ctx: c.patch(
+        f"/api/vehicles/{ctx.created[i % len(ctx.created)]}", json={"current_mileage": 1000 + i}, headers=ctx.headers
+    ),
+    "maintenance_list": lambda c, i, ctx: c.get(
+        f"/api/vehicles/{ctx.vehicle(i)}/maintenance", params={"limit": 50}, headers=ctx.headers
+    ),
+    "maintenance_create": lambda c, i, ctx: c.post(
+        f"/api/vehicles/{ctx.vehicle(i)}/maintenance",
+        json={"type": "Oil change", "date": date.today().isoformat(), "cost": 49.99, "mileage": 1000 + i},
+        headers=ctx.headers,
+    ),
+    "mods_list": lambda c, i, ctx: c.get(f"/api/vehicles/{ctx.vehicle(i)}/mods", params={"limit": 50}, headers=ctx.headers),
+    "mod_create": lambda c, i, ctx: c.post(
+        f"/api/vehicles/{ctx.vehicle(i)}/mods",
+        json={"name": "Bench part", "date": date.today().isoformat(), "cost": 199.0},
+        headers=ctx.headers,
+    ),
+    "dashboard_stats": lambda c, i, ctx: c.get("/api/dashboard/stats", headers=ctx.headers),
+    "dashboard_all_time": lambda c, i, ctx: c.get("/api/dashboard/stats", params={"all_time": True}, headers=ctx.headers),
+    "search": lambda c, i, ctx: c.get(
+        "/api/search", params={"q": ["oil", "brake pads", "coilovers", "dealer", "tune"][i % 5]}, headers=ctx.headers
+    ),
+    "export_maintenance": lambda c, i, ctx: c.get(
+        "/api/export/maintenance", params={"vehicle_id": ctx.vehicle(i)}, headers=ctx.headers
+    ),
+    "import_maintenance": lambda c, i, ctx: c.post(
+        "/api/import/maintenance",
+        params={"vehicle_id": ctx.vehicle(i)},
+        files={"file": ("bench.csv", _IMPORT_CSV, "text/csv")},
+        headers=ctx.headers,
+    ),
+    "photo_upload": lambda c, i, ctx: c.post(
+        f"/api/vehicles/{ctx.created[i % len(ctx.created)]}/photo",
+        files={"file": ("car.png", ctx.images[i % len(ctx.images)], "image/png")},
+        headers=ctx.headers,
+    ),
+    "receipt_upload": lambda c, i, ctx: c.post(
+        f"/api/vehicles/{ctx.vehicle_ids[0]}/maintenance/{ctx.maintenance_id}/receipt",
+        files={"file": ("receipt.pdf", b"%PDF-1.4 bench receipt " + str(i).encode(), "application/pdf")},
+        headers=ctx.headers,
+    ),
+    "metrics": lambda c, i, ctx: c.get("/api/metrics", headers=ctx.headers),
+    "vehicle_delete": lambda c, i, ctx: c.delete(f"/api/vehicles/{ctx.created.pop()}", headers=ctx.headers),
+}
+# Scenarios that act on vehicles made by vehicle_create; how many each needs for n requests
+NEEDS_CREATED = {"vehicle_update": lambda n: 1, "photo_upload": lambda n: 1, "vehicle_delete": lambda n: n}
+
+
+async def wait_ready(client: httpx.AsyncClient, server: subprocess.Popen):
+    for _ in range(300):
+        if server.poll() is not None:
+            raise RuntimeError("server exited during startup")
+        try:
+            if (await client.get("/api/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("server did not start")
+
+
+async def setup(client: httpx.AsyncClient) -> Context:
+    r = await client.post("/api/auth/login", json={"username": "admin", "password": "admin"})
+    r.raise_for_status()
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    vehicle_ids = [v["id"] for v in (await client.get("/api/vehicles", headers=headers)).json()]
+    if not vehicle_ids:
+        raise RuntimeError("seeded garage is empty: use --vehicles 1 or more")
+    records = (await client.get(f"/api/vehicles/{vehicle_ids[0]}/maintenance", params={"limit": 1}, headers=headers)).json()
+    if not records:
+        raise RuntimeError("seeded garage has no maintenance: use --maintenance 1 or more")
+    return Context(headers, vehicle_ids, records[0]["id"])
+
+
+async def _run_scenario(client: httpx.AsyncClient, request, ctx: Context, total: int, concurrency: int) -> dict:
+    latencies: list[float] = []
+    errors = 0
+    statuses: dict[int, int] = {}
+    next_i = 0
+
+    async def worker():
+        nonlocal errors, next_i
+        while next_i < total:
+            i = next_i
+            next_i += 1
+            t0 = time.perf_counter()
+            try:
+                resp = await request(client, i, ctx)
+            except httpx.TransportError:
+                errors += 1
+                continue
+            latencies.append(time.perf_counter() - t0)
+            statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+            if resp.status_code >= 400:
+                errors += 1
+            elif resp.request.method == "POST" and resp.request.url.path == "/api/vehicles":
+                ctx.created.append(resp.json()["id"])
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    if not latencies:
+        return {"requests": total, "errors": errors, "statuses": statuses}
+    return {
+        "requests": total,
+        "errors": errors,
+        "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        "rps": round(total / elapsed, 1),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 0.95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 0.99) * 1000, 2),
+    }
+
+
+def _process_tree(root: int) -> list[int]:
+    """root and its descendants, from /proc (Linux)."""
+    parents: dict[int, list[int]] = {}
+    for entry in Path("/proc").iterdir():
+        if entry.name.isdigit():
+            try:
+                ppid = int((entry / "stat").read_text().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            parents.setdefault(ppid, []).append(int(entry.name))
+    tree, stack = [], [root]
+    while stack:
+        pid = stack.pop()
+        tree.append(pid)
+        stack += parents.get(pid, [])
+    return tree
+
+
+def _memory_mb(root: int) -> dict | None:
+    """Peak (VmHWM) and current (VmRSS) resident memory summed over the server's processes."""
+    if not Path("/proc/self/status").exists():
+        return None
+    totals = {"VmHWM": 0, "VmRSS": 0}
+    for pid in _process_tree(root):
+        try:
+            for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+                key, _, value = line.partition(":")
+                if key in totals:
+                    totals[key] += int(value.split()[0])
+        except OSError:
+            continue
+    return {"peak_rss_mb": round(totals["VmHWM"] / 1024, 1), "rss_mb": round(totals["VmRSS"] / 1024, 1)}
+
+
+async def _drive(base_url: str, server: subprocess.Popen, scenarios: list[str], args) -> dict:
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        await wait_ready(client, server)
+        ctx = await setup(client)
+        results = {}
+        for name in scenarios:
+            if name in NEEDS_CREATED:
+                for i in range(NEEDS_CREATED[name](args.warmup + args.requests) - len(ctx.created)):
+                    ctx.created.append((await _create_vehicle(client, i, ctx)).json()["id"])
+            if args.warmup:
+                await _run_scenario(client, SCENARIOS[name], ctx, args.warmup, args.concurrency)
+            results[name] = await _run_scenario(client, SCENARIOS[name], ctx, args.requests, args.concurrency)
+            r = results[name]
+            print(f"{name:<20} {r.get('rps', 0):>8.1f} {r.get('p50_ms', 0):>9.1f} {r.get('p95_ms', 0):>9.1f} "
+                  f"{r.get('p99_ms', 0):>9.1f} {r['errors']:>7}", flush=True)
+        return results
+
+
+def _git_commit() -> dict:
+    def git(*cmd):
+        return subprocess.run(["git", *cmd], cwd=BACKEND, capture_output=True, text=True).stdout.strip()
+    return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain", "--", "."))}
+
+
+def run(args) -> dict:
+    scenarios = args.scenarios or list(SCENARIOS)
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        raise SystemExit(f"unknown scenarios: {', '.join(sorted(unknown))}")
+    scenarios = [name for name in SCENARIOS if name in scenarios]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            GARAGE_DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+            GARAGE_UPLOAD_DIR=f"{tmp}/uploads",
+            GARAGE_USERNAME="admin",
+            GARAGE_PASSWORD="admin",
+            GARAGE_DB_ASYNC=str(args.db_async).lower(),
+            GARAGE_SERVER_KEEP_ALIVE_SECONDS="60",
+            GARAGE_METRICS_TOKEN="",
+            # Every request comes from one IP and user; measure the login path, not the throttle
+            GARAGE_LOGIN_ATTEMPTS_PER_IP="0",
+            GARAGE_LOGIN_ATTEMPTS_PER_USERNAME="0",
+            # Measure capacity, not load shedding (bench/overload.py covers that)
+            GARAGE_ADMISSION_CONTROL="false",
+        )
+        subprocess.run(
+            [sys.executable, "bench/seed.py", "--vehicles", str(args.vehicles), "--maintenance", str(args.maintenance),
+             "--mods", str(args.mods), "--seed", str(args.seed)],
+            cwd=BACKEND, env=env, check=True,
+        )
+        server = subprocess.Popen(
+            [sys.executable, "run.py", "--prod", "--workers", str(args.workers), "--port", str(args.port)],
+            cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=None if args.server_logs else subprocess.DEVNULL,
+        )
+        print(f"{'scenario':<20} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}")
+        try:
+            results = asyncio.run(_drive(f"http://127.0.0.1:{args.port}", server, scenarios, args))
+            memory = _memory_mb(server.pid)
+        finally:
+            server.terminate()
+            server.wait()
+
+    return {
+        "meta": {
+            **_git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "config": {k: getattr(args, k) for k in (
+                "vehicles", "maintenance", "mods", "seed", "concurrency", "requests", "warmup", "workers", "db_async",
+            )},
+        },
+        "server": memory,
+        "scenarios": results,
+    }
+
+
+def compare(current: dict, baseline: dict, max_regression: float | None) -> bool:
+    """Print per-scenario changes against baseline. Returns False if a p95 or req/s regressed past the limit."""
+    print(f"\nvs {baseline['meta'].get('commit')} ({baseline['meta'].get('timestamp')})")
+    if baseline["meta"].get("config") != current["meta"]["config"]:
+        print("warning: run configuration differs from the baseline's")
+    print(f"{'scenario':<20} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    ok = True
+    for name, r in current["scenarios"].items():
+        base = baseline["scenarios"].get(name)
+        if not base or "rps" not in base or "rps" not in r:
+            continue
+        change = {k: (r[k] - base[k]) / base[k] * 100 if base[k] else 0.0 for k in ("rps", "p50_ms", "p95_ms", "p99_ms")}
+        slower = max(change["p95_ms"], -change["rps"])
+        flag = ""
+        if max_regression is not None and slower > max_regression:
+            ok = False
+            flag = "  REGRESSION"
+        print(f"{name:<20} {change['rps']:>+8.1f}% {change['p50_ms']:>+8.1f}% {change['p95_ms']:>+8.1f}% "
+              f"{change['p99_ms']:>+8.1f}%{flag}")
+    base_mem, mem = baseline.get("server"), current.get("server")
+    if base_mem and mem and base_mem["peak_rss_mb"]:
+        print(f"{'peak RSS':<20} {(mem['peak_rss_mb'] - base_mem['peak_rss_mb']) / base_mem['peak_rss_mb'] * 100:>+8.1f}%")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=20)
+    parser.add_argument("--maintenance", type=int, default=100, help="seeded records per vehicle")
+    parser.add_argument("--mods", type=int, default=20, help="seeded mods per vehicle")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario")
+    parser.add_argument("--warmup", type=int, default=10, help="unmeasured requests before each scenario")
+    parser.add_argument("--scenarios", nargs="+", metavar="NAME", help=f"subset of: {' '.join(SCENARIOS)}")
+    parser.add_argument("--workers", type=int, default=1, help="server worker processes")
+    parser.add_argument("--db-async", action="store_true", help="serve with GARAGE_DB_ASYNC=true")
+    parser.add_argument("--port", type=int, default=8767)
+    parser.add_argument("--output", type=Path, help="write results JSON here")
+    parser.add_argument("--compare", type=Path, help="earlier results JSON to compare against")
+    parser.add_argument("--max-regression", type=float, help="with --compare: exit 1 if p95 or req/s worsens by more than this %%")
+    parser.add_argument("--server-logs", action="store_true", help="show the server's stderr")
+    args = parser.parse_args()
+
+    result = run(args)
+    if result["server"]:
+        print(f"server peak RSS {result['server']['peak_rss_mb']} MB (current {result['server']['rss_mb']} MB)")
+    if args.output:
+        args.output.write_text(json.dumps(result, indent=2) + "\n")
+        print(f"wrote {args.output}")
+    if args.compare and not compare(result, json.loads(args.compare.read_text()), args.max_regression):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
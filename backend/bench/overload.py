@@ -0,0 +1,114 @@
+"""Latency of cheap requests while heavy ones flood the server, with and without admission control.
+
+    cd backend
+    pip install httpx
+    python bench/overload.py --flood 48 --probes 4 --seconds 20
+
+Seeds a scratch garage and starts run.py --prod on it twice, with GARAGE_ADMISSION_CONTROL off
+and then on. Each run starts --flood clients looping over dashboard aggregation, export, import
+and record creation. Meanwhile --probes clients repeatedly request a vehicle and /api/health.
+It prints latency and status counts for both groups. With admission control, the flood is
+expected to see some 503s while the probes stay fast.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+from load import BACKEND, SCENARIOS, _percentile, setup, wait_ready
+
+FLOOD = ["dashboard_all_time", "export_maintenance", "import_maintenance", "maintenance_create"]
+PROBES = {
+    "vehicle_get": SCENARIOS["vehicle_get"],
+    "health": lambda c, i, ctx: c.get("/api/health"),
+}
+
+
+async def _loop(client, requests: dict, ctx, until: float, samples: dict, offset: int):
+    i = offset
+    while time.perf_counter() < until:
+        name = list(requests)[i % len(requests)]
+        t0 = time.perf_counter()
+        try:
+            resp = await requests[name](client, i, ctx)
+            status = resp.status_code
+        except httpx.TransportError:
+            resp, status = None, "error"
+        latencies, statuses = samples.setdefault(name, ([], {}))
+        latencies.append(time.perf_counter() - t0)
+        statuses[status] = statuses.get(status, 0) + 1
+        i += 1
+        if resp is not None and status == 503:
+            # Back off as asked, like a well-behaved client
+            await asyncio.sleep(float(resp.headers.get("retry-after", 1)))
+
+
+async def _drive(base_url: str, server: subprocess.Popen, args) -> dict:
+    limits = httpx.Limits(max_connections=args.flood + args.probes)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        await wait_ready(client, server)
+        ctx = await setup(client)
+        flood: dict = {}
+        probes: dict = {}
+        until = time.perf_counter() + args.seconds
+        await asyncio.gather(
+            *(_loop(client, {n: SCENARIOS[n] for n in FLOOD}, ctx, until, flood, i) for i in range(args.flood)),
+            *(_loop(client, PROBES, ctx, until, probes, i) for i in range(args.probes)),
+        )
+        return {"flood": flood, "probes": probes}
+
+
+def run(admission: bool, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            GARAGE_DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+            GARAGE_UPLOAD_DIR=f"{tmp}/uploads",
+            GARAGE_USERNAME="admin",
+            GARAGE_PASSWORD="admin",
+            GARAGE_SERVER_KEEP_ALIVE_SECONDS="60",
+            GARAGE_ADMISSION_CONTROL=str(admission).lower(),
+        )
+        subprocess.run(
+            [sys.executable, "bench/seed.py", "--vehicles", str(args.vehicles), "--maintenance", str(args.maintenance)],
+            cwd=BACKEND, env=env, check=True, stdout=subprocess.DEVNULL,
+        )
+        server = subprocess.Popen(
+            [sys.executable, "run.py", "--prod", "--workers", str(args.workers), "--port", str(args.port)],
+            cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            return asyncio.run(_drive(f"http://127.0.0.1:{args.port}", server, args))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--flood", type=int, default=48, help="clients sending heavy requests")
+    parser.add_argument("--probes", type=int, default=4, help="clients sending cheap requests")
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--vehicles", type=int, default=20)
+    parser.add_argument("--maintenance", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8767)
+    args = parser.parse_args()
+
+    print(f"{'admission':<10} {'request':<20} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}  statuses")
+    for admission in (False, True):
+        result = run(admission, args)
+        for group in ("probes", "flood"):
+            for name, (latencies, statuses) in result[group].items():
+                print(f"{'on' if admission else 'off':<10} {name:<20} {len(latencies):>6} "
+                      f"{_percentile(latencies, 0.5) * 1000:>9.1f} {_percentile(latencies, 0.95) * 1000:>9.1f} "
+                      f"{_percentile(latencies, 0.99) * 1000:>9.1f}  {dict(sorted(statuses.items(), key=str))}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""Fill a database with a synthetic garage: N vehicles, each with M maintenance records and K mods.
+
+    cd backend
+    GARAGE_DATABASE_URL=sqlite:///./bench.db python bench/seed.py --vehicles 50 --maintenance 200 --mods 40
+
+The same --seed always produces the same garage (dates relative to today), so benchmark runs are comparable.
+"""
+import argparse
+import random
+import sys
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import migrations, rollups, versions  # noqa: E402
+from app.database import SessionLocal  # noqa: E402
+from app.models import Maintenance, Mod, Vehicle  # noqa: E402
+
+MAKES = {
+    "Toyota": ["Corolla", "Camry", "Tacoma", "4Runner"],
+    "Honda": ["Civic", "Accord", "CR-V"],
+    "Ford": ["F-150", "Mustang", "Bronco"],
+    "Subaru": ["WRX", "Outback", "Forester"],
+    "Mazda": ["MX-5", "3", "CX-5"],
+}
+SERVICES = ["Oil change", "Tire rotation", "Brake pads", "Coolant flush", "Transmission fluid",
+            "Air filter", "Spark plugs", "Alignment", "Battery", "Inspection"]
+SHOPS = ["Dealer", "Jiffy Lube", "Corner Garage", "Discount Tire", "DIY", None]
+MODS = ["Cold air intake", "Coilovers", "Cat-back exhaust", "Short shifter", "LED headlights",
+        "Wheels", "Sway bars", "Tune", "Seats", "Roof rack"]
+PARTS = ["bolts", "gaskets", "brackets", "wiring harness", "clamps", "hoses"]
+BATCH = 1000
+
+
+def _insert(db, kind: str, model, rows: list[dict]):
+    # Same path as bulk import: one executemany, rollups folded in, versions bumped
+    for i in range(0, len(rows), BATCH):
+        batch = rows[i:i + BATCH]
+        db.execute(insert(model), batch)
+        rollups.add_many(db, kind, batch)
+        versions.bump(db, [versions.vehicle_scope(vid) for vid in {r["vehicle_id"] for r in batch}] + [versions.GARAGE])
+
+
+def seed(db, vehicles: int, maintenance: int, mods: int, seed: int = 0) -> dict:
+    """Add the synthetic garage to db and commit. Returns the row counts added."""
+    rng = random.Random(seed)
+    today = date.today()
+    cars = []
+    for i in range(vehicles):
+        make = rng.choice(list(MAKES))
+        cars.append(Vehicle(
+            nickname=f"Bench {i}" if rng.random() < 0.5 else None,
+            make=make,
+            model=rng.choice(MAKES[make]),
+            year=rng.randint(1995, today.year),
+            vin="".join(rng.choices("ABCDEFGHJKLMNPRSTUVWXYZ0123456789", k=17)),
+            license_plate=f"{rng.randint(100, 999)}-{rng.choice('ABCDEFG')}{rng.choice('HJKLMN')}{rng.choice('PRSTUV')}",
+            current_mileage=float(rng.randint(1_000, 250_000)),
+        ))
+    db.add_all(cars)
+    db.flush()
+
+    records, upgrades = [], []
+    for car in cars:
+        mileage = 0.0
+        start = today - timedelta(days=365 * 8)
+        for n in range(maintenance):
+            mileage += rng.randint(500, 5_000)
+            records.append({
+                "vehicle_id": car.id,
+                "type": rng.choice(SERVICES),
+                "date": start + timedelta(days=rng.randint(0, 365 * 8)),
+                "mileage": mileage,
+                "cost": round(rng.uniform(20, 1500), 2),
+                "shop_name": rng.choice(SHOPS),
+                "notes": f"Service {n} at {int(mileage)} mi. " + rng.choice(["All good.", "Check again soon.", "Replaced worn parts.", ""]),
+            })
+        for n in range(mods):
+            upgrades.append({
+                "vehicle_id": car.id,
+                "name": rng.choice(MODS),
+                "description": f"Mod {n}: " + rng.choice(["daily-driver friendly", "track use", "looks only", "weekend project"]),
+                "date": start + timedelta(days=rng.randint(0, 365 * 8)),
+                "cost": round(rng.uniform(50, 4000), 2),
+                "parts_list": ", ".join(rng.sample(PARTS, 3)),
+            })
+    _insert(db, "maintenance", Maintenance, records)
+    _insert(db, "mods", Mod, upgrades)
+    db.commit()
+    return {"vehicles": len(cars), "maintenance": len(records), "mods": len(upgrades)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--vehicles", type=int, default=20)
+    parser.add_argument("--maintenance", type=int, default=100, help="records per vehicle")
+    parser.add_argument("--mods", type=int, default=20, help="mods per vehicle")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    migrations.upgrade()
+    start = time.perf_counter()
+    db = SessionLocal()
+    try:
+        counts = seed(db, args.vehicles, args.maintenance, args.mods, args.seed)
+    finally:
+        db.close()
+    print(f"Seeded {counts['vehicles']} vehicles, {counts['maintenance']} maintenance records and "
+          f"{counts['mods']} mods in {time.perf_counter() - start:.1f}s")
+
+
+if __name__ == "__main__":
+    main()
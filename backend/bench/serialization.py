@@ -0,0 +1,88 @@
+"""Time the default and fast (GARAGE_FAST_SERIALIZATION) serialization paths of the list endpoints.
+
+    cd backend
+    python bench/serialization.py --rows 50 200 1000
+
+Runs in-process against a seeded scratch database with no HTTP. For each list size, it times
+the query plus serialization of a maintenance page two ways. The default path loads ORM rows and
+uses FastAPI's serialize_response() (response_model validation) plus JSONResponse rendering. The
+fast path selects columns and dumps them with app.fastjson.RowSerializer.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND = Path(__file__).resolve().parent.parent
+
+
+def _time(fn, repeat: int) -> float:
+    """Median seconds per call."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - start)
+    return statistics.median(samples)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[50, 200, 1000], help="list sizes to time")
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["GARAGE_DATABASE_URL"] = f"sqlite:///{tmp}/bench.db"
+    os.environ["GARAGE_UPLOAD_DIR"] = f"{tmp}/uploads"
+    sys.path.insert(0, str(BACKEND))
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    from app import migrations
+    from app.database import ReadSessionLocal, SessionLocal
+    from app.main import app
+    from app.routers.maintenance import _list_maintenance
+    from seed import seed
+
+    migrations.upgrade()
+    db = SessionLocal()
+    seed(db, 1, max(args.rows), 0)
+    db.close()
+    loop = asyncio.new_event_loop()
+    route = next(r for r in app.routes if getattr(r, "path", None) == "/api/vehicles/{vehicle_id}/maintenance"
+                 and "GET" in r.methods)
+
+    def default_path(limit):
+        db = ReadSessionLocal()
+        try:
+            rows, _ = _list_maintenance(db, 1, "date", "desc", None, limit)
+            content = loop.run_until_complete(
+                serialize_response(field=route.response_field, response_content=rows, is_coroutine=True)
+            )
+            return JSONResponse(content).body
+        finally:
+            db.close()
+
+    def fast_path(limit):
+        db = ReadSessionLocal()
+        try:
+            body, _ = _list_maintenance(db, 1, "date", "desc", None, limit, fast=True)
+            return body
+        finally:
+            db.close()
+
+    print(f"{'rows':>6} {'default ms':>11} {'fast ms':>9} {'speedup':>8}")
+    for n in args.rows:
+        assert default_path(n) == fast_path(n), "paths disagree"
+        default = _time(lambda: default_path(n), args.repeat)
+        fast = _time(lambda: fast_path(n), args.repeat)
+        print(f"{n:>6} {default * 1000:>11.2f} {fast * 1000:>9.2f} {default / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
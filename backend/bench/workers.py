@@ -0,0 +1,63 @@
+"""Throughput of the production server (run.py --prod) as the worker count grows.
+
+    cd backend
+    pip install httpx
+    python bench/workers.py --workers 1 2 4 --concurrency 64 --requests 4000
+
+Starts run.py --prod once per worker count on a scratch database and drives the same
+read/write mix as async_vs_sync.py against it.
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+
+from async_vs_sync import BACKEND, drive
+
+
+def run(workers: int, args) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            GARAGE_DATABASE_URL=f"sqlite:///{tmp}/bench.db",
+            GARAGE_UPLOAD_DIR=f"{tmp}/uploads",
+            GARAGE_USERNAME="admin",
+            GARAGE_PASSWORD="admin",
+            GARAGE_SERVER_KEEP_ALIVE_SECONDS="60",
+            # Measure capacity, not load shedding (bench/overload.py covers that)
+            GARAGE_ADMISSION_CONTROL="false",
+        )
+        server = subprocess.Popen(
+            [sys.executable, "run.py", "--prod", "--workers", str(workers), "--port", str(args.port)],
+            cwd=BACKEND,
+            env=env,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        try:
+            return asyncio.run(drive(f"http://127.0.0.1:{args.port}", args.concurrency, args.requests, args.write_ratio))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--requests", type=int, default=4000)
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="fraction of requests that insert a record")
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    print(f"{os.cpu_count()} CPUs")
+    print(f"{'workers':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>7}")
+    for workers in args.workers:
+        r = run(workers, args)
+        print(f"{workers:>7} {r['rps']:>8.0f} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['errors']:>7}")
+
+
+if __name__ == "__main__":
+    main()
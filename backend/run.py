@@ -1,9 +1,54 @@
+"""Start the API.
+
+    python run.py            # development: one process, reloads on code changes
+    python run.py --prod     # production: GARAGE_SERVER_WORKERS processes (default one per CPU), no reloader
+"""
+import argparse
+import os
+
 import uvicorn
 
-if __name__ == "__main__":
+
+def _prepare():
+    """One-time startup work, done here so the workers boot to an up-to-date schema."""
+    from app import migrations
+    from app.database import engine, read_engine
+    from app.uploads import ensure_dirs
+
+    ensure_dirs()
+    for step in migrations.upgrade():
+        print(f"Applied migration {step}")
+    engine.dispose()
+    read_engine.dispose()
+
+
+def main():
+    from app.config import settings
+
+    parser = argparse.ArgumentParser(description="Run the ServiceSync API")
+    parser.add_argument("--prod", action="store_true", help="multi-worker production server")
+    parser.add_argument("--workers", type=int, default=settings.server_workers, help="0: one per CPU")
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    args = parser.parse_args()
+
+    if not args.prod:
+        uvicorn.run("app.main:app", host=args.host, port=args.port, reload=True)
+        return
+
+    if settings.auto_migrate:
+        _prepare()
     uvicorn.run(
         "app.main:app",
-        host="0.0.0.0",
-        port=8000,
-        reload=True,
+        host=args.host,
+        port=args.port,
+        workers=args.workers or os.cpu_count() or 1,
+        timeout_keep_alive=settings.server_keep_alive_seconds,
+        backlog=settings.server_backlog,
+        limit_concurrency=settings.server_limit_concurrency,
+        timeout_graceful_shutdown=settings.server_graceful_shutdown_seconds,
     )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,29 @@
+import atexit
+import os
+import shutil
+import tempfile
+
+import pytest
+
+# Point the app at a throwaway database before it's imported
+_tmp = tempfile.mkdtemp(prefix="garage-tests-")
+atexit.register(shutil.rmtree, _tmp, ignore_errors=True)
+os.environ["GARAGE_DATABASE_URL"] = f"sqlite:///{_tmp}/garage.db"
+os.environ["GARAGE_UPLOAD_DIR"] = f"{_tmp}/uploads"
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+from app.config import settings  # noqa: E402
+from app.main import app  # noqa: E402
+
+
+@pytest.fixture(scope="session")
+def client():
+    with TestClient(app) as c:
+        yield c
+
+
+@pytest.fixture(scope="session")
+def headers(client):
+    response = client.post("/api/auth/login", json={"username": settings.username, "password": settings.password})
+    return {"Authorization": f"Bearer {response.json()['access_token']}"}
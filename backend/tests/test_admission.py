@@ -0,0 +1,122 @@
+"""AdmissionMiddleware holds a lane slot only while the server works on a request."""
+import asyncio
+
+import pytest
+
+from app import admission
+from app.admission import AdmissionMiddleware, Lane
+
+
+@pytest.fixture
+def heavy(monkeypatch):
+    lane = Lane("heavy", limit=1, queue=0, max_wait=0.1)
+    monkeypatch.setitem(admission.lanes, "heavy", lane)
+    return lane
+
+
+def _call(app, method: str, path: str, chunks: list[bytes], headers=()):
+    """Run one request through the middleware; returns the messages sent to the client."""
+    scope = {"type": "http", "method": method, "path": path, "headers": list(headers)}
+    incoming = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1} for i, c in enumerate(chunks)]
+    sent = []
+
+    async def receive():
+        return incoming.pop(0) if incoming else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(AdmissionMiddleware(app)(scope, receive, send))
+    return sent
+
+
+def test_upload_queues_only_once_the_body_is_in(heavy):
+    active_while_reading = []
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            active_while_reading.append(heavy.active)
+            if not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"2")]})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    sent = _call(app, "POST", "/api/vehicles/1/photo", [b"a", b"b", b"c"], [(b"transfer-encoding", b"chunked")])
+    assert sent[0]["status"] == 200
+    assert active_while_reading == [0, 0, 1]
+    assert heavy.active == 0
+
+
+def test_bodyless_request_queues_before_the_app_runs(heavy):
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.append(heavy.active)
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"0")]})
+        await send({"type": "http.response.body", "body": b""})
+
+    _call(app, "GET", "/api/export/maintenance", [b""])
+    assert seen == [1]
+    assert heavy.active == 0
+
+
+def test_refused_upload_gets_503_and_the_app_a_disconnect(heavy):
+    heavy.active = heavy.limit  # another request holds the only slot
+    received = []
+
+    async def app(scope, receive, send):
+        received.append((await receive())["type"])
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"too late"})
+
+    sent = _call(app, "POST", "/api/vehicles/1/photo", [b"x"], [(b"content-length", b"1")])
+    assert received == ["http.disconnect"]
+    assert [m.get("status") for m in sent if m["type"] == "http.response.start"] == [503]
+    assert b"too late" not in b"".join(m.get("body", b"") for m in sent)
+
+
+def test_streamed_response_holds_the_slot_until_the_last_chunk(heavy):
+    active_per_message = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"text/csv")]})
+        for chunk in (b"a,b\n", b"1,2\n"):
+            active_per_message.append(heavy.active)
+            await send({"type": "http.response.body", "body": chunk, "more_body": True})
+        active_per_message.append(heavy.active)
+        await send({"type": "http.response.body", "body": b"", "more_body": False})
+        active_per_message.append(heavy.active)
+
+    _call(app, "GET", "/api/export/maintenance", [b""])
+    assert active_per_message == [1, 1, 1, 0]
+
+
+def test_response_with_length_releases_the_slot_when_it_starts(heavy):
+    active_after_start = []
+
+    async def app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": [(b"content-length", b"2")]})
+        active_after_start.append(heavy.active)
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    _call(app, "GET", "/api/export/maintenance", [b""])
+    assert active_after_start == [0]
+
+
+@pytest.mark.parametrize(
+    "method, path, lane",
+    [
+        ("GET", "/api/vehicles/1/maintenance", "read"),
+        ("GET", "/api/dashboard/stats", "aggregate"),
+        ("GET", "/api/search", "aggregate"),
+        ("GET", "/api/sync", "aggregate"),
+        ("PATCH", "/api/vehicles/1", "write"),
+        ("POST", "/api/vehicles/1/photo", "heavy"),
+        ("GET", "/api/export/maintenance", "heavy"),
+        ("GET", "/api/events", None),
+    ],
+)
+def test_lane_for(method, path, lane):
+    chosen = admission.lane_for(method, path)
+    assert (chosen.name if chosen else None) == lane
@@ -0,0 +1,26 @@
+"""Dashboard totals are summed from unrounded rollups and rounded once."""
+
+
+def test_garage_totals_are_not_sums_of_rounded_vehicle_totals(client, headers):
+    # 3 x 0.335 per vehicle shows as 1.01; 30 of them still total 30.15, not 30.30
+    for i in range(30):
+        vehicle_id = client.post(
+            "/api/vehicles", json={"make": "Honda", "model": f"Civic {i}", "year": 2001}, headers=headers
+        ).json()["id"]
+        for _ in range(3):
+            client.post(
+                f"/api/vehicles/{vehicle_id}/maintenance",
+                json={"type": "Wiper blades", "date": "2019-06-01", "cost": 0.335},
+                headers=headers,
+            )
+        client.post(
+            f"/api/vehicles/{vehicle_id}/mods",
+            json={"name": "Valve caps", "date": "2019-06-01", "cost": 10.004},
+            headers=headers,
+        )
+
+    stats = client.get("/api/dashboard/stats", params={"year": 2019}, headers=headers).json()
+    assert stats["maintenance"]["total_cost"] == 30.15
+    assert stats["maintenance"]["total_services"] == 90
+    assert stats["mods"]["total_cost"] == 300.12
+    assert {v["mods_total_cost"] for v in stats["by_vehicle"] if v["mods_count"]} == {10.0}
@@ -0,0 +1,59 @@
+"""Conditional GETs (app.versions): a child write changes its vehicle's ETags, and only those."""
+import pytest
+
+
+def _vehicle(client, headers) -> int:
+    return client.post("/api/vehicles", json={"make": "Volvo", "model": "240", "year": 1988}, headers=headers).json()["id"]
+
+
+def _revalidate(client, headers, url: str, etag: str):
+    return client.get(url, headers={**headers, "If-None-Match": etag})
+
+
+def _writes(client, headers, vehicle_id: int):
+    record = client.post(
+        f"/api/vehicles/{vehicle_id}/maintenance", json={"type": "Oil change", "date": "2024-04-01"}, headers=headers
+    ).json()
+    url = f"/api/vehicles/{vehicle_id}/maintenance/{record['id']}"
+    return {
+        "create": lambda: client.post(
+            f"/api/vehicles/{vehicle_id}/maintenance", json={"type": "Brakes", "date": "2024-04-02"}, headers=headers
+        ),
+        "update": lambda: client.patch(url, json={"cost": 120.0}, headers=headers),
+        "delete": lambda: client.delete(url, headers=headers),
+    }
+
+
+@pytest.mark.parametrize("write", ["create", "update", "delete"])
+@pytest.mark.parametrize("path", ["/maintenance", "/full", ""], ids=["maintenance-list", "full-detail", "vehicle"])
+def test_maintenance_write_turns_304_into_200(client, headers, write, path):
+    vehicle_id = _vehicle(client, headers)
+    writes = _writes(client, headers, vehicle_id)
+    url = f"/api/vehicles/{vehicle_id}{path}"
+    first = client.get(url, headers=headers)
+    etag = first.headers["ETag"]
+    assert _revalidate(client, headers, url, etag).status_code == 304
+
+    assert writes[write]().status_code < 300
+
+    after = _revalidate(client, headers, url, etag)
+    assert after.status_code == 200
+    assert after.headers["ETag"] != etag
+    if path == "/maintenance":
+        assert after.json() != first.json()
+
+
+def test_write_leaves_other_vehicles_etags_alone(client, headers):
+    mine, other = _vehicle(client, headers), _vehicle(client, headers)
+    url = f"/api/vehicles/{other}/maintenance"
+    etag = client.get(url, headers=headers).headers["ETag"]
+    _writes(client, headers, mine)["update"]()
+    assert _revalidate(client, headers, url, etag).status_code == 304
+
+
+def test_etag_varies_with_the_query(client, headers):
+    vehicle_id = _vehicle(client, headers)
+    url = f"/api/vehicles/{vehicle_id}/maintenance"
+    etag = client.get(url, headers=headers).headers["ETag"]
+    response = client.get(url, params={"sort": "cost"}, headers={**headers, "If-None-Match": etag})
+    assert response.status_code == 200
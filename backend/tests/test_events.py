@@ -0,0 +1,53 @@
+"""Resuming /api/events streams from a Last-Event-ID."""
+import asyncio
+
+from app.database import SessionLocal
+from app.events import RESET, Broadcaster, latest_id
+
+
+def _newest_event_id(client, headers, new_events: int) -> int:
+    for i in range(new_events):
+        client.post("/api/vehicles", json={"make": "Saab", "model": f"900 {i}", "year": 1991}, headers=headers)
+    return latest_id(SessionLocal())
+
+
+def _resume(tail: int, last_event_id: int) -> list[bytes]:
+    """Stream from a broadcaster whose tailer has read up to tail, until it has published the rest."""
+    async def run():
+        broadcaster = Broadcaster()
+        broadcaster.last_id = tail
+        stream = broadcaster.stream(last_event_id)
+        out = [await stream.__anext__()]  # retry: ..., sent once the client is subscribed
+        await broadcaster._poll()
+        out.append(await asyncio.wait_for(stream.__anext__(), 5))
+        await stream.aclose()
+        return out
+    return asyncio.run(run())
+
+
+def _ids(chunk: bytes) -> list[int]:
+    return [int(line[4:]) for line in chunk.decode().splitlines() if line.startswith("id: ")]
+
+
+def test_reconnect_ahead_of_this_workers_tail_resumes(client, headers):
+    # Another worker committed 3 events; the client saw the first two there, this worker's tailer none
+    newest = _newest_event_id(client, headers, 3)
+    _, chunk = _resume(tail=newest - 3, last_event_id=newest - 1)
+    assert chunk != RESET
+    assert _ids(chunk) == [newest]
+
+
+def test_reconnect_behind_the_tail_backfills(client, headers):
+    newest = _newest_event_id(client, headers, 3)
+    _, chunk = _resume(tail=newest, last_event_id=newest - 2)
+    assert _ids(chunk) == [newest - 1, newest]
+
+
+def test_reconnect_past_the_end_of_the_log_resets(client, headers):
+    newest = _newest_event_id(client, headers, 1)
+
+    async def run():
+        stream = Broadcaster().stream(newest + 1000)
+        await stream.__anext__()
+        return await stream.__anext__()
+    assert asyncio.run(run()) == RESET
@@ -0,0 +1,49 @@
+"""Query budgets for the list endpoints: the counts don't grow with the number of rows."""
+import pytest
+
+from app.testing import assert_max_queries
+
+
+def _seed_vehicle(client, headers, records: int) -> int:
+    vehicle_id = client.post(
+        "/api/vehicles", json={"make": "Mazda", "model": "MX-5", "year": 1994}, headers=headers
+    ).json()["id"]
+    for i in range(records):
+        date = f"2024-{i % 12 + 1:02d}-{i % 28 + 1:02d}"
+        client.post(
+            f"/api/vehicles/{vehicle_id}/maintenance",
+            json={"type": "Oil change", "date": date, "mileage": 1000 * i, "cost": 49.99},
+            headers=headers,
+        )
+        client.post(
+            f"/api/vehicles/{vehicle_id}/mods",
+            json={"name": f"Mod {i}", "date": date, "cost": 120.5},
+            headers=headers,
+        )
+    return vehicle_id
+
+
+@pytest.fixture(scope="module", params=[1, 40], ids=["one-record", "many-records"])
+def vehicle_id(request, client, headers):
+    return _seed_vehicle(client, headers, request.param)
+
+
+def test_list_vehicles(client, headers, vehicle_id):
+    with assert_max_queries(2):
+        response = client.get("/api/vehicles", headers=headers)
+    assert response.status_code == 200
+
+
+@pytest.mark.parametrize("params", [{}, {"sort": "cost", "order": "asc"}], ids=["default-sort", "by-cost"])
+def test_list_maintenance(client, headers, vehicle_id, params):
+    with assert_max_queries(3):
+        response = client.get(f"/api/vehicles/{vehicle_id}/maintenance", params=params, headers=headers)
+    assert response.status_code == 200
+    assert response.json()
+
+
+def test_list_mods(client, headers, vehicle_id):
+    with assert_max_queries(3):
+        response = client.get(f"/api/vehicles/{vehicle_id}/mods", headers=headers)
+    assert response.status_code == 200
+    assert response.json()
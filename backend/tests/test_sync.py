@@ -0,0 +1,105 @@
+"""Delta sync (GET /api/sync, app.sync): rows written and tombstones since a token."""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app import sync
+from app.config import settings
+from app.database import SessionLocal
+from app.models import Tombstone
+
+
+@pytest.fixture(params=[False, True], ids=["orm", "fast"])
+def fast_serialization(request, monkeypatch):
+    monkeypatch.setattr(settings, "fast_serialization", request.param)
+
+
+def _sync(client, headers, since: str | None = None) -> dict:
+    response = client.get("/api/sync", params={"since": since} if since is not None else {}, headers=headers)
+    assert response.status_code == 200
+    return response.json()
+
+
+def _ids(rows: list[dict]) -> list[int]:
+    return [row["id"] for row in rows]
+
+
+def _vehicle_with_records(client, headers) -> tuple[int, int, int]:
+    vehicle_id = client.post("/api/vehicles", json={"make": "BMW", "model": "E30", "year": 1989}, headers=headers).json()["id"]
+    maintenance_id = client.post(
+        f"/api/vehicles/{vehicle_id}/maintenance", json={"type": "Timing belt", "date": "2024-05-01"}, headers=headers
+    ).json()["id"]
+    mod_id = client.post(
+        f"/api/vehicles/{vehicle_id}/mods", json={"name": "LSD", "date": "2024-05-02"}, headers=headers
+    ).json()["id"]
+    return vehicle_id, maintenance_id, mod_id
+
+
+def test_delta_has_only_rows_written_since_the_token(client, headers, fast_serialization):
+    vehicle_id, maintenance_id, mod_id = _vehicle_with_records(client, headers)
+    token = _sync(client, headers)["token"]
+
+    client.patch(f"/api/vehicles/{vehicle_id}/mods/{mod_id}", json={"cost": 950.0}, headers=headers)
+    added = client.post(
+        f"/api/vehicles/{vehicle_id}/maintenance", json={"type": "Oil change", "date": "2024-06-01"}, headers=headers
+    ).json()["id"]
+
+    delta = _sync(client, headers, token)
+    assert delta["reset"] is False
+    assert int(delta["token"]) > int(token)
+    assert _ids(delta["vehicles"]) == []
+    assert _ids(delta["maintenance"]) == [added]
+    assert _ids(delta["mods"]) == [mod_id]
+    assert delta["mods"][0]["cost"] == 950.0
+    assert delta["deleted"] == {"vehicles": [], "maintenance": [], "mods": []}
+    assert maintenance_id not in _ids(delta["maintenance"])
+
+    caught_up = _sync(client, headers, delta["token"])
+    assert (caught_up["vehicles"], caught_up["maintenance"], caught_up["mods"]) == ([], [], [])
+
+
+def test_vehicle_delete_leaves_tombstones_for_its_records(client, headers, fast_serialization):
+    vehicle_id, maintenance_id, mod_id = _vehicle_with_records(client, headers)
+    token = _sync(client, headers)["token"]
+
+    assert client.delete(f"/api/vehicles/{vehicle_id}", headers=headers).status_code == 204
+
+    delta = _sync(client, headers, token)
+    assert delta["reset"] is False
+    assert delta["deleted"] == {"vehicles": [vehicle_id], "maintenance": [maintenance_id], "mods": [mod_id]}
+    assert (delta["vehicles"], delta["maintenance"], delta["mods"]) == ([], [], [])
+
+
+@pytest.mark.parametrize("since", ["abc", "-1", "1.5"])
+def test_malformed_token_is_400(client, headers, since):
+    assert client.get("/api/sync", params={"since": since}, headers=headers).status_code == 400
+
+
+def test_token_from_the_future_gets_a_full_reset(client, headers):
+    token = int(_sync(client, headers)["token"])
+    out = _sync(client, headers, str(token + 1000))
+    assert out["reset"] is True
+    assert out["vehicles"]
+
+
+def test_token_older_than_the_compaction_floor_gets_a_full_reset(client, headers):
+    vehicle_id, _, _ = _vehicle_with_records(client, headers)
+    old_token = _sync(client, headers)["token"]
+    survivor = _vehicle_with_records(client, headers)[0]  # before the delete, so SQLite can't reuse its id
+    client.delete(f"/api/vehicles/{vehicle_id}", headers=headers)
+
+    # Age the tombstones past the retention window and compact them away
+    db = SessionLocal()
+    try:
+        db.query(Tombstone).update({Tombstone.deleted_at: datetime.now(timezone.utc).replace(tzinfo=None) - timedelta(days=400)})
+        assert sync.compact(db, retention_days=30) > 0
+        db.commit()
+    finally:
+        db.close()
+
+    out = _sync(client, headers, old_token)
+    assert out["reset"] is True
+    assert survivor in _ids(out["vehicles"])
+    assert vehicle_id not in _ids(out["vehicles"])
+    # A token taken after compaction is a normal delta again
+    assert _sync(client, headers, out["token"])["reset"] is False
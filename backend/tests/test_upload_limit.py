@@ -0,0 +1,46 @@
+"""UploadSizeLimitMiddleware counts a body without Content-Length as it arrives."""
+import asyncio
+
+from app.config import settings
+from app.uploads import MULTIPART_OVERHEAD, UploadSizeLimitMiddleware
+
+
+def _run(chunks: list[bytes]):
+    """Drive the middleware with a chunked upload; returns (messages sent, what the app received)."""
+    scope = {"type": "http", "method": "POST", "path": "/api/vehicles/1/photo", "headers": []}
+    incoming = [{"type": "http.request", "body": c, "more_body": i < len(chunks) - 1} for i, c in enumerate(chunks)]
+    sent, seen = [], []
+
+    async def receive():
+        return incoming.pop(0) if incoming else {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    async def app(scope, receive, send):
+        while True:
+            message = await receive()
+            seen.append(message["type"])
+            if message["type"] != "http.request" or not message.get("more_body"):
+                break
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"ok"})
+
+    asyncio.run(UploadSizeLimitMiddleware(app)(scope, receive, send))
+    return sent, seen
+
+
+def test_chunked_body_over_limit_gets_413():
+    chunk = b"\0" * (256 * 1024)
+    count = (settings.max_upload_bytes + MULTIPART_OVERHEAD) // len(chunk) + 10
+    sent, seen = _run([chunk] * count)
+    assert sent[0]["status"] == 413
+    assert len(sent) == 2  # the app's own response is dropped
+    assert seen[-1] == "http.disconnect"
+    assert len(seen) < count
+
+
+def test_chunked_body_under_limit_passes_through():
+    sent, seen = _run([b"a" * 1024, b"b" * 1024])
+    assert sent[0]["status"] == 200
+    assert seen == ["http.request", "http.request"]
@@ -1,6 +1,6 @@
-const API_BASE = "/api";
+export const API_BASE = "/api";
 
-function getToken(): string | null {
+export function getToken(): string | null {
   return localStorage.getItem("garage_token");
 }
 
@@ -29,6 +29,38 @@ export async function api<T>(
   return res.json();
 }
 
+export interface Page<T> {
+  items: T[];
+  nextCursor: string | null;
+}
+
+export async function apiPage<T>(path: string): Promise<Page<T>> {
+  const token = getToken();
+  const headers: HeadersInit = {};
+  if (token) headers["Authorization"] = `Bearer ${token}`;
+
+  const res = await fetch(`${API_BASE}${path}`, { headers });
+  if (res.status === 401) {
+    localStorage.removeItem("garage_token");
+    window.location.href = "/login";
+    throw new Error("Unauthorized");
+  }
+  if (!res.ok) {
+    const err = await res.json().catch(() => ({ detail: res.statusText }));
+    throw new Error(err.detail || String(err));
+  }
+  return { items: await res.json(), nextCursor: res.headers.get("X-Next-Cursor") };
+}
+
+export function pageQuery(params: Record<string, string | number | null | undefined>): string {
+  const q = new URLSearchParams();
+  for (const [k, v] of Object.entries(params)) {
+    if (v != null && v !== "") q.set(k, String(v));
+  }
+  const s = q.toString();
+  return s ? `?${s}` : "";
+}
+
 export async function apiFormData<T>(path: string, formData: FormData): Promise<T> {
   const token = getToken();
   const headers: HeadersInit = {};
@@ -0,0 +1,100 @@
+import { API_BASE, getToken } from "./client";
+
+export interface ChangeEvent {
+  /** Position in the server's change log; increases with every committed write. */
+  version: number;
+  entity: "vehicle" | "maintenance" | "mod";
+  /** Null for "imported": a bulk import added several records to vehicle_id. */
+  id: number | null;
+  vehicle_id: number;
+  action: "created" | "updated" | "deleted" | "imported";
+}
+
+export interface ChangeHandlers {
+  onChange: (event: ChangeEvent) => void;
+  /** Changes were missed (the server's log no longer reaches back far enough): reload everything. */
+  onReset: () => void;
+}
+
+/**
+ * Follow /api/events until the returned function is called.
+ *
+ * Uses fetch rather than EventSource so the bearer token can go in a header. Reconnects with
+ * Last-Event-ID, so a dropped connection resumes without losing events.
+ */
+export function subscribeChanges({ onChange, onReset }: ChangeHandlers): () => void {
+  const controller = new AbortController();
+  let lastEventId: string | null = null;
+  let retryMs = 3000;
+
+  function dispatch(block: string) {
+    let event = "message";
+    let data = "";
+    for (const line of block.split("\n")) {
+      const colon = line.indexOf(":");
+      if (colon === 0) continue; // comment (keepalive)
+      const field = colon < 0 ? line : line.slice(0, colon);
+      const value = colon < 0 ? "" : line.slice(colon + 1).replace(/^ /, "");
+      if (field === "event") event = value;
+      else if (field === "data") data += value;
+      else if (field === "id") lastEventId = value;
+      else if (field === "retry") retryMs = Number(value) || retryMs;
+    }
+    if (event === "change") {
+      onChange(JSON.parse(data) as ChangeEvent);
+    } else if (event === "reset") {
+      lastEventId = null;
+      onReset();
+    }
+  }
+
+  async function follow() {
+    const headers: Record<string, string> = { Accept: "text/event-stream" };
+    const token = getToken();
+    if (token) headers["Authorization"] = `Bearer ${token}`;
+    if (lastEventId) headers["Last-Event-ID"] = lastEventId;
+    const res = await fetch(`${API_BASE}/events`, { headers, signal: controller.signal });
+    if (res.status === 401) {
+      controller.abort();
+      return;
+    }
+    if (!res.ok || !res.body) return;
+    const reader = res.body.pipeThrough(new TextDecoderStream()).getReader();
+    let buffer = "";
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) return;
+      buffer += value;
+      let end: number;
+      while ((end = buffer.indexOf("\n\n")) >= 0) {
+        dispatch(buffer.slice(0, end));
+        buffer = buffer.slice(end + 2);
+      }
+    }
+  }
+
+  (async () => {
+    while (!controller.signal.aborted) {
+      try {
+        await follow();
+      } catch {
+        // Connection dropped or refused; retry below
+      }
+      if (!controller.signal.aborted) await new Promise((r) => setTimeout(r, retryMs));
+    }
+  })();
+  return () => controller.abort();
+}
+
+/** list with item replacing the entry of the same id; list itself if no entry has that id. */
+export function replaceById<T extends { id: number }>(list: T[], item: T): T[] {
+  return list.some((x) => x.id === item.id) ? list.map((x) => (x.id === item.id ? item : x)) : list;
+}
+
+/**
+ * list with item replacing the entry of the same id, or added at the start if it's new.
+ * Only for complete lists the caller re-sorts; a paged list should reload instead.
+ */
+export function upsertById<T extends { id: number }>(list: T[], item: T): T[] {
+  return list.some((x) => x.id === item.id) ? list.map((x) => (x.id === item.id ? item : x)) : [item, ...list];
+}
@@ -1,4 +1,4 @@
-import { api, apiFormData } from "./client";
+import { api, apiFormData, apiPage, pageQuery, type Page } from "./client";
 
 export interface Maintenance {
   id: number;
@@ -11,6 +11,7 @@ export interface Maintenance {
   notes: string | null;
   receipt_path: string | null;
   created_at: string | null;
+  updated_at: string | null;
 }
 
 export interface MaintenanceCreate {
@@ -31,8 +32,24 @@ export interface MaintenanceUpdate {
   notes?: string | null;
 }
 
-export async function listMaintenance(vehicleId: number): Promise<Maintenance[]> {
-  return api<Maintenance[]>(`/vehicles/${vehicleId}/maintenance`);
+export type MaintenanceSort = "date" | "type" | "cost" | "mileage";
+
+export interface MaintenanceListParams {
+  sort?: MaintenanceSort;
+  order?: "asc" | "desc";
+  limit?: number;
+  cursor?: string | null;
+}
+
+export async function listMaintenance(
+  vehicleId: number,
+  params: MaintenanceListParams = {}
+): Promise<Page<Maintenance>> {
+  return apiPage<Maintenance>(`/vehicles/${vehicleId}/maintenance${pageQuery({ ...params })}`);
+}
+
+export async function getMaintenance(vehicleId: number, id: number): Promise<Maintenance> {
+  return api<Maintenance>(`/vehicles/${vehicleId}/maintenance/${id}`);
 }
 
 export async function createMaintenance(vehicleId: number, data: MaintenanceCreate): Promise<Maintenance> {
@@ -1,4 +1,4 @@
-import { api } from "./client";
+import { api, apiPage, pageQuery, type Page } from "./client";
 
 export interface Mod {
   id: number;
@@ -9,6 +9,7 @@ export interface Mod {
   cost: number | null;
   parts_list: string | null;
   created_at: string | null;
+  updated_at: string | null;
 }
 
 export interface ModCreate {
@@ -27,8 +28,21 @@ export interface ModUpdate {
   parts_list?: string | null;
 }
 
-export async function listMods(vehicleId: number): Promise<Mod[]> {
-  return api<Mod[]>(`/vehicles/${vehicleId}/mods`);
+export type ModSort = "date" | "name" | "cost";
+
+export interface ModListParams {
+  sort?: ModSort;
+  order?: "asc" | "desc";
+  limit?: number;
+  cursor?: string | null;
+}
+
+export async function listMods(vehicleId: number, params: ModListParams = {}): Promise<Page<Mod>> {
+  return apiPage<Mod>(`/vehicles/${vehicleId}/mods${pageQuery({ ...params })}`);
+}
+
+export async function getMod(vehicleId: number, id: number): Promise<Mod> {
+  return api<Mod>(`/vehicles/${vehicleId}/mods/${id}`);
 }
 
 export async function createMod(vehicleId: number, data: ModCreate): Promise<Mod> {
@@ -1,4 +1,6 @@
-import { api, apiFormData, uploadsUrl } from "./client";
+import { api, apiFormData, pageQuery, uploadsUrl } from "./client";
+import type { Maintenance, MaintenanceSort } from "./maintenance";
+import type { Mod, ModSort } from "./mods";
 
 export interface Vehicle {
   id: number;
@@ -11,6 +13,7 @@ export interface Vehicle {
   license_plate: string | null;
   current_mileage: number | null;
   photo_path: string | null;
+  photo_variants: Record<string, string> | null;
   created_at: string | null;
   updated_at: string | null;
 }
@@ -47,6 +50,27 @@ export async function getVehicle(id: number): Promise<Vehicle> {
   return api<Vehicle>(`/vehicles/${id}`);
 }
 
+export interface VehicleDetail extends Vehicle {
+  maintenance: Maintenance[];
+  maintenance_next_cursor: string | null;
+  mods: Mod[];
+  mods_next_cursor: string | null;
+}
+
+export interface VehicleDetailParams {
+  maintenance_sort?: MaintenanceSort;
+  maintenance_order?: "asc" | "desc";
+  maintenance_limit?: number;
+  mods_sort?: ModSort;
+  mods_order?: "asc" | "desc";
+  mods_limit?: number;
+}
+
+/** Vehicle plus its maintenance and mods in one request. */
+export async function getVehicleDetail(id: number, params: VehicleDetailParams = {}): Promise<VehicleDetail> {
+  return api<VehicleDetail>(`/vehicles/${id}/full${pageQuery({ ...params })}`);
+}
+
 export async function createVehicle(data: VehicleCreate): Promise<Vehicle> {
   return api<Vehicle>("/vehicles", { method: "POST", body: JSON.stringify(data) });
 }
@@ -65,4 +89,15 @@ export async function uploadVehiclePhoto(vehicleId: number, file: File): Promise
   return apiFormData<Vehicle>(`/vehicles/${vehicleId}/photo`, form);
 }
 
+const PHOTO_VARIANT_WIDTHS: Record<string, number> = { sm: 320, md: 640, lg: 1280 };
+
+/** Smallest resized photo at least `width` px wide; falls back to the original upload. */
+export function vehiclePhotoUrl(v: Vehicle, width: number): string {
+  const variants = v.photo_variants ?? {};
+  const fit = Object.entries(PHOTO_VARIANT_WIDTHS)
+    .sort((a, b) => a[1] - b[1])
+    .find(([name, w]) => w >= width && variants[name]);
+  return uploadsUrl(fit ? variants[fit[0]] : v.photo_path);
+}
+
 export { uploadsUrl };
@@ -1,8 +1,14 @@
 import { useEffect, useState } from "react";
 import { Link } from "react-router-dom";
 import { useAuth } from "../context/AuthContext";
-import { listVehicles, uploadsUrl, type Vehicle } from "../api/vehicles";
+import { getVehicle, listVehicles, vehiclePhotoUrl, type Vehicle } from "../api/vehicles";
 import { getDashboardStats, type DashboardStats } from "../api/dashboard";
+import { subscribeChanges, upsertById } from "../api/events";
+
+// Same order as GET /api/vehicles
+function byYearThenMake(a: Vehicle, b: Vehicle) {
+  return b.year - a.year || a.make.localeCompare(b.make);
+}
 
 function formatMoney(n: number) {
   return new Intl.NumberFormat("en-US", { style: "currency", currency: "USD" }).format(n);
@@ -14,12 +20,45 @@ export default function Dashboard() {
   const [stats, setStats] = useState<DashboardStats | null>(null);
   const [loading, setLoading] = useState(true);
   const [statsYear, setStatsYear] = useState<number | "all">(new Date().getFullYear());
+  // Bumped (at most once a second) when records change, to refetch stats
+  const [statsStamp, setStatsStamp] = useState(0);
 
-  useEffect(() => {
+  function loadVehicles() {
     listVehicles()
       .then(setVehicles)
       .catch(console.error)
       .finally(() => setLoading(false));
+  }
+
+  useEffect(loadVehicles, []);
+
+  useEffect(() => {
+    let statsTimer: ReturnType<typeof setTimeout> | undefined;
+    const unsubscribe = subscribeChanges({
+      onChange: (e) => {
+        if (e.entity === "vehicle") {
+          if (e.action === "deleted") {
+            setVehicles((prev) => prev.filter((v) => v.id !== e.vehicle_id));
+          } else if (e.action !== "imported") {
+            getVehicle(e.vehicle_id)
+              .then((v) => setVehicles((prev) => upsertById(prev, v).sort(byYearThenMake)))
+              .catch(() => {});
+          }
+        }
+        statsTimer ??= setTimeout(() => {
+          statsTimer = undefined;
+          setStatsStamp((n) => n + 1);
+        }, 1000);
+      },
+      onReset: () => {
+        loadVehicles();
+        setStatsStamp((n) => n + 1);
+      },
+    });
+    return () => {
+      unsubscribe();
+      clearTimeout(statsTimer);
+    };
   }, []);
 
   useEffect(() => {
@@ -28,7 +67,7 @@ export default function Dashboard() {
     } else {
       getDashboardStats(statsYear, false).then(setStats).catch(console.error);
     }
-  }, [statsYear]);
+  }, [statsYear, statsStamp]);
 
   return (
     <div className="min-h-screen bg-garage-950">
@@ -242,7 +281,7 @@ export default function Dashboard() {
                 <div className="aspect-[4/3] bg-garage-800 flex items-center justify-center">
                   {v.photo_path ? (
                     <img
-                      src={uploadsUrl(v.photo_path)}
+                      src={vehiclePhotoUrl(v, 640)}
                       alt=""
                       className="w-full h-full object-cover"
                     />
@@ -1,30 +1,36 @@
-import { useEffect, useState } from "react";
+import { useEffect, useRef, useState } from "react";
 import { Link, useParams, useNavigate } from "react-router-dom";
 import { useAuth } from "../context/AuthContext";
 import {
   getVehicle,
+  getVehicleDetail,
   uploadVehiclePhoto,
   uploadsUrl,
+  vehiclePhotoUrl,
   deleteVehicle,
   type Vehicle,
 } from "../api/vehicles";
 import {
   listMaintenance,
+  getMaintenance,
   createMaintenance,
   updateMaintenance,
   deleteMaintenance,
   uploadMaintenanceReceipt,
   type Maintenance,
   type MaintenanceCreate,
+  type MaintenanceSort,
 } from "../api/maintenance";
 import {
   listMods,
+  getMod,
   createMod,
   updateMod,
   deleteMod,
   type Mod,
   type ModCreate,
 } from "../api/mods";
+import { replaceById, subscribeChanges } from "../api/events";
 
 const MAINTENANCE_TYPES = [
   "Oil change",
@@ -50,6 +56,9 @@ const MAINTENANCE_TYPES = [
   "Other",
 ] as const;
 
+// Matches the API's default page size, so "Load more" pages line up
+const PAGE_SIZE = 50;
+
 function formatDate(s: string) {
   return new Date(s).toLocaleDateString();
 }
@@ -66,6 +75,8 @@ export default function VehicleDetail() {
   const [vehicle, setVehicle] = useState<Vehicle | null>(null);
   const [maintenance, setMaintenance] = useState<Maintenance[]>([]);
   const [mods, setMods] = useState<Mod[]>([]);
+  const [maintenanceCursor, setMaintenanceCursor] = useState<string | null>(null);
+  const [modsCursor, setModsCursor] = useState<string | null>(null);
   const [loading, setLoading] = useState(true);
   const [activeTab, setActiveTab] = useState<"maintenance" | "mods">("maintenance");
   const [maintenanceForm, setMaintenanceForm] = useState<MaintenanceCreate | null>(null);
@@ -74,36 +85,25 @@ export default function VehicleDetail() {
   const [editingMod, setEditingMod] = useState<Mod | null>(null);
   const [photoFile, setPhotoFile] = useState<File | null>(null);
   const [receiptFile, setReceiptFile] = useState<{ maintenanceId: number; file: File } | null>(null);
-  const [maintenanceSortBy, setMaintenanceSortBy] = useState<"date" | "type" | "cost" | "mileage">("date");
+  const [maintenanceSortBy, setMaintenanceSortBy] = useState<MaintenanceSort>("date");
   const [maintenanceSortOrder, setMaintenanceSortOrder] = useState<"asc" | "desc">("desc");
 
   const vehicleId = Number(id);
 
-  const sortedMaintenance = [...maintenance].sort((a, b) => {
-    let cmp = 0;
-    if (maintenanceSortBy === "date") {
-      cmp = new Date(a.date).getTime() - new Date(b.date).getTime();
-    } else if (maintenanceSortBy === "type") {
-      cmp = (a.type || "").localeCompare(b.type || "");
-    } else if (maintenanceSortBy === "cost") {
-      cmp = (a.cost ?? 0) - (b.cost ?? 0);
-    } else {
-      cmp = (a.mileage ?? 0) - (b.mileage ?? 0);
-    }
-    return maintenanceSortOrder === "asc" ? cmp : -cmp;
-  });
-
   function load() {
     if (!vehicleId) return;
-    Promise.all([
-      getVehicle(vehicleId),
-      listMaintenance(vehicleId),
-      listMods(vehicleId),
-    ])
-      .then(([v, m, mod]) => {
+    getVehicleDetail(vehicleId, {
+      maintenance_sort: maintenanceSortBy,
+      maintenance_order: maintenanceSortOrder,
+      maintenance_limit: PAGE_SIZE,
+      mods_limit: PAGE_SIZE,
+    })
+      .then(({ maintenance, maintenance_next_cursor, mods, mods_next_cursor, ...v }) => {
         setVehicle(v);
-        setMaintenance(m);
-        setMods(mod);
+        setMaintenance(maintenance);
+        setMaintenanceCursor(maintenance_next_cursor);
+        setMods(mods);
+        setModsCursor(mods_next_cursor);
       })
       .catch(() => navigate("/"))
       .finally(() => setLoading(false));
@@ -113,6 +113,82 @@ export default function VehicleDetail() {
     load();
   }, [vehicleId]);
 
+  // First pages again, in the current sort: where a new or unseen record lands depends on the
+  // sort and on how many pages are loaded, so it isn't inserted locally
+  function reloadMaintenance() {
+    listMaintenance(vehicleId, { sort: maintenanceSortBy, order: maintenanceSortOrder })
+      .then((page) => {
+        setMaintenance(page.items);
+        setMaintenanceCursor(page.nextCursor);
+      })
+      .catch(() => {});
+  }
+
+  function reloadMods() {
+    listMods(vehicleId)
+      .then((page) => {
+        setMods(page.items);
+        setModsCursor(page.nextCursor);
+      })
+      .catch(() => {});
+  }
+
+  // The stream outlives renders; always act on the current rows and sort
+  const liveRef = useRef({ load, reloadMaintenance, reloadMods, maintenance, mods });
+  liveRef.current = { load, reloadMaintenance, reloadMods, maintenance, mods };
+
+  // Patch local state from other tabs' and devices' writes (and echoes of our own)
+  useEffect(() => {
+    if (!vehicleId) return;
+    return subscribeChanges({
+      onChange: (e) => {
+        if (e.vehicle_id !== vehicleId) return;
+        const live = liveRef.current;
+        if (e.action === "imported") {
+          live.load();
+        } else if (e.entity === "vehicle") {
+          if (e.action === "deleted") navigate("/");
+          else getVehicle(vehicleId).then(setVehicle).catch(() => {});
+        } else if (e.id != null) {
+          const entityId = e.id;
+          if (e.entity === "maintenance") {
+            if (e.action === "deleted") setMaintenance((prev) => prev.filter((m) => m.id !== entityId));
+            else if (!live.maintenance.some((m) => m.id === entityId)) live.reloadMaintenance();
+            else getMaintenance(vehicleId, entityId).then((m) => setMaintenance((prev) => replaceById(prev, m))).catch(() => {});
+          } else {
+            if (e.action === "deleted") setMods((prev) => prev.filter((m) => m.id !== entityId));
+            else if (!live.mods.some((m) => m.id === entityId)) live.reloadMods();
+            else getMod(vehicleId, entityId).then((m) => setMods((prev) => replaceById(prev, m))).catch(() => {});
+          }
+        }
+      },
+      onReset: () => liveRef.current.load(),
+    });
+  }, [vehicleId]);
+
+  useEffect(() => {
+    if (!vehicleId || loading) return;
+    reloadMaintenance();
+  }, [maintenanceSortBy, maintenanceSortOrder]);
+
+  async function loadMoreMaintenance() {
+    if (!maintenanceCursor) return;
+    const page = await listMaintenance(vehicleId, {
+      sort: maintenanceSortBy,
+      order: maintenanceSortOrder,
+      cursor: maintenanceCursor,
+    });
+    setMaintenance((prev) => [...prev, ...page.items]);
+    setMaintenanceCursor(page.nextCursor);
+  }
+
+  async function loadMoreMods() {
+    if (!modsCursor) return;
+    const page = await listMods(vehicleId, { cursor: modsCursor });
+    setMods((prev) => [...prev, ...page.items]);
+    setModsCursor(page.nextCursor);
+  }
+
   async function handlePhotoSubmit(e: React.FormEvent) {
     e.preventDefault();
     if (!vehicle || !photoFile) return;
@@ -130,8 +206,8 @@ export default function VehicleDetail() {
     if (!maintenanceForm) return;
     try {
       await createMaintenance(vehicleId, maintenanceForm);
+      reloadMaintenance();
       setMaintenanceForm(null);
-      load();
     } catch (err) {
       alert(err instanceof Error ? err.message : "Failed");
     }
@@ -141,7 +217,7 @@ export default function VehicleDetail() {
     e.preventDefault();
     if (!editingMaintenance) return;
     try {
-      await updateMaintenance(vehicleId, editingMaintenance.id, {
+      const updated = await updateMaintenance(vehicleId, editingMaintenance.id, {
         type: editingMaintenance.type,
         date: editingMaintenance.date,
         mileage: editingMaintenance.mileage,
@@ -149,8 +225,8 @@ export default function VehicleDetail() {
         shop_name: editingMaintenance.shop_name,
         notes: editingMaintenance.notes,
       });
+      setMaintenance((prev) => replaceById(prev, updated));
       setEditingMaintenance(null);
-      load();
     } catch (err) {
       alert(err instanceof Error ? err.message : "Failed");
     }
@@ -161,8 +237,8 @@ export default function VehicleDetail() {
     if (!modForm) return;
     try {
       await createMod(vehicleId, modForm);
+      reloadMods();
       setModForm(null);
-      load();
     } catch (err) {
       alert(err instanceof Error ? err.message : "Failed");
     }
@@ -172,15 +248,15 @@ export default function VehicleDetail() {
     e.preventDefault();
     if (!editingMod) return;
     try {
-      await updateMod(vehicleId, editingMod.id, {
+      const updated = await updateMod(vehicleId, editingMod.id, {
         name: editingMod.name,
         description: editingMod.description,
         date: editingMod.date,
         cost: editingMod.cost,
         parts_list: editingMod.parts_list,
       });
+      setMods((prev) => replaceById(prev, updated));
       setEditingMod(null);
-      load();
     } catch (err) {
       alert(err instanceof Error ? err.message : "Failed");
     }
@@ -199,9 +275,9 @@ export default function VehicleDetail() {
   async function handleReceiptUpload(m: Maintenance) {
     if (!receiptFile || receiptFile.maintenanceId !== m.id) return;
     try {
-      await uploadMaintenanceReceipt(vehicleId, m.id, receiptFile.file);
+      const updated = await uploadMaintenanceReceipt(vehicleId, m.id, receiptFile.file);
+      setMaintenance((prev) => replaceById(prev, updated));
       setReceiptFile(null);
-      load();
     } catch (err) {
       alert(err instanceof Error ? err.message : "Upload failed");
     }
@@ -249,7 +325,7 @@ export default function VehicleDetail() {
             <div className="w-64 h-48 rounded-xl bg-garage-800 overflow-hidden flex items-center justify-center">
               {vehicle.photo_path ? (
                 <img
-                  src={uploadsUrl(vehicle.photo_path)}
+                  src={vehiclePhotoUrl(vehicle, 512)}
                   alt=""
                   className="w-full h-full object-cover"
                 />
@@ -473,9 +549,7 @@ export default function VehicleDetail() {
               <span className="text-sm text-garage-500">Sort by:</span>
               <select
                 value={maintenanceSortBy}
-                onChange={(e) =>
-                  setMaintenanceSortBy(e.target.value as "date" | "type" | "cost" | "mileage")
-                }
+                onChange={(e) => setMaintenanceSortBy(e.target.value as MaintenanceSort)}
                 className="px-2 py-1 rounded bg-garage-800 border border-garage-600 text-white text-sm"
               >
                 <option value="date">Date</option>
@@ -493,7 +567,7 @@ export default function VehicleDetail() {
               </select>
             </div>
             <ul className="space-y-3">
-              {sortedMaintenance.map((m) => (
+              {maintenance.map((m) => (
                 <li
                   key={m.id}
                   className="p-4 rounded-xl bg-garage-900 border border-garage-700"
@@ -594,7 +668,7 @@ export default function VehicleDetail() {
                             onClick={async () => {
                               if (confirm("Delete this record?")) {
                                 await deleteMaintenance(vehicleId, m.id);
-                                load();
+                                setMaintenance((prev) => prev.filter((x) => x.id !== m.id));
                               }
                             }}
                             className="text-sm text-red-400 hover:text-red-300"
@@ -645,6 +719,15 @@ export default function VehicleDetail() {
                 </li>
               ))}
             </ul>
+            {maintenanceCursor && (
+              <button
+                type="button"
+                onClick={loadMoreMaintenance}
+                className="text-sm text-amber-400 hover:text-amber-300"
+              >
+                Load more
+              </button>
+            )}
           </div>
         )}
 
@@ -828,7 +911,7 @@ export default function VehicleDetail() {
                             onClick={async () => {
                               if (confirm("Delete this mod?")) {
                                 await deleteMod(vehicleId, m.id);
-                                load();
+                                setMods((prev) => prev.filter((x) => x.id !== m.id));
                               }
                             }}
                             className="text-sm text-red-400 hover:text-red-300"
@@ -850,6 +933,15 @@ export default function VehicleDetail() {
                 </li>
               ))}
             </ul>
+            {modsCursor && (
+              <button
+                type="button"
+                onClick={loadMoreMods}
+                className="text-sm text-amber-400 hover:text-amber-300"
+              >
+                Load more
+              </button>
+            )}
           </div>
         )}
       </main>